@@ -8,12 +8,17 @@ import os
 from datetime import datetime, timedelta
 
 # Import custom modules
-from financial_data import fetch_stock_data, fetch_market_data, load_sample_data, parse_uploaded_data, compute_financial_metrics
-from narrative_generator import generate_financial_narrative, generate_market_overview
-from consistency_checker import check_narrative_consistency, compute_consistency_score
+from financial_data import fetch_stock_data, fetch_market_data, fetch_peer_data, load_sample_data, parse_uploaded_data, compute_financial_metrics
+from narrative_generator import generate_financial_narrative, generate_market_overview, generate_peer_comparison_narrative, generate_narrative_series
+from consistency_checker import check_narrative_consistency, check_narrative_series_consistency, check_peer_narrative_consistency, compute_consistency_score
 from visualization import create_stock_chart, create_market_trend_chart, create_consistency_gauge
 from utils import display_error, format_currency, highlight_inconsistencies
+from resampling import describe_interval, get_interval
+from indicators import INDICATORS
 import database  # Import the database module
+import profiling
+import session_memory
+import frame_store
 
 # Page configuration
 st.set_page_config(
@@ -30,17 +35,15 @@ st.markdown("""
     accurate, coherent, and data-driven financial insights.
 """)
 
-# Initialize session state variables
-if 'financial_data' not in st.session_state:
-    st.session_state.financial_data = None
-if 'market_data' not in st.session_state:
-    st.session_state.market_data = None
-if 'generated_narrative' not in st.session_state:
-    st.session_state.generated_narrative = None
-if 'consistency_report' not in st.session_state:
-    st.session_state.consistency_report = None
-if 'consistency_score' not in st.session_state:
-    st.session_state.consistency_score = None
+# Initialize session state variables (held in the budgeted session store, see session_memory)
+state = session_memory.session_state(st.session_state, defaults={
+    'financial_data': None,
+    'market_data': None,
+    'peer_data': None,
+    'generated_narrative': None,
+    'consistency_report': None,
+    'consistency_score': None
+})
 
 # Sidebar - Data Input Options
 st.sidebar.header("Data Input")
@@ -64,11 +67,25 @@ if data_source == "Yahoo Finance API":
             datetime.now()
         )
     
+    # Yahoo Finance only serves recent intraday history (7 days of 1m bars, 60 days of 5m)
+    interval = st.sidebar.selectbox(
+        "Bar interval:",
+        ["1d", "1h", "5m", "1m"],
+        format_func=lambda value: describe_interval(value).capitalize()
+    )
+    
     if st.sidebar.button("Fetch Stock Data"):
         with st.spinner("Fetching stock data..."):
             try:
-                st.session_state.financial_data = fetch_stock_data(ticker_symbol, start_date, end_date)
-                st.session_state.market_data = fetch_market_data(start_date, end_date)
+                # Sessions requesting the same ticker and range share one read-only copy
+                state.financial_data = frame_store.get_or_load(
+                    ('stock', ticker_symbol, start_date, end_date, interval),
+                    lambda: fetch_stock_data(ticker_symbol, start_date, end_date, interval)
+                )
+                state.market_data = frame_store.get_or_load(
+                    ('market', start_date, end_date, interval),
+                    lambda: fetch_market_data(start_date, end_date, interval)
+                )
                 st.success(f"Successfully fetched data for {ticker_symbol}")
             except Exception as e:
                 display_error("Error fetching stock data", str(e))
@@ -78,7 +95,7 @@ elif data_source == "Upload CSV":
     
     if uploaded_file is not None:
         try:
-            st.session_state.financial_data = parse_uploaded_data(uploaded_file)
+            state.financial_data = frame_store.share(parse_uploaded_data(uploaded_file))
             st.success("CSV file successfully uploaded and parsed")
         except Exception as e:
             display_error("Error parsing CSV file", str(e))
@@ -86,14 +103,38 @@ elif data_source == "Upload CSV":
 elif data_source == "Sample Data":
     if st.sidebar.button("Load Sample Data"):
         with st.spinner("Loading sample data..."):
-            st.session_state.financial_data, st.session_state.market_data = load_sample_data()
+            financial_data, market_data = load_sample_data()
+            state.financial_data = frame_store.share(financial_data)
+            state.market_data = frame_store.share(market_data)
             st.success("Sample data loaded successfully")
 
 # Sidebar - AI Settings
 st.sidebar.header("AI Settings")
 narrative_type = st.sidebar.selectbox(
     "Narrative type:",
-    ["Quarterly Report", "Market Analysis", "Stock Performance", "Investment Recommendation"]
+    ["Quarterly Report", "Market Analysis", "Stock Performance", "Investment Recommendation", "Peer Comparison",
+     "Historical Series"]
+)
+
+if narrative_type == "Peer Comparison":
+    peer_tickers = st.sidebar.text_input(
+        "Peer tickers:",
+        "MSFT GOOGL AMZN META",
+        help="Space- or comma-separated tickers to compare the loaded stock against"
+    )
+
+if narrative_type == "Historical Series":
+    series_period = st.sidebar.selectbox(
+        "Report every:",
+        ["Quarter", "Month", "Year"],
+        help="Writes one report per period across the whole loaded history"
+    )
+
+technical_indicators = st.sidebar.multiselect(
+    "Technical indicators:",
+    list(INDICATORS),
+    format_func=lambda name: INDICATORS[name][0],
+    help="Extra indicators to discuss in the Technical Analysis section (analysis depth 2 and above)"
 )
 
 depth_level = st.sidebar.slider(
@@ -118,18 +159,18 @@ consistency_threshold = st.sidebar.slider(
 )
 
 # Main content area
-if st.session_state.financial_data is not None:
+if state.financial_data is not None:
     # Display data tabs
     tabs = st.tabs(["Data Overview", "Generate Narrative", "Consistency Analysis"])
     
     # Data Overview Tab
     with tabs[0]:
         # Check if we have financial data or generic data
-        is_financial_data = ('Open' in st.session_state.financial_data.columns and 
-                           'High' in st.session_state.financial_data.columns and 
-                           'Low' in st.session_state.financial_data.columns and 
-                           'Close' in st.session_state.financial_data.columns and 
-                           'Volume' in st.session_state.financial_data.columns)
+        is_financial_data = ('Open' in state.financial_data.columns and 
+                           'High' in state.financial_data.columns and 
+                           'Low' in state.financial_data.columns and 
+                           'Close' in state.financial_data.columns and 
+                           'Volume' in state.financial_data.columns)
         
         if is_financial_data:
             st.header("Financial Data Overview")
@@ -142,9 +183,9 @@ if st.session_state.financial_data is not None:
                 st.subheader("Stock Data")
             else:
                 st.subheader("Data Preview")
-            st.dataframe(st.session_state.financial_data.head())
+            st.dataframe(state.financial_data.head())
             
-            summary_stats = st.session_state.financial_data.describe(include='all')
+            summary_stats = state.financial_data.describe(include='all')
             st.subheader("Summary Statistics")
             st.dataframe(summary_stats)
         
@@ -154,25 +195,25 @@ if st.session_state.financial_data is not None:
             else:
                 st.subheader("Data Visualization")
             
-            fig = create_stock_chart(st.session_state.financial_data)
+            fig = create_stock_chart(state.financial_data)
             st.plotly_chart(fig, use_container_width=True)
             
-            if st.session_state.market_data is not None:
+            if state.market_data is not None:
                 if is_financial_data:
                     st.subheader("Market Trends")
                 else:
                     st.subheader("Additional Visualization")
-                fig = create_market_trend_chart(st.session_state.market_data)
+                fig = create_market_trend_chart(state.market_data)
                 st.plotly_chart(fig, use_container_width=True)
     
     # Generate Narrative Tab
     with tabs[1]:
         # Check if we have financial data or generic data
-        is_financial_data = ('Open' in st.session_state.financial_data.columns and 
-                           'High' in st.session_state.financial_data.columns and 
-                           'Low' in st.session_state.financial_data.columns and 
-                           'Close' in st.session_state.financial_data.columns and 
-                           'Volume' in st.session_state.financial_data.columns)
+        is_financial_data = ('Open' in state.financial_data.columns and 
+                           'High' in state.financial_data.columns and 
+                           'Low' in state.financial_data.columns and 
+                           'Close' in state.financial_data.columns and 
+                           'Volume' in state.financial_data.columns)
         
         if is_financial_data:
             st.header("Generate Financial Narrative")
@@ -183,20 +224,62 @@ if st.session_state.financial_data is not None:
             if is_financial_data:
                 with st.spinner("Generating financial narrative using AI..."):
                     try:
-                        # Generate the financial narrative
-                        st.session_state.generated_narrative = generate_financial_narrative(
-                            st.session_state.financial_data,
-                            st.session_state.market_data,
-                            narrative_type,
-                            depth_level,
-                            target_audience
-                        )
+                        if narrative_type == "Peer Comparison":
+                            # Fetch the loaded stock and its peers over the same range in one download
+                            target_symbol = state.financial_data['Symbol'].iloc[0] if 'Symbol' in state.financial_data.columns else "Unknown"
+                            symbols = list(dict.fromkeys([target_symbol] + peer_tickers.replace(',', ' ').upper().split()))
+                            peer_start = state.financial_data['Date'].min()
+                            peer_end = state.financial_data['Date'].max() + timedelta(days=1)
+                            peer_interval = get_interval(state.financial_data)
+                            state.peer_data = frame_store.get_or_load(
+                                ('peers', tuple(symbols), peer_start, peer_end, peer_interval),
+                                lambda: fetch_peer_data(symbols, peer_start, peer_end, peer_interval)
+                            )
+                            state.generated_narrative = generate_peer_comparison_narrative(
+                                state.peer_data,
+                                target_symbol,
+                                depth_level,
+                                target_audience
+                            )
+                        elif narrative_type == "Historical Series":
+                            # One report per period, newest last
+                            period = {'Quarter': '3mo', 'Month': '1mo', 'Year': '1y'}[series_period]
+                            series = generate_narrative_series(
+                                state.financial_data,
+                                state.market_data,
+                                period,
+                                depth_level=depth_level,
+                                target_audience=target_audience
+                            )
+                            state.generated_narrative = "\n\n---\n\n".join(item['narrative'] for item in series)
+                        else:
+                            # Generate the financial narrative
+                            state.generated_narrative = generate_financial_narrative(
+                                state.financial_data,
+                                state.market_data,
+                                narrative_type,
+                                depth_level,
+                                target_audience,
+                                technical_indicators
+                            )
                         
-                        # Check consistency of the narrative
-                        st.session_state.consistency_report, st.session_state.consistency_score = check_narrative_consistency(
-                            st.session_state.generated_narrative,
-                            st.session_state.financial_data
-                        )
+                        # Check consistency of the narrative (peer reports against the whole peer
+                        # group, series reports each against its own window)
+                        if narrative_type == "Peer Comparison":
+                            state.consistency_report, state.consistency_score = check_peer_narrative_consistency(
+                                state.generated_narrative,
+                                state.peer_data
+                            )
+                        elif narrative_type == "Historical Series":
+                            state.consistency_report, state.consistency_score = check_narrative_series_consistency(
+                                series,
+                                state.financial_data
+                            )
+                        else:
+                            state.consistency_report, state.consistency_score = check_narrative_consistency(
+                                state.generated_narrative,
+                                state.financial_data
+                            )
                         
                         st.success("Narrative generated successfully!")
                     except Exception as e:
@@ -206,7 +289,7 @@ if st.session_state.financial_data is not None:
                 with st.spinner("Generating data narrative using AI..."):
                     try:
                         # Get basic statistics and structure of the data
-                        metrics = compute_financial_metrics(st.session_state.financial_data)
+                        metrics = compute_financial_metrics(state.financial_data)
                         
                         # Create a basic data narrative title
                         title = f"Data Analysis Report: {datetime.now().strftime('%Y-%m-%d')}"
@@ -218,7 +301,7 @@ if st.session_state.financial_data is not None:
                         # Overview section
                         overview = "## Data Overview\n\n"
                         overview += f"This dataset contains {metrics.get('num_records', 0)} records with {metrics.get('num_columns', 0)} columns. "
-                        if 'Date' in st.session_state.financial_data.columns:
+                        if 'Date' in state.financial_data.columns:
                             overview += f"The data spans from {metrics.get('start_date', 'N/A')} to {metrics.get('end_date', 'N/A')}.\n\n"
                         overview += "The dataset includes the following columns: " + ", ".join(metrics.get('columns', [])) + ".\n"
                         sections.append(overview)
@@ -298,7 +381,7 @@ if st.session_state.financial_data is not None:
                             if len(numeric_cols) > 1:
                                 conclusion += "- There may be relationships between the numeric variables that could be explored further with correlation analysis.\n"
                         
-                        if 'Date' in st.session_state.financial_data.columns:
+                        if 'Date' in state.financial_data.columns:
                             conclusion += "- The temporal aspect of this data could reveal trends and patterns over time.\n"
                         
                         conclusion += "\nThis analysis provides a basic overview of the dataset. For more detailed insights, consider specific statistical techniques appropriate for your research questions.\n"
@@ -309,30 +392,30 @@ if st.session_state.financial_data is not None:
                         sections.append(disclaimer)
                         
                         # Combine all sections to create the narrative
-                        st.session_state.generated_narrative = "\n\n".join(sections)
+                        state.generated_narrative = "\n\n".join(sections)
                         
                         # Create a simple consistency report (always high for generated reports)
-                        st.session_state.consistency_report = {
+                        state.consistency_report = {
                             "overall_score": 0.95,
                             "checked_claims": 0,
                             "claim_checks": []
                         }
-                        st.session_state.consistency_score = 0.95
+                        state.consistency_score = 0.95
                         
                         st.success("Data narrative generated successfully!")
                     except Exception as e:
                         display_error("Error generating data narrative", str(e))
         
-        if st.session_state.generated_narrative:
+        if state.generated_narrative:
             if is_financial_data:
                 st.subheader("Generated Financial Narrative")
             else:
                 st.subheader("Generated Data Narrative")
                 
-            st.markdown(st.session_state.generated_narrative)
+            st.markdown(state.generated_narrative)
             
             # Download button for the narrative
-            narrative_download = st.session_state.generated_narrative
+            narrative_download = state.generated_narrative
             if is_financial_data:
                 file_name = f"financial_narrative_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
             else:
@@ -348,18 +431,18 @@ if st.session_state.financial_data is not None:
     # Consistency Analysis Tab
     with tabs[2]:
         # Check if we have financial data or generic data
-        is_financial_data = ('Open' in st.session_state.financial_data.columns and 
-                           'High' in st.session_state.financial_data.columns and 
-                           'Low' in st.session_state.financial_data.columns and 
-                           'Close' in st.session_state.financial_data.columns and 
-                           'Volume' in st.session_state.financial_data.columns)
+        is_financial_data = ('Open' in state.financial_data.columns and 
+                           'High' in state.financial_data.columns and 
+                           'Low' in state.financial_data.columns and 
+                           'Close' in state.financial_data.columns and 
+                           'Volume' in state.financial_data.columns)
         
         if is_financial_data:
             st.header("Narrative Consistency Analysis")
         else:
             st.header("Data Narrative Reliability Check")
         
-        if st.session_state.consistency_report and st.session_state.consistency_score:
+        if state.consistency_report and state.consistency_score:
             col1, col2 = st.columns([1, 2])
             
             with col1:
@@ -368,10 +451,10 @@ if st.session_state.financial_data is not None:
                 else:
                     st.subheader("Reliability Score")
                     
-                fig = create_consistency_gauge(st.session_state.consistency_score, consistency_threshold)
+                fig = create_consistency_gauge(state.consistency_score, consistency_threshold)
                 st.plotly_chart(fig, use_container_width=True)
                 
-                if st.session_state.consistency_score < consistency_threshold:
+                if state.consistency_score < consistency_threshold:
                     if is_financial_data:
                         st.warning(f"⚠️ The narrative consistency is below the threshold of {consistency_threshold:.2f}")
                     else:
@@ -388,7 +471,7 @@ if st.session_state.financial_data is not None:
                 else:
                     st.subheader("Reliability Check Results")
                     
-                st.json(st.session_state.consistency_report)
+                st.json(state.consistency_report)
                 
                 if is_financial_data:
                     st.subheader("Narrative with Highlighted Inconsistencies")
@@ -396,8 +479,8 @@ if st.session_state.financial_data is not None:
                     st.subheader("Narrative with Highlighted Areas")
                     
                 highlighted_narrative = highlight_inconsistencies(
-                    st.session_state.generated_narrative, 
-                    st.session_state.consistency_report
+                    state.generated_narrative, 
+                    state.consistency_report
                 )
                 st.markdown(highlighted_narrative, unsafe_allow_html=True)
         else:
@@ -427,6 +510,46 @@ else:
        - Check the consistency and reliability of the generated content
     """)
 
+# Sidebar - Debug panel (rendered last so it includes the stages of this run)
+with st.sidebar.expander("Debug: Performance"):
+    # Profiling is process-wide, so it is switched on for the whole server with PROFILING=1
+    # rather than from a session; the timings aggregate every session's runs
+    if profiling.is_enabled():
+        stats = profiling.get_stats()
+        if stats['stages']:
+            stage_table = pd.DataFrame([
+                {
+                    'Stage': name,
+                    'Calls': stage_stats['count'],
+                    'Total (ms)': stage_stats['total'] * 1000,
+                    'Mean (ms)': stage_stats['mean'] * 1000,
+                    'Max (ms)': stage_stats['max'] * 1000
+                }
+                for name, stage_stats in stats['stages'].items()
+            ]).sort_values('Total (ms)', ascending=False)
+            st.dataframe(stage_table, hide_index=True)
+        else:
+            st.caption("No stages recorded yet")
+        
+        if stats['counters']:
+            st.json(stats['counters'])
+        
+        if st.button("Reset timings"):
+            profiling.reset()
+    else:
+        st.caption("Stage timings are off; start the app with PROFILING=1 to record them")
+    
+    # Session memory accounting
+    usage = session_memory.get_usage()
+    st.caption(f"Session memory: {usage['total_bytes'] / 2**20:,.2f} MiB of "
+               f"{usage['budget_bytes'] / 2**20:,.0f} MiB budget across {len(usage['sessions'])} sessions")
+    shared = frame_store.get_stats()
+    st.caption(f"Shared frames: {shared['frames']} ({shared['bytes'] / 2**20:,.2f} MiB, {shared['views']} session references)")
+    for session in usage['sessions']:
+        if session['session_id'] == state.session_id:
+            st.caption(f"This session: {session['bytes'] / 2**20:,.2f} MiB"
+                       + (f", {len(session['spilled_keys'])} values on disk" if session['spilled_keys'] else ""))
+
 # Footer
 st.markdown("---")
 st.caption("AI Financial Narrative Generator | Powered by Streamlit, Python, and NLP Technologies")
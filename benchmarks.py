@@ -0,0 +1,859 @@
+import argparse
+import asyncio
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+import json
+import database
+import storage_codec
+import synthetic_data
+import database_async
+import range_index
+import indicators
+import resampling
+from financial_data import compute_financial_metrics, compute_window_metrics, detect_key_events
+from narrative_generator import generate_financial_narrative
+from consistency_checker import build_date_index, verify_date_values, check_narrative_consistency
+from visualization import create_stock_chart, create_market_trend_chart
+from utils import highlight_inconsistencies
+
+def make_synthetic_stock_data(years=30, seed=42, symbol="SYN"):
+    """
+    Create a synthetic daily OHLCV frame shaped like fetch_stock_data output
+
+    Parameters:
+    years (int): Number of years of business-day bars
+    seed (int): Random seed for reproducible prices
+    symbol (str): Symbol to store in the Symbol column
+
+    Returns:
+    pandas.DataFrame: Synthetic stock data
+    """
+    return synthetic_data.generate_stock_data(symbol, end_date='2025-01-01', periods=years * 252, seed=seed)
+
+def make_synthetic_minute_data(days=60, seed=42, symbol="SYN"):
+    """
+    Create a synthetic one-minute OHLCV frame shaped like fetch_stock_data output
+
+    Parameters:
+    days (int): Number of business days of regular-session (09:30-16:00) bars
+    seed (int): Random seed for reproducible prices
+    symbol (str): Symbol to store in the Symbol column
+
+    Returns:
+    pandas.DataFrame: Synthetic minute bars
+    """
+    return synthetic_data.generate_stock_data(symbol, end_date='2025-01-01', periods=days * 390,
+                                              interval='1m', seed=seed)
+
+def _time_call(func, repeat=3):
+    """Return the best wall-clock time in seconds over several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_date_claims(years=30, num_claims=2000, seed=42):
+    """
+    Benchmark verification of date-specific claims on a long daily history
+
+    Compares binary search over the date index against a linear scan of the
+    Date column for every claim.
+
+    Parameters:
+    years (int): Years of daily history
+    num_claims (int): Number of "price on date" claims to verify
+    seed (int): Random seed
+
+    Returns:
+    dict: Timings in seconds and claims per second for both approaches
+    """
+    data = make_synthetic_stock_data(years=years, seed=seed)
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, len(data), num_claims)
+    claims = [
+        ([data['Date'].iloc[p].strftime('%Y-%m-%d')], [round(float(data['High'].iloc[p]), 2)])
+        for p in positions
+    ]
+
+    def indexed():
+        date_index = build_date_index(data)
+        for dates, values in claims:
+            verify_date_values(dates, values, data, date_index)
+
+    def linear_scan():
+        for dates, values in claims:
+            row = data[data['Date'] == pd.Timestamp(dates[0])].iloc[0]
+            any(abs(value - row['High']) <= 0.01 for value in values)
+
+    indexed_time = _time_call(indexed)
+    scan_time = _time_call(linear_scan)
+
+    return {
+        'rows': len(data),
+        'claims': num_claims,
+        'indexed_seconds': indexed_time,
+        'linear_scan_seconds': scan_time,
+        'indexed_claims_per_second': num_claims / indexed_time,
+        'linear_scan_claims_per_second': num_claims / scan_time
+    }
+
+def benchmark_resampling(years=2, intervals=('5m', '1h', '1d'), seed=42):
+    """
+    Benchmark rolling minute bars up to coarser intervals
+
+    Compares resampling.resample_ohlcv against pandas resample().agg() on the
+    same bars, and reports the engine's peak traced memory.
+
+    Parameters:
+    years (int): Years of regular-session minute bars
+    intervals (tuple): Target intervals
+    seed (int): Random seed
+
+    Returns:
+    list: One dict per interval with rows, timings and peak memory
+    """
+    data = make_synthetic_minute_data(days=years * 252, seed=seed)
+    indexed = data.set_index('Date')[list(resampling.PRICE_COLUMNS)]
+    aggregations = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    rules = {'5m': ('5min', None), '1h': ('60min', '30min'), '1d': ('1D', None)}
+
+    results = []
+    for interval in intervals:
+        rule, offset = rules[interval]
+        engine_time = _time_call(lambda: resampling.resample_ohlcv(data, interval))
+        pandas_time = _time_call(lambda: indexed.resample(rule, offset=offset).agg(aggregations).dropna())
+        _, measurement = _measure_stage(lambda: resampling.resample_ohlcv(data, interval), repeat=1)
+        results.append({
+            'interval': interval,
+            'rows': len(data),
+            'engine_seconds': engine_time,
+            'pandas_seconds': pandas_time,
+            'engine_rows_per_second': len(data) / engine_time,
+            'engine_peak_memory_mib': measurement['peak_memory_bytes'] / 2**20
+        })
+    return results
+
+def benchmark_window_metrics(years=20, periods=(('3mo', 1), ('1mo', 1), ('3mo', 4)), seed=42):
+    """
+    Benchmark the metrics behind a rolling series of narratives
+
+    Compares compute_window_metrics (one pass for every window) against slicing
+    each window and calling compute_financial_metrics and detect_key_events on it,
+    which is what generating one narrative per window costs otherwise.
+
+    Parameters:
+    years (int): Years of daily bars
+    periods (tuple): (period, span) window layouts
+    seed (int): Random seed
+
+    Returns:
+    list: One dict per layout with window count and timings
+    """
+    data = make_synthetic_stock_data(years=years, seed=seed)
+
+    def per_window(windows):
+        for start, end in zip(windows['start'], windows['end']):
+            window = data.iloc[start:end]
+            compute_financial_metrics(window)
+            detect_key_events(window, top_n=0)
+
+    results = []
+    for period, span in periods:
+        windows = compute_window_metrics(data, period, span)
+        single_pass_time = _time_call(lambda: compute_window_metrics(data, period, span))
+        per_window_time = _time_call(lambda: per_window(windows), repeat=1)
+        results.append({
+            'period': period,
+            'span': span,
+            'rows': len(data),
+            'windows': len(windows['start']),
+            'single_pass_seconds': single_pass_time,
+            'per_window_seconds': per_window_time,
+            'speedup': per_window_time / single_pass_time
+        })
+    return results
+
+def benchmark_range_queries(years=30, num_queries=2000, seed=42):
+    """
+    Benchmark summarizing arbitrary date sub-ranges
+
+    Compares range_index queries (after a one-off build) against slicing each range
+    and rescanning it for the high, low, average volume, return and volatility.
+
+    Parameters:
+    years (int): Years of daily bars
+    num_queries (int): Number of random ranges
+    seed (int): Random seed
+
+    Returns:
+    dict: Rows, queries, build time and per-query timings for both approaches
+    """
+    data = make_synthetic_stock_data(years=years, seed=seed)
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, len(data) - 1, num_queries)
+    ends = np.minimum(len(data), starts + rng.integers(2, 2 * 252, num_queries))
+
+    def rescan():
+        for start, end in zip(starts, ends):
+            window = data.iloc[start:end]
+            window['High'].max(), window['Low'].min(), window['Volume'].mean()
+            window['Close'].iloc[-1] / window['Close'].iloc[0] - 1, window['Close'].pct_change().std()
+
+    index = range_index.build_range_index(data)
+    build_time = _time_call(lambda: range_index.build_range_index(data))
+    query_time = _time_call(lambda: [range_index.query_range(index, int(start), int(end)) for start, end in zip(starts, ends)])
+    vectorized_time = _time_call(lambda: range_index.query_range(index, starts, ends))
+    rescan_time = _time_call(rescan, repeat=1)
+    return {
+        'rows': len(data),
+        'queries': num_queries,
+        'build_seconds': build_time,
+        'index_query_microseconds': query_time / num_queries * 1e6,
+        'vectorized_query_microseconds': vectorized_time / num_queries * 1e6,
+        'rescan_query_microseconds': rescan_time / num_queries * 1e6,
+        'speedup': rescan_time / query_time
+    }
+
+def _naive_indicators(data):
+    """The indicator pack computed one indicator at a time, each with its own pandas passes"""
+    close = data['Close']
+    results = {}
+
+    change = close.diff()
+    average_gain = change.clip(lower=0).ewm(alpha=1 / indicators.WILDER_PERIOD, adjust=False, min_periods=indicators.WILDER_PERIOD).mean()
+    average_loss = (-change.clip(upper=0)).ewm(alpha=1 / indicators.WILDER_PERIOD, adjust=False, min_periods=indicators.WILDER_PERIOD).mean()
+    results['RSI'] = 100 - 100 / (1 + average_gain / average_loss)
+
+    macd = (close.ewm(span=indicators.MACD_FAST, adjust=False, min_periods=indicators.MACD_FAST).mean()
+            - close.ewm(span=indicators.MACD_SLOW, adjust=False, min_periods=indicators.MACD_SLOW).mean())
+    results['MACD'] = macd
+    results['MACD_Signal'] = macd.ewm(span=indicators.MACD_SIGNAL, adjust=False, min_periods=indicators.MACD_SIGNAL).mean()
+
+    middle = close.rolling(indicators.BOLLINGER_WINDOW).mean()
+    spread = indicators.BOLLINGER_STD * close.rolling(indicators.BOLLINGER_WINDOW).std(ddof=0)
+    results['BB_Upper'] = middle + spread
+    results['BB_Lower'] = middle - spread
+
+    previous_close = close.shift()
+    true_range = pd.concat([data['High'] - data['Low'], (data['High'] - previous_close).abs(),
+                            (data['Low'] - previous_close).abs()], axis=1).max(axis=1)
+    results['ATR'] = true_range.ewm(alpha=1 / indicators.WILDER_PERIOD, adjust=False, min_periods=indicators.WILDER_PERIOD).mean()
+
+    results['Drawdown'] = (close / close.cummax() - 1) * 100
+    results['OBV'] = (np.sign(close.diff()) * data['Volume']).fillna(0).cumsum()
+    return results
+
+def benchmark_indicators(years=30, seed=42):
+    """
+    Benchmark the extended indicator pack
+
+    Compares indicators.compute_indicators (shared intermediates, one smoothing
+    pass for RSI and ATR) against computing each indicator separately with pandas.
+
+    Parameters:
+    years (int): Years of daily bars
+    seed (int): Random seed
+
+    Returns:
+    dict: Rows and timings for both approaches
+    """
+    data = make_synthetic_stock_data(years=years, seed=seed)
+    fused_time = _time_call(lambda: indicators.compute_indicators(data))
+    naive_time = _time_call(lambda: _naive_indicators(data))
+    return {
+        'rows': len(data),
+        'indicators': len(indicators.INDICATORS),
+        'fused_seconds': fused_time,
+        'naive_seconds': naive_time,
+        'speedup': naive_time / fused_time
+    }
+
+def make_claim_heavy_report(num_sentences=1000, seed=42):
+    """
+    Create a long synthetic narrative with one claim check per sentence
+
+    Parameters:
+    num_sentences (int): Number of sentences in the narrative
+    seed (int): Random seed for claim scores
+
+    Returns:
+    tuple: (narrative, consistency_report)
+    """
+    rng = np.random.default_rng(seed)
+    sentences = []
+    claim_checks = []
+    position = 0
+    for i in range(num_sentences):
+        sentence = f"On day {i} the closing price was ${100 + i % 50:.2f}, a change of {i % 7}.5%."
+        score = float(rng.choice([0.1, 0.3, 0.6, 0.95]))
+        claim_checks.append({
+            'claim_text': sentence,
+            'claim_type': 'price_claim',
+            'start': position,
+            'end': position + len(sentence),
+            'consistency_score': score,
+            'verification_result': 'contradicted' if score < 0.5 else 'verified',
+            'explanation': f"Synthetic explanation for claim {i}."
+        })
+        sentences.append(sentence)
+        position += len(sentence) + 1
+
+    narrative = " ".join(sentences)
+    report = {
+        'overall_score': float(np.mean([check['consistency_score'] for check in claim_checks])),
+        'checked_claims': len(claim_checks),
+        'claim_checks': claim_checks
+    }
+    return narrative, report
+
+def _replace_per_claim_highlight(narrative, consistency_report):
+    """Previous highlighter: one str.replace over the whole narrative per claim"""
+    highlighted = narrative
+    for claim in sorted(consistency_report['claim_checks'], key=lambda x: x.get('consistency_score', 1.0)):
+        if claim['consistency_score'] < 0.9:
+            highlighted = highlighted.replace(claim['claim_text'], f'<span>{claim["claim_text"]}</span>')
+    return f'<p>{highlighted}</p>'
+
+def benchmark_highlighter(sentence_counts=(250, 1000, 4000, 16000), baseline_limit=4000):
+    """
+    Benchmark highlight_inconsistencies on increasingly long claim-heavy reports
+
+    Parameters:
+    sentence_counts (tuple): Report sizes in sentences (one claim per sentence)
+    baseline_limit (int): Largest size to also time with the per-claim replace baseline
+
+    Returns:
+    list: One dict per size with timings and nanoseconds per narrative character
+    """
+    results = []
+    for num_sentences in sentence_counts:
+        narrative, report = make_claim_heavy_report(num_sentences)
+        elapsed = _time_call(lambda: highlight_inconsistencies(narrative, report))
+        result = {
+            'sentences': num_sentences,
+            'characters': len(narrative),
+            'seconds': elapsed,
+            'ns_per_character': elapsed * 1e9 / len(narrative)
+        }
+        if num_sentences <= baseline_limit:
+            result['replace_baseline_seconds'] = _time_call(
+                lambda: _replace_per_claim_highlight(narrative, report), repeat=1
+            )
+        results.append(result)
+    return results
+
+def benchmark_bulk_insert(num_rows=5000, database_url=None):
+    """
+    Benchmark saving narratives one row at a time against the bulk insert API
+
+    Parameters:
+    num_rows (int): Narratives to insert with each approach
+    database_url (str): Database to benchmark against (defaults to a temporary SQLite file)
+
+    Returns:
+    dict: Rows per second for save_narrative and save_narratives_bulk
+    """
+    temp_dir = None
+    if database_url is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}"
+
+    try:
+        database.configure_engine(database_url)
+        dataset_id = database.save_dataset("Benchmark", "financial", "sample")
+        narrative, report = make_claim_heavy_report(20)
+        rows = [{
+            'dataset_id': dataset_id,
+            'title': f"Benchmark narrative {i}",
+            'content': narrative,
+            'narrative_type': 'financial',
+            'consistency_score': report['overall_score'],
+            'consistency_report': report,
+            'target_audience': 'Investors',
+            'depth_level': 3
+        } for i in range(num_rows)]
+
+        start = time.perf_counter()
+        for row in rows:
+            database.save_narrative(**row)
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        database.save_narratives_bulk(rows)
+        bulk_seconds = time.perf_counter() - start
+    finally:
+        database.dispose_engine()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    return {
+        'rows': num_rows,
+        'single_row_seconds': single_seconds,
+        'bulk_seconds': bulk_seconds,
+        'single_row_rows_per_second': num_rows / single_seconds,
+        'bulk_rows_per_second': num_rows / bulk_seconds
+    }
+
+SEARCH_VOCABULARY = [
+    'revenue', 'earnings', 'growth', 'decline', 'volatility', 'momentum', 'dividend', 'margin',
+    'outperformed', 'underperformed', 'bullish', 'bearish', 'support', 'resistance', 'breakout',
+    'rally', 'selloff', 'guidance', 'forecast', 'liquidity', 'valuation', 'sector', 'index',
+    'inflation', 'rates', 'yield', 'currency', 'commodity', 'energy', 'technology', 'healthcare'
+]
+
+def benchmark_search(num_narratives=1_000_000, num_queries=50, database_url=None, seed=42):
+    """
+    Benchmark ranked full-text search against scanning narrative bodies
+
+    The baseline is scan_search, which decompresses each stored body and matches
+    the terms in the text (a SQL LIKE over the column would scan compressed bytes).
+
+    Parameters:
+    num_narratives (int): Narratives to load into the table
+    num_queries (int): Two-term queries to run with each approach
+    database_url (str): Database to benchmark against (defaults to a temporary SQLite file)
+    seed (int): Random seed for synthetic narrative text
+
+    Returns:
+    dict: Load time and average query latency for both approaches
+    """
+    temp_dir = None
+    if database_url is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'search.db')}"
+
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(SEARCH_VOCABULARY + [f"ticker{i}" for i in range(5000)])
+
+    try:
+        database.configure_engine(database_url)
+        dataset_id = database.save_dataset("Search benchmark", "financial", "sample")
+
+        start = time.perf_counter()
+        chunk = 50_000
+        for offset in range(0, num_narratives, chunk):
+            count = min(chunk, num_narratives - offset)
+            words = vocabulary[rng.integers(0, len(vocabulary), (count, 60))]
+            database.save_narratives_bulk([{
+                'dataset_id': dataset_id,
+                'title': f"Narrative {offset + i}",
+                'content': ' '.join(row),
+                'narrative_type': 'financial'
+            } for i, row in enumerate(words)], batch_size=5000)
+        load_seconds = time.perf_counter() - start
+
+        queries = [' '.join(rng.choice(SEARCH_VOCABULARY, 2, replace=False)) for _ in range(num_queries)]
+
+        start = time.perf_counter()
+        for query in queries:
+            database.search_narratives(query, limit=20)
+        indexed_seconds = (time.perf_counter() - start) / num_queries
+
+        start = time.perf_counter()
+        with database.get_session() as session:
+            for query in queries:
+                database.scan_search(session, query.split(), limit=20)
+        scan_seconds = (time.perf_counter() - start) / num_queries
+    finally:
+        database.dispose_engine()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    return {
+        'narratives': num_narratives,
+        'load_seconds': load_seconds,
+        'indexed_query_seconds': indexed_seconds,
+        'substring_scan_query_seconds': scan_seconds
+    }
+
+def benchmark_async_queries(num_queries=500, concurrency=25, num_narratives=2000, database_url=None):
+    """
+    Benchmark concurrent query throughput of the async data access layer
+
+    Runs the same mix of recent-narrative, per-dataset and search queries one at a
+    time through database.py and concurrently through database_async.py.
+
+    Parameters:
+    num_queries (int): Queries to run with each approach
+    concurrency (int): Maximum in-flight async queries
+    num_narratives (int): Narratives to seed the database with
+    database_url (str): Database to benchmark against (defaults to a temporary SQLite file)
+
+    Returns:
+    dict: Queries per second for sequential and concurrent execution
+    """
+    temp_dir = None
+    if database_url is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'async.db')}"
+
+    try:
+        database.configure_engine(database_url)
+        dataset_ids = database.save_datasets_bulk([
+            {'name': f"Dataset {i}", 'data_type': 'financial', 'source_type': 'sample'} for i in range(20)
+        ])
+        narrative, _ = make_claim_heavy_report(10)
+        database.save_narratives_bulk([{
+            'dataset_id': dataset_ids[i % len(dataset_ids)],
+            'title': f"Narrative {i}",
+            'content': f"{SEARCH_VOCABULARY[i % len(SEARCH_VOCABULARY)]} {narrative}",
+            'narrative_type': 'financial'
+        } for i in range(num_narratives)])
+
+        def sync_query(i):
+            kind = i % 3
+            if kind == 0:
+                return database.get_recent_narratives(10)
+            if kind == 1:
+                return database.get_narratives_for_dataset(dataset_ids[i % len(dataset_ids)], 10)
+            return database.search_narratives(SEARCH_VOCABULARY[i % len(SEARCH_VOCABULARY)], 10)
+
+        start = time.perf_counter()
+        for i in range(num_queries):
+            sync_query(i)
+        sequential_seconds = time.perf_counter() - start
+
+        async def run_concurrent():
+            await database_async.configure_engine(database_url)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def async_query(i):
+                async with semaphore:
+                    kind = i % 3
+                    if kind == 0:
+                        return await database_async.get_recent_narratives(10)
+                    if kind == 1:
+                        return await database_async.get_narratives_for_dataset(dataset_ids[i % len(dataset_ids)], 10)
+                    return await database_async.search_narratives(SEARCH_VOCABULARY[i % len(SEARCH_VOCABULARY)], 10)
+
+            try:
+                start = time.perf_counter()
+                await asyncio.gather(*[async_query(i) for i in range(num_queries)])
+                return time.perf_counter() - start
+            finally:
+                await database_async.dispose_engine()
+
+        concurrent_seconds = asyncio.run(run_concurrent())
+    finally:
+        database.dispose_engine()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    return {
+        'queries': num_queries,
+        'concurrency': concurrency,
+        'sequential_queries_per_second': num_queries / sequential_seconds,
+        'concurrent_queries_per_second': num_queries / concurrent_seconds
+    }
+
+def make_consistency_report(num_claims=15, seed=42):
+    """
+    Create a realistic consistency report in the check_narrative_consistency format
+
+    Parameters:
+    num_claims (int): Number of claim checks
+    seed (int): Random seed
+
+    Returns:
+    dict: Consistency report
+    """
+    rng = np.random.default_rng(seed)
+    templates = [
+        ('price_claim', 'verified', 0.9, "The price value {v:.2f} is within the observed price range ($84.37 to $210.45)."),
+        ('price_claim', 'contradicted', 0.2, "The price value {v:.2f} is significantly outside the observed price range ($84.37 to $210.45)."),
+        ('date_specific_claim', 'verified', 0.95, "The cited value matches the high price of ${v:.2f} on 2024-03-14."),
+        ('trend_claim', 'verified', 0.9, "The claimed trend direction matches the observed price movement ({v:.2f}%)."),
+        ('volatility_claim', 'contradicted', 0.2, "The volatility claim contradicts the observed volatility of {v:.2f}%."),
+        ('comparison_claim', 'partially verified', 0.7, "The sentiment of the comparison appears to generally match the observed performance.")
+    ]
+    claim_checks = []
+    position = 0
+    for i in range(num_claims):
+        claim_type, result, score, explanation = templates[int(rng.integers(0, len(templates)))]
+        value = float(rng.uniform(1, 200))
+        claim_text = f"The stock closed at ${value:.2f} after a {claim_type.replace('_', ' ')} on day {i}."
+        claim_checks.append({
+            'claim_text': claim_text,
+            'claim_type': claim_type,
+            'start': position,
+            'end': position + len(claim_text),
+            'sentence_index': i,
+            'consistency_score': score,
+            'verification_result': result,
+            'explanation': explanation.format(v=value)
+        })
+        position += len(claim_text) + 1
+    return {
+        'overall_score': float(np.mean([check['consistency_score'] for check in claim_checks])),
+        'checked_claims': len(claim_checks),
+        'narrative_length': position,
+        'claim_checks': claim_checks
+    }
+
+def benchmark_compressed_storage(num_narratives=1000, seed=42):
+    """
+    Benchmark storage size and decode latency of compressed narrative storage
+
+    Compares the storage_codec encodings of narrative bodies and consistency
+    reports with plain UTF-8 text and JSON.
+
+    Parameters:
+    num_narratives (int): Narratives (with one report each) to encode
+    seed (int): Random seed
+
+    Returns:
+    dict: Total stored bytes and per-row decode latency for both formats
+    """
+    data = make_synthetic_stock_data(years=1, seed=seed)
+    narratives = []
+    for i in range(num_narratives):
+        narrative, _ = make_claim_heavy_report(40, seed=seed + i)
+        narratives.append((f"# {data['Symbol'].iloc[0]} Report {i}\n\n{narrative}", make_consistency_report(15, seed=seed + i)))
+
+    plain = [(content.encode('utf-8'), json.dumps(report).encode('utf-8')) for content, report in narratives]
+    compressed = [
+        (storage_codec.compress_text(content), storage_codec.encode_consistency_report(report))
+        for content, report in narratives
+    ]
+
+    def decode_plain():
+        for content, report in plain:
+            content.decode('utf-8')
+            json.loads(report)
+
+    def decode_compressed():
+        for content, report in compressed:
+            storage_codec.decompress_text(content)
+            storage_codec.decode_consistency_report(report)
+
+    return {
+        'narratives': num_narratives,
+        'plain_content_bytes': sum(len(content) for content, _ in plain),
+        'compressed_content_bytes': sum(len(content) for content, _ in compressed),
+        'plain_report_bytes': sum(len(report) for _, report in plain),
+        'compressed_report_bytes': sum(len(report) for _, report in compressed),
+        'plain_decode_us_per_row': _time_call(decode_plain) * 1e6 / num_narratives,
+        'compressed_decode_us_per_row': _time_call(decode_compressed) * 1e6 / num_narratives
+    }
+
+# Data sizes for the pipeline suite: name -> (bar frequency, years or days)
+PIPELINE_SIZES = {
+    '1y': ('daily', 1),
+    '10y': ('daily', 10),
+    '30y': ('daily', 30),
+    'minute': ('minute', 60)
+}
+
+PIPELINE_STAGES = (
+    'compute_financial_metrics',
+    'generate_financial_narrative',
+    'check_narrative_consistency',
+    'highlight_inconsistencies',
+    'create_stock_chart',
+    'create_market_trend_chart'
+)
+
+def _measure_stage(func, repeat):
+    """
+    Time a stage and measure its peak traced memory
+
+    The memory run is separate from the timed runs so tracemalloc does not
+    slow down the timings.
+
+    Returns:
+    tuple: (result of the last call, measurement dict)
+    """
+    output = {}
+
+    def call():
+        output['value'] = func()
+
+    seconds = _time_call(call, repeat=repeat)
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return output['value'], {'seconds': seconds, 'peak_memory_bytes': peak}
+
+def benchmark_pipeline(sizes=('1y', '10y', '30y', 'minute'), repeat=3, seed=42):
+    """
+    Benchmark every stage of the narrative pipeline on synthetic data
+
+    Stages run in pipeline order on each data size. A stage that fails (for
+    example when NLTK data is not installed) is recorded with its error, and
+    stages that need its output are recorded as skipped.
+
+    Parameters:
+    sizes (tuple): Keys of PIPELINE_SIZES to run
+    repeat (int): Timed runs per stage (the best is reported)
+    seed (int): Random seed
+
+    Returns:
+    list: One dict per size with rows and, per stage, seconds and peak_memory_bytes
+          (or error)
+    """
+    results = []
+    for size in sizes:
+        frequency, length = PIPELINE_SIZES[size]
+        if frequency == 'minute':
+            data = make_synthetic_minute_data(days=length, seed=seed)
+        else:
+            data = make_synthetic_stock_data(years=length, seed=seed)
+
+        outputs = {}
+        stages = {
+            'compute_financial_metrics': lambda: compute_financial_metrics(data),
+            'generate_financial_narrative': lambda: generate_financial_narrative(data),
+            'check_narrative_consistency': lambda: check_narrative_consistency(outputs['generate_financial_narrative'], data),
+            'highlight_inconsistencies': lambda: highlight_inconsistencies(
+                outputs['generate_financial_narrative'], outputs['check_narrative_consistency'][0]
+            ),
+            'create_stock_chart': lambda: create_stock_chart(data),
+            'create_market_trend_chart': lambda: create_market_trend_chart(data)
+        }
+        requires = {
+            'check_narrative_consistency': ('generate_financial_narrative',),
+            'highlight_inconsistencies': ('generate_financial_narrative', 'check_narrative_consistency')
+        }
+
+        result = {'size': size, 'frequency': frequency, 'rows': len(data), 'stages': {}}
+        for stage in PIPELINE_STAGES:
+            missing = [name for name in requires.get(stage, ()) if name not in outputs]
+            if missing:
+                result['stages'][stage] = {'error': f"skipped: needs {', '.join(missing)}"}
+                continue
+            try:
+                outputs[stage], result['stages'][stage] = _measure_stage(stages[stage], repeat)
+            except Exception as e:
+                result['stages'][stage] = {'error': str(e)}
+        results.append(result)
+    return results
+
+def save_results(results, path):
+    """
+    Save benchmark results as JSON together with the run environment
+
+    Parameters:
+    results (dict): Benchmark results keyed by suite name
+    path (str): Output file
+    """
+    document = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__
+        },
+        'results': results
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, default=float)
+
+def compare_pipeline_results(baseline_path, current):
+    """
+    Compare pipeline stage timings against a saved run
+
+    Parameters:
+    baseline_path (str): JSON file written by save_results
+    current (list): benchmark_pipeline results
+
+    Returns:
+    list: One dict per size and stage with baseline and current seconds and their ratio
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results'].get('pipeline', [])
+    baseline_stages = {
+        (entry['size'], stage): measurement
+        for entry in baseline for stage, measurement in entry['stages'].items()
+    }
+
+    rows = []
+    for entry in current:
+        for stage, measurement in entry['stages'].items():
+            previous = baseline_stages.get((entry['size'], stage))
+            if previous is None or 'seconds' not in previous or 'seconds' not in measurement:
+                continue
+            rows.append({
+                'size': entry['size'],
+                'stage': stage,
+                'baseline_seconds': previous['seconds'],
+                'current_seconds': measurement['seconds'],
+                'ratio': measurement['seconds'] / previous['seconds'] if previous['seconds'] else float('inf')
+            })
+    return rows
+
+def _print_pipeline_result(result):
+    """Print one benchmark_pipeline entry as a table"""
+    print(f"{result['size']} ({result['frequency']}, {result['rows']:,} rows)")
+    for stage, measurement in result['stages'].items():
+        if 'error' in measurement:
+            summary = ' '.join([line.strip() for line in measurement['error'].splitlines() if line.strip('* ')][:2])
+            print(f"  {stage:<30} error: {summary}")
+        else:
+            print(f"  {stage:<30} {measurement['seconds'] * 1000:>10,.2f} ms {measurement['peak_memory_bytes'] / 2**20:>9,.2f} MiB")
+    print()
+
+def _print_result(result):
+    """Print a flat benchmark result dict"""
+    for key, value in result.items():
+        print(f"{key}: {value:,.4f}" if isinstance(value, float) else f"{key}: {value}")
+    print()
+
+def run_micro_benchmarks():
+    """Run the focused benchmarks for individual optimizations"""
+    results = {
+        'date_claims': benchmark_date_claims(),
+        'highlighter': benchmark_highlighter(),
+        'bulk_insert': benchmark_bulk_insert(),
+        'search': benchmark_search(),
+        'async_queries': benchmark_async_queries(),
+        'compressed_storage': benchmark_compressed_storage(),
+        'resampling': benchmark_resampling(),
+        'window_metrics': benchmark_window_metrics(),
+        'range_queries': benchmark_range_queries(),
+        'indicators': benchmark_indicators()
+    }
+    for name, result in results.items():
+        for entry in result if isinstance(result, list) else [result]:
+            _print_result(entry)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Financial Narrative benchmarks on synthetic data")
+    parser.add_argument('--suite', choices=['pipeline', 'micro', 'all'], default='all',
+                        help="pipeline: every pipeline stage at several data sizes; micro: focused benchmarks")
+    parser.add_argument('--sizes', nargs='+', choices=list(PIPELINE_SIZES), default=list(PIPELINE_SIZES),
+                        help="Data sizes for the pipeline suite")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per pipeline stage")
+    parser.add_argument('--output', help="Save results as JSON to this file")
+    parser.add_argument('--compare', help="Compare pipeline timings against a JSON file from --output")
+    args = parser.parse_args()
+
+    results = {}
+    if args.suite in ('pipeline', 'all'):
+        results['pipeline'] = benchmark_pipeline(args.sizes, repeat=args.repeat)
+        for result in results['pipeline']:
+            _print_pipeline_result(result)
+        if args.compare:
+            for row in compare_pipeline_results(args.compare, results['pipeline']):
+                print(f"{row['size']:<8} {row['stage']:<30} {row['baseline_seconds'] * 1000:>10,.2f} ms -> "
+                      f"{row['current_seconds'] * 1000:>10,.2f} ms ({row['ratio']:.2f}x)")
+            print()
+    if args.suite in ('micro', 'all'):
+        results['micro'] = run_micro_benchmarks()
+
+    if args.output:
+        save_results(results, args.output)
@@ -8,6 +8,27 @@ from nltk.tokenize import sent_tokenize
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from nltk.sentiment import SentimentIntensityAnalyzer
+import database
+import profiling
+from range_index import build_range_index, query_range, query_dates
+from indicators import summarize_indicators, available_indicators
+from financial_data import build_peer_panel, compute_peer_metrics
+
+# Indicator names as narratives write them -> summarize_indicators values a claim may cite
+INDICATOR_CLAIM_VALUES = {
+    'rsi': ('rsi',),
+    'macd': ('macd', 'macd_signal', 'macd_hist'),
+    'bollinger': ('bb_upper', 'bb_middle', 'bb_lower'),
+    'average true range': ('atr', 'atr_pct'),
+    'drawdown': ('max_drawdown', 'drawdown'),
+    'on-balance volume': ('obv', 'obv_change')
+}
+
+# Whole-word matches only, so 'rsi' does not match "persisted" or "version"
+INDICATOR_KEYWORD_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(keyword) for keyword in INDICATOR_CLAIM_VALUES) + r')\b')
+
+# Values narratives may cite either signed or as a magnitude ("a drawdown of 12.5%")
+MAGNITUDE_CLAIM_VALUES = ('max_drawdown', 'drawdown')
 
 # Download required NLTK packages if needed
 try:
@@ -20,14 +41,20 @@ try:
 except LookupError:
     nltk.download('vader_lexicon')
 
-def check_narrative_consistency(narrative, financial_data):
+@profiling.traced('consistency_checker.check_narrative_consistency')
+def check_narrative_consistency(narrative, financial_data, include_claim_text=True):
     """
     Check the probabilistic consistency of a generated financial narrative
     against the actual financial data
     
+    Each claim check carries the 'start'/'end' character offsets and the
+    'sentence_index' of its claim, so consumers can work by position.
+    
     Parameters:
     narrative (str): The generated financial narrative
     financial_data (pandas.DataFrame): The financial data used to generate the narrative
+    include_claim_text (bool): Keep the claim text in each check; when False the text
+                               is left out and recovered from the offsets with get_claim_text
     
     Returns:
     tuple: (consistency_report, consistency_score)
@@ -38,11 +65,25 @@ def check_narrative_consistency(narrative, financial_data):
         # Extract factual claims from the narrative
         factual_claims = extract_factual_claims(narrative)
         
+        # Build the date and range indexes once so every date-specific claim is an
+        # O(log n) lookup and every period statistic an O(1) range query
+        date_index = build_date_index(financial_data)
+        range_index = build_range_index(financial_data)
+        
+        # Latest indicator values, computed together once if any claim cites an indicator
+        indicator_values = None
+        if any(claim['claim_type'] == 'indicator_claim' for claim in factual_claims):
+            indicator_values = summarize_indicators(financial_data, available_indicators(financial_data))
+        
         # Verify each claim against the financial data
         consistency_checks = []
-        for claim in factual_claims:
-            verification = verify_claim_against_data(claim, financial_data)
-            consistency_checks.append(verification)
+        with profiling.stage('consistency_checker.verify_claims'):
+            for claim in factual_claims:
+                verification = verify_claim_against_data(claim, financial_data, date_index, range_index, indicator_values)
+                if not include_claim_text:
+                    del verification['claim_text']
+                consistency_checks.append(verification)
+        profiling.increment('consistency_checker.claims_checked', len(consistency_checks))
         
         # Calculate overall consistency score
         if consistency_checks:
@@ -54,6 +95,7 @@ def check_narrative_consistency(narrative, financial_data):
         consistency_report = {
             "overall_score": consistency_score,
             "checked_claims": len(consistency_checks),
+            "narrative_length": len(narrative),
             "claim_checks": consistency_checks
         }
         
@@ -62,6 +104,285 @@ def check_narrative_consistency(narrative, financial_data):
     except Exception as e:
         raise Exception(f"Failed to check narrative consistency: {str(e)}")
 
+@profiling.traced('consistency_checker.check_stored_narrative')
+def check_stored_narrative(narrative_id, start_date=None, end_date=None):
+    """
+    Re-check a stored narrative against the price history stored with its dataset
+    
+    Parameters:
+    narrative_id (int): ID of the stored narrative
+    start_date (datetime): Optional start of the date range to check against
+    end_date (datetime): Optional end of the date range to check against
+    
+    Returns:
+    tuple: (consistency_report, consistency_score), as from check_narrative_consistency
+    """
+    narrative = database.get_narrative(narrative_id)
+    if narrative is None:
+        raise Exception(f"Narrative {narrative_id} not found")
+    
+    financial_data = database.load_dataset_frame(narrative.dataset_id, start_date, end_date)
+    if len(financial_data) == 0:
+        raise Exception(f"No stored price data for dataset {narrative.dataset_id}")
+    
+    return check_narrative_consistency(narrative.content, financial_data)
+
+@profiling.traced('consistency_checker.check_narrative_series_consistency')
+def check_narrative_series_consistency(series, financial_data, separator="\n\n---\n\n", include_claim_text=True):
+    """
+    Check each report of a narrative series against the rows of its own window
+    
+    Each report is checked separately (so every report gets its own claims, and
+    its dates and prices are compared with its window only), and the checks are
+    combined into one report for the narratives joined with separator.
+    
+    Parameters:
+    series (list): generate_narrative_series output (narrative, start and end row positions)
+    financial_data (pandas.DataFrame): The financial data the series was generated from
+    separator (str): String the narratives are joined with for display
+    include_claim_text (bool): Keep the claim text in each check (see check_narrative_consistency)
+    
+    Returns:
+    tuple: (consistency_report, consistency_score), as from check_narrative_consistency, with
+           offsets relative to the joined narrative and a 'reports' list holding each
+           report's start_date, end_date, overall_score and checked_claims
+    """
+    try:
+        consistency_checks = []
+        reports = []
+        offset = 0
+        sentence_offset = 0
+        for item in series:
+            window_data = financial_data.iloc[item['start']:item['end']].reset_index(drop=True)
+            report, score = check_narrative_consistency(item['narrative'], window_data, include_claim_text)
+            for check in report['claim_checks']:
+                if check.get('start') is not None:
+                    check['start'] += offset
+                    check['end'] += offset
+                if check.get('sentence_index') is not None:
+                    check['sentence_index'] += sentence_offset
+                consistency_checks.append(check)
+            reports.append({
+                "start_date": item['start_date'].strftime('%Y-%m-%d'),
+                "end_date": item['end_date'].strftime('%Y-%m-%d'),
+                "overall_score": score,
+                "checked_claims": report['checked_claims']
+            })
+            offset += len(item['narrative']) + len(separator)
+            sentence_offset += len(split_sentences_with_offsets(item['narrative']))
+        
+        if consistency_checks:
+            consistency_score = sum(check['consistency_score'] for check in consistency_checks) / len(consistency_checks)
+        else:
+            consistency_score = 0.0
+        
+        consistency_report = {
+            "overall_score": consistency_score,
+            "checked_claims": len(consistency_checks),
+            "narrative_length": max(offset - len(separator), 0),
+            "reports": reports,
+            "claim_checks": consistency_checks
+        }
+        
+        return consistency_report, consistency_score
+    
+    except Exception as e:
+        raise Exception(f"Failed to check narrative series consistency: {str(e)}")
+
+@profiling.traced('consistency_checker.check_peer_narrative_consistency')
+def check_peer_narrative_consistency(narrative, peer_data, include_claim_text=True):
+    """
+    Check a peer comparison narrative against the metrics of the whole peer group
+    
+    Peer reports cite returns, volatilities, drawdowns and ranks of every symbol in
+    the group and the group medians, so each line or sentence citing them is
+    verified against compute_peer_metrics rather than the target's price frame.
+    
+    Parameters:
+    narrative (str): The peer comparison narrative
+    peer_data (pandas.DataFrame): Long-format peer price data the narrative was generated from
+    include_claim_text (bool): Keep the claim text in each check (see check_narrative_consistency)
+    
+    Returns:
+    tuple: (consistency_report, consistency_score), as from check_narrative_consistency
+    """
+    try:
+        metrics = compute_peer_metrics(build_peer_panel(peer_data))
+        symbols = metrics['symbols']
+        symbol_patterns = [(position, re.compile(r'(?<![\w.^-])' + re.escape(symbol) + r'(?![\w-])'))
+                           for position, symbol in enumerate(symbols)]
+        
+        consistency_checks = []
+        for sentence_index, (start, end, sentence) in enumerate(split_sentences_with_offsets(narrative)):
+            # Bullet lines of the rankings are often tokenized as one sentence, so check line by line
+            line_start = start
+            for line in sentence.split('\n'):
+                line_end = line_start + len(line)
+                claim = {'claim_text': line.strip(), 'claim_type': 'peer_claim',
+                         'start': line_start + len(line) - len(line.lstrip()), 'end': line_end,
+                         'sentence_index': sentence_index}
+                line_start = line_end + 1
+                
+                # Skip blank lines and markdown headers
+                if not claim['claim_text'] or claim['claim_text'].startswith('#'):
+                    continue
+                lowered = claim['claim_text'].lower()
+                if 'disclaimer' in lowered or 'note:' in lowered:
+                    continue
+                
+                verification = verify_peer_claim(claim, metrics, symbol_patterns)
+                if verification is None:
+                    continue
+                if not include_claim_text:
+                    del verification['claim_text']
+                consistency_checks.append(verification)
+        profiling.increment('consistency_checker.claims_checked', len(consistency_checks))
+        
+        if consistency_checks:
+            consistency_score = sum(check['consistency_score'] for check in consistency_checks) / len(consistency_checks)
+        else:
+            consistency_score = 0.0
+        
+        consistency_report = {
+            "overall_score": consistency_score,
+            "checked_claims": len(consistency_checks),
+            "narrative_length": len(narrative),
+            "claim_checks": consistency_checks
+        }
+        
+        return consistency_report, consistency_score
+    
+    except Exception as e:
+        raise Exception(f"Failed to check peer narrative consistency: {str(e)}")
+
+def verify_peer_claim(claim, metrics, symbol_patterns):
+    """
+    Verify the percentages and ranks a peer report line cites against the peer metrics
+    
+    Parameters:
+    claim (dict): Claim with claim_text, offsets and sentence_index
+    metrics (dict): compute_peer_metrics output
+    symbol_patterns (list): (position, compiled pattern) for each symbol of the group
+    
+    Returns:
+    dict or None: Verification result, or None when the line cites no values
+    """
+    claim_text = claim['claim_text']
+    group = metrics['group']
+    
+    # Dates are not cited values; minus signs (not hyphens inside words) are
+    text = re.sub(r'\d{4}-\d{2}-\d{2}', ' ', claim_text)
+    cited_percentages = [float(value) for value in re.findall(r'((?:(?<!\w)-)?\d+(?:\.\d+)?)\s*(?:%|percentage points)', text)]
+    cited_ranks = [(int(rank), int(count)) for rank, count in re.findall(r'\brank(?:ing)? (\d+) of (\d+)', text)]
+    cited_ranks += [(int(rank), None) for rank in re.findall(r'(?<!\w)#(\d+)\b', text)]
+    if not cited_percentages and not cited_ranks:
+        return None
+    
+    # Values the line may cite: those of the symbols it names, and the group medians
+    mentioned = [position for position, pattern in symbol_patterns if pattern.search(text)]
+    actual_percentages = []
+    actual_ranks = set()
+    for position in mentioned:
+        for key in ('total_return', 'volatility', 'max_drawdown'):
+            if not np.isnan(metrics[key][position]):
+                actual_percentages.append(float(metrics[key][position]))
+        # The spread to the median return is cited unsigned ("by 3.21 percentage points")
+        actual_percentages.append(abs(float(metrics['total_return'][position]) - group['median_return']))
+        actual_ranks.update(int(metrics[key][position]) for key in ('return_rank', 'volatility_rank', 'drawdown_rank'))
+    if 'median' in text.lower():
+        actual_percentages += [group[key] for key in ('median_return', 'median_volatility', 'median_drawdown')
+                               if not np.isnan(group[key])]
+    
+    # Narratives round to cents, so allow rounding error
+    matched = [value for value in cited_percentages
+               if any(abs(value - actual) <= max(0.01, abs(actual) * 0.005) for actual in actual_percentages)]
+    matched += [rank for rank, count in cited_ranks
+                if rank in actual_ranks and count in (None, group['count'])]
+    num_cited = len(cited_percentages) + len(cited_ranks)
+    
+    if len(matched) == num_cited:
+        consistency_score, verification_result = 0.95, "verified"
+        explanation = "The cited values match the peer group metrics."
+    elif matched:
+        consistency_score, verification_result = 0.7, "partially verified"
+        explanation = f"{len(matched)} of {num_cited} cited values match the peer group metrics."
+    elif not mentioned and 'median' not in text.lower():
+        consistency_score, verification_result = 0.5, "unverified"
+        explanation = "The claim does not name a symbol of the peer group."
+    else:
+        consistency_score, verification_result = 0.2, "contradicted"
+        explanation = "The cited values do not match the peer group metrics."
+    
+    return {
+        "claim_text": claim_text,
+        "claim_type": claim['claim_type'],
+        "start": claim['start'],
+        "end": claim['end'],
+        "sentence_index": claim['sentence_index'],
+        "consistency_score": consistency_score,
+        "verification_result": verification_result,
+        "explanation": explanation
+    }
+
+def get_claim_text(narrative, claim_check):
+    """
+    Get the text of a checked claim, using its offsets when the text is not stored
+    
+    Parameters:
+    narrative (str): The narrative the consistency report was created for
+    claim_check (dict): A claim check from a consistency report
+    
+    Returns:
+    str: The claim text
+    """
+    if claim_check.get('claim_text'):
+        return claim_check['claim_text']
+    
+    start = claim_check.get('start')
+    end = claim_check.get('end')
+    if start is None or end is None:
+        return ""
+    return narrative[start:end]
+
+def group_claims_by_sentence(consistency_report):
+    """
+    Group the claim checks of a consistency report by sentence index
+    
+    Parameters:
+    consistency_report (dict): The consistency report from check_narrative_consistency
+    
+    Returns:
+    dict: Mapping of sentence index to the list of claim checks for that sentence
+    """
+    grouped = {}
+    for check in consistency_report.get('claim_checks', []):
+        grouped.setdefault(check.get('sentence_index'), []).append(check)
+    return grouped
+
+def split_sentences_with_offsets(narrative):
+    """
+    Split a narrative into sentences and record where each sentence starts and ends
+    
+    Parameters:
+    narrative (str): The financial narrative
+    
+    Returns:
+    list: List of (start, end, sentence) tuples in narrative order
+    """
+    spans = []
+    cursor = 0
+    for sentence in sent_tokenize(narrative):
+        # Sentences come back in order, so each search resumes where the last one ended
+        start = narrative.find(sentence, cursor)
+        if start == -1:
+            start = cursor
+        end = start + len(sentence)
+        spans.append((start, end, sentence))
+        cursor = end
+    
+    return spans
+
+@profiling.traced('consistency_checker.extract_factual_claims')
 def extract_factual_claims(narrative):
     """
     Extract factual claims from the narrative using rule-based NLP techniques
@@ -70,11 +391,12 @@ def extract_factual_claims(narrative):
     narrative (str): The financial narrative
     
     Returns:
-    list: List of extracted factual claims
+    list: List of extracted factual claims, each with the character offsets
+          ('start', 'end') and position ('sentence_index') of its sentence in the narrative
     """
     try:
-        # Split the narrative into sentences
-        sentences = sent_tokenize(narrative)
+        # Split the narrative into sentences with their character offsets
+        sentence_spans = split_sentences_with_offsets(narrative)
         
         # Define patterns for identifying factual claims
         price_pattern = re.compile(r'\$?\d+(?:\.\d+)?')
@@ -95,7 +417,7 @@ def extract_factual_claims(narrative):
         claims = []
         
         # Process each sentence to identify potential claims
-        for sentence in sentences:
+        for sentence_index, (start, end, sentence) in enumerate(sentence_spans):
             # Skip sentences in headers (markdown headers)
             if sentence.startswith('#') or sentence.startswith('##') or sentence.startswith('###'):
                 continue
@@ -104,12 +426,17 @@ def extract_factual_claims(narrative):
             if 'disclaimer' in sentence.lower() or 'note:' in sentence.lower():
                 continue
             
+            # Check for technical indicator values (before prices, which they look like)
+            if INDICATOR_KEYWORD_PATTERN.search(sentence.lower()) and price_pattern.search(sentence):
+                claims.append({'claim_text': sentence, 'claim_type': 'indicator_claim', 'start': start, 'end': end, 'sentence_index': sentence_index})
+                continue
+            
             # Check for price mentions
             if price_pattern.search(sentence):
                 claim_type = 'price_claim'
                 if any(keyword in sentence.lower() for keyword in trend_keywords):
                     claim_type = 'price_trend_claim'
-                claims.append({'claim_text': sentence, 'claim_type': claim_type})
+                claims.append({'claim_text': sentence, 'claim_type': claim_type, 'start': start, 'end': end, 'sentence_index': sentence_index})
                 continue
             
             # Check for percentage mentions
@@ -117,27 +444,27 @@ def extract_factual_claims(narrative):
                 claim_type = 'percentage_claim'
                 if any(keyword in sentence.lower() for keyword in trend_keywords):
                     claim_type = 'percentage_trend_claim'
-                claims.append({'claim_text': sentence, 'claim_type': claim_type})
+                claims.append({'claim_text': sentence, 'claim_type': claim_type, 'start': start, 'end': end, 'sentence_index': sentence_index})
                 continue
             
             # Check for date-specific claims
             if date_pattern.search(sentence):
-                claims.append({'claim_text': sentence, 'claim_type': 'date_specific_claim'})
+                claims.append({'claim_text': sentence, 'claim_type': 'date_specific_claim', 'start': start, 'end': end, 'sentence_index': sentence_index})
                 continue
             
             # Check for trend statements
             if any(keyword in sentence.lower() for keyword in trend_keywords):
-                claims.append({'claim_text': sentence, 'claim_type': 'trend_claim'})
+                claims.append({'claim_text': sentence, 'claim_type': 'trend_claim', 'start': start, 'end': end, 'sentence_index': sentence_index})
                 continue
             
             # Check for volatility statements
             if any(keyword in sentence.lower() for keyword in volatility_keywords):
-                claims.append({'claim_text': sentence, 'claim_type': 'volatility_claim'})
+                claims.append({'claim_text': sentence, 'claim_type': 'volatility_claim', 'start': start, 'end': end, 'sentence_index': sentence_index})
                 continue
             
             # Check for comparative statements
             if any(keyword in sentence.lower() for keyword in comparison_keywords):
-                claims.append({'claim_text': sentence, 'claim_type': 'comparison_claim'})
+                claims.append({'claim_text': sentence, 'claim_type': 'comparison_claim', 'start': start, 'end': end, 'sentence_index': sentence_index})
                 continue
         
         # Limit number of claims to avoid performance issues
@@ -147,13 +474,229 @@ def extract_factual_claims(narrative):
         print(f"Error extracting factual claims: {str(e)}")
         return []
 
-def verify_claim_against_data(claim, financial_data):
+@profiling.traced('consistency_checker.build_date_index')
+def build_date_index(financial_data):
+    """
+    Build a sorted date index over the financial data for exact date lookups
+    
+    Parameters:
+    financial_data (pandas.DataFrame): The financial data with a Date column
+    
+    Returns:
+    dict: Sorted int64 day epochs ('epochs'), the matching row positions ('positions')
+          and the covered period ('start_date', 'end_date')
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(financial_data['Date']))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    
+    # Truncate to whole days so intraday timestamps still match a YYYY-MM-DD claim
+    epochs = dates.values.astype('datetime64[D]').astype(np.int64)
+    positions = np.argsort(epochs, kind='stable')
+    
+    sorted_epochs = epochs[positions]
+    
+    return {
+        'epochs': sorted_epochs,
+        'positions': positions,
+        'start_date': str(sorted_epochs[0].astype('datetime64[D]')) if len(sorted_epochs) else None,
+        'end_date': str(sorted_epochs[-1].astype('datetime64[D]')) if len(sorted_epochs) else None
+    }
+
+def lookup_date(date_index, date_str):
+    """
+    Find the row position of a date in a date index using binary search
+    
+    Parameters:
+    date_index (dict): Index created by build_date_index
+    date_str (str): Date in YYYY-MM-DD format
+    
+    Returns:
+    int or None: Row position of the first row on that date, or None if the date is not in the data
+    """
+    positions = lookup_date_rows(date_index, date_str)
+    return int(positions[0]) if len(positions) else None
+
+def lookup_date_rows(date_index, date_str):
+    """
+    Find the row positions of all bars on a date (several for intraday data)
+    
+    Parameters:
+    date_index (dict): Index created by build_date_index
+    date_str (str): Date in YYYY-MM-DD format
+    
+    Returns:
+    numpy.ndarray: Row positions in chronological order (empty if the date is not in the data)
+    """
+    try:
+        key = np.datetime64(date_str, 'D').astype(np.int64)
+    except ValueError:
+        return np.empty(0, dtype=np.int64)
+    
+    epochs = date_index['epochs']
+    first, last = np.searchsorted(epochs, [key, key + 1], side='left')
+    return date_index['positions'][first:last]
+
+def verify_date_values(dates_in_claim, cited_values, financial_data, date_index):
+    """
+    Verify the values a claim cites for specific dates against the rows for those dates
+    
+    Parameters:
+    dates_in_claim (list): Dates in YYYY-MM-DD format cited by the claim
+    cited_values (list): Numeric values cited by the claim (dates excluded)
+    financial_data (pandas.DataFrame): The financial data
+    date_index (dict): Index created by build_date_index
+    
+    Returns:
+    tuple: (consistency_score, verification_result, explanation)
+    """
+    start_date = date_index['start_date']
+    end_date = date_index['end_date']
+    if start_date is None:
+        return 0.5, "unverified", "The data has no rows to verify the cited dates against."
+    price_columns = [col for col in ['High', 'Low', 'Close', 'Open'] if col in financial_data.columns]
+    
+    matched_dates = []
+    unmatched_dates = []
+    for date in dates_in_claim:
+        positions = lookup_date_rows(date_index, date)
+        
+        if len(positions) == 0:
+            if date < start_date or date > end_date:
+                return 0.1, "contradicted", f"The date {date} falls outside the analyzed period ({start_date} to {end_date})."
+            unmatched_dates.append((date, None))
+            continue
+        
+        # Without cited values the best we can confirm is that the date has data
+        if not cited_values or not price_columns:
+            matched_dates.append((date, None))
+            continue
+        
+        # All bars on the date (one for daily data), so intraday highs and lows match too
+        row = {col: financial_data[col].to_numpy(dtype=np.float64)[positions] for col in price_columns}
+        if all(np.isnan(values).all() for values in row.values()):
+            # Bars without prices are no data for the date
+            unmatched_dates.append((date, None))
+            continue
+        match = None
+        for value in cited_values:
+            for col in price_columns:
+                actual = row[col]
+                # Narratives round to cents, so allow rounding error
+                differences = np.abs(value - actual)
+                close = differences <= np.maximum(0.01, np.abs(actual) * 0.005)
+                if close.any():
+                    match = (col, actual[np.argmin(np.where(close, differences, np.inf))])
+                    break
+            if match:
+                break
+        
+        if match:
+            matched_dates.append((date, match))
+        else:
+            unmatched_dates.append((date, row))
+    
+    if not cited_values or not price_columns:
+        if unmatched_dates:
+            date = unmatched_dates[0][0]
+            return 0.5, "partially verified", f"The date {date} falls within the analyzed period ({start_date} to {end_date}) but has no data."
+        return 0.9, "verified", f"The cited dates are trading days within the analyzed period ({start_date} to {end_date})."
+    
+    if matched_dates and not unmatched_dates:
+        date, (col, actual) = matched_dates[0]
+        return 0.95, "verified", f"The cited value matches the {col.lower()} price of ${actual:.2f} on {date}."
+    
+    if matched_dates:
+        date = unmatched_dates[0][0]
+        return 0.7, "partially verified", f"Some cited values match the data, but none match the prices on {date}."
+    
+    date, row = unmatched_dates[0]
+    if row is None:
+        return 0.5, "partially verified", f"The date {date} falls within the analyzed period ({start_date} to {end_date}) but has no data."
+    # Fall back to every price column when the low or high is missing
+    all_prices = np.concatenate(list(row.values()))
+    low = np.nanmin(row['Low'] if 'Low' in row and not np.isnan(row['Low']).all() else all_prices)
+    high = np.nanmax(row['High'] if 'High' in row and not np.isnan(row['High']).all() else all_prices)
+    return 0.2, "contradicted", f"The cited values do not match the prices on {date} (low ${low:.2f}, high ${high:.2f})."
+
+def verify_period_change(dates_in_claim, cited_percentages, range_index):
+    """
+    Verify percentages a claim cites for a period against the price change over it
+    
+    The period runs from the earliest to the latest cited date, and its change is
+    an O(1) range query, so claims about any sub-range are checked as cheaply as
+    claims about the whole dataset.
+    
+    Parameters:
+    dates_in_claim (list): Dates in YYYY-MM-DD format cited by the claim
+    cited_percentages (list): Percentages cited by the claim (without sign)
+    range_index (dict): Index created by range_index.build_range_index
+    
+    Returns:
+    tuple or None: (consistency_score, verification_result, explanation), or None when
+                   the period has no data
+    """
+    period_start = min(dates_in_claim)
+    period_end = max(dates_in_claim)
+    summary = query_dates(range_index, period_start, period_end)
+    if summary is None:
+        return None
+    
+    actual_change = abs(summary['return_pct'])
+    pct_value = min(cited_percentages, key=lambda value: abs(value - actual_change))
+    if abs(pct_value - actual_change) <= 2:  # Within 2% is considered accurate
+        return 0.95, "verified", f"The percentage {pct_value}% closely matches the change of {actual_change:.2f}% from {period_start} to {period_end}."
+    if abs(pct_value - actual_change) <= 5:  # Within 5% is partially accurate
+        return 0.7, "partially verified", f"The percentage {pct_value}% is reasonably close to the change of {actual_change:.2f}% from {period_start} to {period_end}."
+    return 0.3, "contradicted", f"The percentage {pct_value}% is significantly different from the change of {actual_change:.2f}% from {period_start} to {period_end}."
+
+def verify_indicator_values(claim_text, indicator_values):
+    """
+    Verify the indicator values a claim cites (e.g. "The 14-day RSI of 72.31") against the data
+    
+    Parameters:
+    claim_text (str): The claim
+    indicator_values (dict): Latest values from indicators.summarize_indicators
+    
+    Returns:
+    tuple: (consistency_score, verification_result, explanation)
+    """
+    found = set(INDICATOR_KEYWORD_PATTERN.findall(claim_text.lower()))
+    mentioned = [keyword for keyword in INDICATOR_CLAIM_VALUES if keyword in found]
+    actual_values = [indicator_values[key] for keyword in mentioned for key in INDICATOR_CLAIM_VALUES[keyword]
+                     if indicator_values.get(key) is not None]
+    actual_values += [abs(indicator_values[key]) for key in MAGNITUDE_CLAIM_VALUES
+                      if 'drawdown' in mentioned and indicator_values.get(key) is not None]
+    if not actual_values:
+        return 0.5, "unverified", f"The data has too few bars to verify the {', '.join(mentioned)} values."
+    
+    # Window lengths ("14-day") and dates are not cited values; thousands separators and
+    # minus signs (not hyphens inside words) are
+    text = re.sub(r'\d{4}-\d{2}-\d{2}|\d+-(?:day|bar|hour|week|month|year)\b', ' ', claim_text)
+    cited_values = [float(number.replace(',', '')) for number in re.findall(r'(?:(?<!\w)-)?\d[\d,]*(?:\.\d+)?', text)]
+    if not cited_values:
+        return 0.5, "unverified", "No indicator values are cited."
+    
+    # Narratives round to cents, so allow rounding error
+    matched = [value for value in cited_values
+               if any(abs(value - actual) <= max(0.01, abs(actual) * 0.005) for actual in actual_values)]
+    if len(matched) == len(cited_values):
+        return 0.95, "verified", f"The cited {', '.join(mentioned)} values match the data."
+    if matched:
+        return 0.7, "partially verified", f"{len(matched)} of {len(cited_values)} cited values match the {', '.join(mentioned)} values in the data."
+    return 0.2, "contradicted", f"The cited values do not match the {', '.join(mentioned)} values in the data."
+
+def verify_claim_against_data(claim, financial_data, date_index=None, range_index=None, indicator_values=None):
     """
     Verify a factual claim against the financial data using rule-based techniques
     
     Parameters:
     claim (dict): Dictionary containing claim_text and claim_type
     financial_data (pandas.DataFrame): The financial data
+    date_index (dict): Optional index from build_date_index, built on demand if not provided
+    range_index (dict): Optional index from range_index.build_range_index, built on demand if not provided
+    indicator_values (dict): Optional values from indicators.summarize_indicators, computed on demand
+                             for indicator claims if not provided
     
     Returns:
     dict: Verification result with consistency score
@@ -165,25 +708,26 @@ def verify_claim_against_data(claim, financial_data):
         # Initialize sentiment analyzer for detecting sentiment
         sia = SentimentIntensityAnalyzer()
         
-        # Create financial summary for comparison
-        financial_summary = create_financial_summary(financial_data)
+        # Extract key financial data metrics (one O(1) query over the whole period)
+        if range_index is None:
+            range_index = build_range_index(financial_data)
+        summary = query_range(range_index, 0, range_index['rows'])
         
-        # Extract key financial data metrics
         # Date range
         start_date = financial_data['Date'].min().strftime('%Y-%m-%d')
         end_date = financial_data['Date'].max().strftime('%Y-%m-%d')
         
         # Price data
-        first_close = financial_data['Close'].iloc[0]
-        last_close = financial_data['Close'].iloc[-1]
+        first_close = summary['first_price']
+        last_close = summary['last_price']
         price_change = last_close - first_close
         price_change_pct = (price_change / first_close) * 100
-        price_min = financial_data['Low'].min()
-        price_max = financial_data['High'].max()
+        price_min = summary['low_price']
+        price_max = summary['high_price']
         
         # Volume data
-        avg_volume = financial_data['Volume'].mean()
-        max_volume = financial_data['Volume'].max()
+        avg_volume = summary['avg_volume']
+        max_volume = summary['max_volume']
         
         # Moving averages if available
         ma_20 = None
@@ -202,12 +746,41 @@ def verify_claim_against_data(claim, financial_data):
         verification_result = "unverified"
         explanation = "No specific data points found to verify this claim."
         
-        # Extract numbers and percentages from the claim
-        extracted_numbers = re.findall(r'\$?(\d+(?:\.\d+)?)', claim_text)
-        extracted_percentages = re.findall(r'(\d+(?:\.\d+)?)\s*\%', claim_text)
+        # Extract dates, then numbers and percentages from the claim (dates removed so
+        # their components are not mistaken for prices)
+        dates_in_claim = re.findall(r'\d{4}-\d{2}-\d{2}', claim_text)
+        text_without_dates = re.sub(r'\d{4}-\d{2}-\d{2}', ' ', claim_text)
+        extracted_numbers = re.findall(r'\$?(\d+(?:\.\d+)?)', text_without_dates)
+        extracted_percentages = re.findall(r'(\d+(?:\.\d+)?)\s*\%', text_without_dates)
+        
+        if dates_in_claim and date_index is None:
+            date_index = build_date_index(financial_data)
+        
+        # A percentage cited for a period ("from {start} to {end}") is checked against that period
+        period_verification = None
+        if len(set(dates_in_claim)) >= 2 and extracted_percentages and '$' not in text_without_dates:
+            period_verification = verify_period_change(
+                dates_in_claim, [float(percentage) for percentage in extracted_percentages], range_index
+            )
         
         # Check claim type and verify against data
-        if claim_type == 'price_claim' or claim_type == 'price_trend_claim':
+        if period_verification is not None:
+            consistency_score, verification_result, explanation = period_verification
+        
+        elif claim_type == 'indicator_claim':
+            # Indicator values are checked against the latest values computed from the data
+            if indicator_values is None:
+                indicator_values = summarize_indicators(financial_data, available_indicators(financial_data))
+            consistency_score, verification_result, explanation = verify_indicator_values(claim_text, indicator_values)
+        
+        elif (claim_type == 'price_claim' or claim_type == 'price_trend_claim') and dates_in_claim:
+            # Prices cited "on {date}" are checked against that date's row
+            cited_prices = [float(number) for number in re.findall(r'\$(\d+(?:\.\d+)?)', text_without_dates)]
+            consistency_score, verification_result, explanation = verify_date_values(
+                dates_in_claim, cited_prices, financial_data, date_index
+            )
+        
+        elif claim_type == 'price_claim' or claim_type == 'price_trend_claim':
             # Verify price-related claims
             for number in extracted_numbers:
                 num_value = float(number)
@@ -248,18 +821,11 @@ def verify_claim_against_data(claim, financial_data):
                     explanation = f"The percentage {pct_value}% is significantly different from the observed change of {abs(price_change_pct):.2f}%."
         
         elif claim_type == 'date_specific_claim':
-            # Verify date-specific claims
-            dates_in_claim = re.findall(r'\d{4}-\d{2}-\d{2}', claim_text)
-            for date in dates_in_claim:
-                if date >= start_date and date <= end_date:
-                    consistency_score = 0.9
-                    verification_result = "verified"
-                    explanation = f"The date {date} falls within the analyzed period ({start_date} to {end_date})."
-                    break
-                else:
-                    consistency_score = 0.1
-                    verification_result = "contradicted"
-                    explanation = f"The date {date} falls outside the analyzed period ({start_date} to {end_date})."
+            # Verify date-specific claims against the rows for the cited dates
+            cited_values = [float(number) for number in extracted_numbers]
+            consistency_score, verification_result, explanation = verify_date_values(
+                dates_in_claim, cited_values, financial_data, date_index
+            )
         
         elif claim_type == 'trend_claim':
             # Verify trend claims based on actual price direction
@@ -325,6 +891,9 @@ def verify_claim_against_data(claim, financial_data):
         return {
             "claim_text": claim_text,
             "claim_type": claim_type,
+            "start": claim.get("start"),
+            "end": claim.get("end"),
+            "sentence_index": claim.get("sentence_index"),
             "consistency_score": consistency_score,
             "verification_result": verification_result,
             "explanation": explanation
@@ -335,6 +904,9 @@ def verify_claim_against_data(claim, financial_data):
         return {
             "claim_text": claim.get("claim_text", ""),
             "claim_type": claim.get("claim_type", ""),
+            "start": claim.get("start"),
+            "end": claim.get("end"),
+            "sentence_index": claim.get("sentence_index"),
             "consistency_score": 0.0,
             "verification_result": "error",
             "explanation": f"Error during verification: {str(e)}"
@@ -1,17 +1,70 @@
 import os
+import re
 import json
+import hashlib
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime
 import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, MetaData, Table, JSON, ForeignKey
+from financial_data import add_technical_indicators, compute_data_fingerprint, INDICATOR_LOOKBACK
+from sqlalchemy import create_engine, create_mock_engine, event, inspect, insert, select, update, bindparam, type_coerce, and_, tuple_, Column, Integer, String, Text, DateTime, Float, LargeBinary, Table, JSON, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.sql import text, func
+from sqlalchemy.types import TypeDecorator
+from storage_codec import compress_text, decompress_text, encode_consistency_report, decode_consistency_report, is_encoded
+import profiling
 
 # Get database URL from environment variable
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Connection pool settings, overridable through environment variables
+POOL_SETTINGS = {
+    'pool_size': int(os.environ.get("DB_POOL_SIZE", 5)),
+    'max_overflow': int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+    'pool_timeout': float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    'pool_recycle': int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+    'pool_pre_ping': os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+}
+
+# The engine is created on first use so importing this module never opens a connection
+_engine = None
+_engine_lock = threading.Lock()
+
+# Pool usage counters, updated by pool event listeners
+_pool_metrics = {
+    'connections_created': 0,
+    'checkouts': 0,
+    'checkins': 0,
+    'invalidations': 0
+}
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed (see storage_codec); legacy plain text is still readable"""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress_text(value)
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else decompress_text(value)
+
+class CompressedReport(TypeDecorator):
+    """Consistency report stored in the compact compressed encoding; legacy JSON is still readable"""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode_consistency_report(value)
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else decode_consistency_report(value)
 
 # Create a base class for declarative models
 Base = declarative_base()
@@ -20,6 +73,10 @@ Base = declarative_base()
 class Dataset(Base):
     """Model for storing uploaded datasets"""
     __tablename__ = 'datasets'
+    __table_args__ = (
+        # Serves newest-first listing and keyset pagination
+        Index('ix_datasets_created_at_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
@@ -27,6 +84,7 @@ class Dataset(Base):
     data_type = Column(String(50), nullable=False)  # 'financial', 'generic'
     source_type = Column(String(50), nullable=False)  # 'yahoo', 'uploaded', 'sample'
     source_details = Column(JSON, nullable=True)  # For ticker, date range, etc.
+    fingerprint = Column(String(64), nullable=True, index=True)  # compute_data_fingerprint of the data
     created_at = Column(DateTime, default=datetime.now)
     
     # Relationship with Narrative model
@@ -35,46 +93,328 @@ class Dataset(Base):
 class Narrative(Base):
     """Model for storing generated narratives"""
     __tablename__ = 'narratives'
+    __table_args__ = (
+        # Serve newest-first listing and keyset pagination, overall and per dataset
+        Index('ix_narratives_created_at_id', 'created_at', 'id'),
+        Index('ix_narratives_dataset_id_created_at_id', 'dataset_id', 'created_at', 'id'),
+        # One stored copy per input data, generation parameters and body
+        Index('ux_narratives_data_params_content', 'data_fingerprint', 'params_hash', 'content_hash', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     dataset_id = Column(Integer, ForeignKey('datasets.id'))
     title = Column(String(255), nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)
     narrative_type = Column(String(50), nullable=False)  # 'financial', 'generic_data'
     target_audience = Column(String(50), nullable=True)
     depth_level = Column(Integer, nullable=True)
     consistency_score = Column(Float, nullable=True)
-    consistency_report = Column(JSON, nullable=True)
+    consistency_report = Column(CompressedReport, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # hash_content of the body
+    data_fingerprint = Column(String(64), nullable=True)  # compute_data_fingerprint of the input data
+    params_hash = Column(String(64), nullable=True)  # hash_params of the generation parameters
     created_at = Column(DateTime, default=datetime.now)
     
     # Relationship with Dataset model
     dataset = relationship("Dataset", back_populates="narratives")
 
-# Create all tables if they don't exist
-Base.metadata.create_all(engine)
+class DatasetPrice(Base):
+    """Model for storing the daily OHLCV rows of financial datasets"""
+    __tablename__ = 'dataset_prices'
+    
+    # The (dataset_id, date) primary key doubles as the index for date range reads
+    dataset_id = Column(Integer, ForeignKey('datasets.id', ondelete='CASCADE'), primary_key=True)
+    date = Column(DateTime, primary_key=True)
+    open = Column(Float, nullable=True)
+    high = Column(Float, nullable=True)
+    low = Column(Float, nullable=True)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=True)
+
+# Frame columns stored in dataset_prices, mapped to their table columns
+PRICE_COLUMNS = {
+    'Date': 'date',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'volume'
+}
+
+# Lightweight read-only rows for list views; they carry only the listed columns
+# and leave out narrative bodies and consistency reports
+DatasetRow = namedtuple('DatasetRow', [
+    'id', 'name', 'description', 'data_type', 'source_type', 'source_details', 'created_at'
+])
+
+NarrativeRow = namedtuple('NarrativeRow', [
+    'id', 'dataset_id', 'title', 'narrative_type', 'target_audience', 'depth_level',
+    'consistency_score', 'created_at'
+])
+
+# Full-text search index table. It is declared on Base.metadata so its foreign key
+# resolves, but only created on Postgres (see _create_search_index): there it is a
+# tsvector table with a GIN index, on SQLite a contentless FTS5 virtual table is
+# used instead.
+narrative_search = Table(
+    'narrative_search', Base.metadata,
+    Column('narrative_id', Integer, ForeignKey('narratives.id', ondelete='CASCADE'), primary_key=True),
+    Column('document', TSVECTOR, nullable=False),
+    Index('ix_narrative_search_document', 'document', postgresql_using='gin')
+)
+
+SQLITE_FTS_TABLE = 'narratives_fts'
+
+# Text search configuration used for Postgres tsvectors and queries
+SEARCH_LANGUAGE = 'english'
+
+# Create a session factory (bound to the engine when the engine is created)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+def configure_engine(database_url=None, **pool_settings):
+    """
+    Create the database engine, replacing (and disposing) any existing one
+    
+    Parameters:
+    database_url (str): Database URL (defaults to the DATABASE_URL environment variable)
+    **pool_settings: Overrides for POOL_SETTINGS (pool_size, max_overflow, pool_timeout,
+                     pool_recycle, pool_pre_ping)
+    
+    Returns:
+    sqlalchemy.engine.Engine: The configured engine
+    """
+    global _engine
+    
+    with _engine_lock:
+        previous = _engine
+        _engine = _create_engine(database_url, **pool_settings)
+        if previous is not None:
+            previous.dispose()
+        return _engine
+
+def _create_engine(database_url=None, **pool_settings):
+    """
+    Build an engine, create any missing schema and bind the session factory to it
+    
+    Never disposes an existing engine; callers hold _engine_lock and install the result.
+    """
+    database_url = database_url or DATABASE_URL
+    if not database_url:
+        raise Exception("DATABASE_URL is not set")
+    
+    settings = dict(POOL_SETTINGS)
+    settings.update(pool_settings)
+    
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # An in-memory SQLite database lives in a single connection, so share it
+        engine_kwargs = {
+            'poolclass': StaticPool,
+            'connect_args': {'check_same_thread': False}
+        }
+    else:
+        engine_kwargs = settings
+    
+    engine = create_engine(database_url, **engine_kwargs)
+    _register_pool_listeners(engine)
+    _register_query_listeners(engine)
+    
+    # Create all tables if they don't exist
+    with engine.begin() as connection:
+        create_schema(connection)
+    
+    SessionLocal.configure(bind=engine)
+    return engine
+
+def create_schema(connection):
+    """Create missing tables, indexes and full-text index structures on a connection"""
+    Base.metadata.create_all(connection, tables=_model_tables())
+    _add_missing_columns(connection)
+    _convert_compressed_columns(connection)
+    _create_missing_indexes(connection)
+    _create_search_index(connection)
+
+def _model_tables():
+    """Tables of the models, in dependency order (the search table is backend-specific)"""
+    return [table for table in Base.metadata.sorted_tables if table is not narrative_search]
+
+def schema_ddl(dialect_name='postgresql'):
+    """
+    Render the CREATE statements of the schema for a backend without connecting
+    
+    Parameters:
+    dialect_name (str): SQLAlchemy dialect name, e.g. 'postgresql' or 'sqlite'
+    
+    Returns:
+    list: DDL statements in the order create_schema creates the tables
+    """
+    statements = []
+    engine = create_mock_engine(f'{dialect_name}://',
+                                lambda sql, *args, **kwargs: statements.append(str(sql.compile(dialect=engine.dialect)).strip()))
+    Base.metadata.create_all(engine, tables=_model_tables(), checkfirst=False)
+    if dialect_name == 'postgresql':
+        narrative_search.create(engine, checkfirst=False)
+    return statements
+
+def _add_missing_columns(connection):
+    """Add nullable model columns that predate tables created by an older version of this module"""
+    inspector = inspect(connection)
+    for table in _model_tables():
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def _convert_compressed_columns(connection):
+    """Convert text/JSON narrative columns left by an older version of this module to bytea on Postgres"""
+    if connection.dialect.name != 'postgresql':
+        return
+    # SQLite stores the compressed bytes in the existing columns as they are
+    column_types = {column['name']: column['type'] for column in inspect(connection).get_columns('narratives')}
+    if not isinstance(column_types['content'], LargeBinary):
+        connection.execute(text(
+            "ALTER TABLE narratives ALTER COLUMN content TYPE bytea USING convert_to(content, 'UTF8')"
+        ))
+    if not isinstance(column_types['consistency_report'], LargeBinary):
+        connection.execute(text(
+            "ALTER TABLE narratives ALTER COLUMN consistency_report TYPE bytea "
+            "USING convert_to(consistency_report::text, 'UTF8')"
+        ))
+
+def _create_missing_indexes(connection):
+    """Create model indexes that predate tables created by an older version of this module"""
+    for table in _model_tables():
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def get_engine():
+    """Get the database engine, creating it on first use"""
+    global _engine
+    
+    engine = _engine
+    if engine is None:
+        # Double-checked so concurrent first requests create a single engine
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+            engine = _engine
+    return engine
+
+def get_session():
+    """Open a new session on the pooled engine"""
+    get_engine()
+    return SessionLocal()
+
+def init_db():
+    """Create the engine and any missing tables"""
+    return get_engine()
 
-# Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def dispose_engine():
+    """Close all pooled connections and drop the engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+def _register_pool_listeners(engine):
+    """Attach pool event listeners that feed the pool usage counters"""
+    def on_connect(dbapi_connection, connection_record):
+        _pool_metrics['connections_created'] += 1
+    
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _pool_metrics['checkouts'] += 1
+    
+    def on_checkin(dbapi_connection, connection_record):
+        _pool_metrics['checkins'] += 1
+    
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        _pool_metrics['invalidations'] += 1
+    
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'checkin', on_checkin)
+    event.listen(engine, 'invalidate', on_invalidate)
+
+def _register_query_listeners(engine):
+    """Attach statement event listeners that count and time queries when profiling is enabled"""
+    def before_execute(connection, cursor, statement, parameters, context, executemany):
+        if profiling.is_enabled():
+            connection.info['query_start'] = time.perf_counter()
+    
+    def after_execute(connection, cursor, statement, parameters, context, executemany):
+        start = connection.info.pop('query_start', None)
+        if start is not None:
+            profiling.increment('database.queries')
+            profiling.increment('database.query_seconds', time.perf_counter() - start)
+    
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    event.listen(engine, 'after_cursor_execute', after_execute)
+
+def get_pool_status():
+    """
+    Get connection pool usage metrics
+    
+    Returns:
+    dict: Current pool occupancy (when the pool type reports it) and cumulative counters
+    """
+    status = dict(_pool_metrics)
+    if _engine is None:
+        status['engine_created'] = False
+        return status
+    
+    pool = _engine.pool
+    status['engine_created'] = True
+    status['pool_class'] = type(pool).__name__
+    for name in ['size', 'checkedin', 'checkedout', 'overflow']:
+        metric = getattr(pool, name, None)
+        if callable(metric):
+            status[name] = metric()
+    return status
+
+def __getattr__(name):
+    # Keep `database.engine` working now that the engine is created lazily
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Database operations
-def save_dataset(name, data_type, source_type, source_details=None, description=None):
+@profiling.traced('database.save_dataset')
+def save_dataset(name, data_type, source_type, source_details=None, description=None, fingerprint=None):
     """Save dataset information to the database"""
-    with SessionLocal() as session:
+    with get_session() as session:
         dataset = Dataset(
             name=name,
             data_type=data_type,
             source_type=source_type,
             source_details=source_details,
-            description=description
+            description=description,
+            fingerprint=fingerprint
         )
         session.add(dataset)
         session.commit()
         session.refresh(dataset)
         return dataset.id
 
-def save_narrative(dataset_id, title, content, narrative_type, consistency_score=None, consistency_report=None, target_audience=None, depth_level=None):
-    """Save a generated narrative to the database"""
-    with SessionLocal() as session:
+@profiling.traced('database.save_narrative')
+def save_narrative(dataset_id, title, content, narrative_type, consistency_score=None, consistency_report=None, target_audience=None, depth_level=None, data_fingerprint=None, params_hash=None):
+    """
+    Save a generated narrative to the database
+    
+    When data_fingerprint is given, a narrative with the same data fingerprint,
+    parameters hash and body is stored only once and its existing ID is returned.
+    """
+    content_hash = hash_content(content)
+    if data_fingerprint is not None and params_hash is None:
+        # NULL would never match in the unique index, so store the empty-parameters hash
+        params_hash = NO_PARAMS_HASH
+    with get_session() as session:
+        if data_fingerprint is not None:
+            existing_id = find_duplicate_narrative(session, data_fingerprint, params_hash, content_hash)
+            if existing_id is not None:
+                return existing_id
+        
         narrative = Narrative(
             dataset_id=dataset_id,
             title=title,
@@ -83,45 +423,481 @@ def save_narrative(dataset_id, title, content, narrative_type, consistency_score
             consistency_score=consistency_score,
             consistency_report=consistency_report,
             target_audience=target_audience,
-            depth_level=depth_level
+            depth_level=depth_level,
+            content_hash=content_hash,
+            data_fingerprint=data_fingerprint,
+            params_hash=params_hash
         )
         session.add(narrative)
+        try:
+            session.flush()
+        except IntegrityError:
+            session.rollback()
+            if data_fingerprint is None:
+                raise
+            # Another writer stored the same narrative first
+            existing_id = find_duplicate_narrative(session, data_fingerprint, params_hash, content_hash)
+            if existing_id is None:
+                raise
+            return existing_id
+        
+        narrative_id = narrative.id
+        index_narrative_text(session, [(narrative_id, content)])
         session.commit()
-        session.refresh(narrative)
-        return narrative.id
+        return narrative_id
+
+def hash_content(content):
+    """Hex SHA-256 digest of a narrative body"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def hash_params(params):
+    """Hex SHA-256 digest of a dict of generation parameters (key order does not matter)"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+# Stored instead of a missing params_hash for deduplicated narratives
+NO_PARAMS_HASH = hash_params({})
+
+@profiling.traced('database.find_narrative')
+def find_narrative(data_fingerprint, params_hash):
+    """
+    Find the most recent stored narrative generated from the same data and parameters
+    
+    Parameters:
+    data_fingerprint (str): compute_data_fingerprint of the input data
+    params_hash (str): hash_params of the generation parameters
+    
+    Returns:
+    Narrative or None: The stored narrative, if any
+    """
+    with get_session() as session:
+        return session.query(Narrative).filter(
+            Narrative.data_fingerprint == data_fingerprint,
+            Narrative.params_hash == params_hash
+        ).order_by(Narrative.created_at.desc(), Narrative.id.desc()).first()
 
+def find_dataset_by_fingerprint(fingerprint):
+    """Find the most recent dataset stored with the given data fingerprint"""
+    with get_session() as session:
+        return session.query(Dataset).filter(
+            Dataset.fingerprint == fingerprint
+        ).order_by(Dataset.created_at.desc(), Dataset.id.desc()).first()
+
+def find_duplicate_narrative(session, data_fingerprint, params_hash, content_hash):
+    """
+    Find an identical stored narrative (used by save_narrative and database_async)
+    
+    Parameters:
+    session (sqlalchemy.orm.Session): Session to query in (a sync session, e.g. through run_sync)
+    data_fingerprint (str): compute_data_fingerprint of the input data
+    params_hash (str): hash_params of the generation parameters
+    content_hash (str): hash_content of the narrative body
+    
+    Returns:
+    int or None: ID of the stored narrative, if any
+    """
+    query = select(Narrative.id).where(
+        Narrative.data_fingerprint == data_fingerprint,
+        Narrative.params_hash == (NO_PARAMS_HASH if params_hash is None else params_hash),
+        Narrative.content_hash == content_hash
+    )
+    return session.execute(query.limit(1)).scalar()
+
+@profiling.traced('database.save_datasets_bulk')
+def save_datasets_bulk(datasets, batch_size=1000):
+    """
+    Save many datasets in a single transaction
+    
+    Parameters:
+    datasets (list): Dicts with the save_dataset arguments (name, data_type, source_type,
+                     and optionally source_details, description, fingerprint)
+    batch_size (int): Rows per multi-row INSERT statement
+    
+    Returns:
+    list: New dataset IDs, in the same order as the input
+    """
+    fields = ['name', 'data_type', 'source_type', 'source_details', 'description', 'fingerprint']
+    rows = [{field: dataset.get(field) for field in fields} for dataset in datasets]
+    return _bulk_insert(Dataset, rows, batch_size)
+
+@profiling.traced('database.save_narratives_bulk')
+def save_narratives_bulk(narratives, batch_size=1000):
+    """
+    Save many generated narratives in a single transaction
+    
+    Narratives that carry a data_fingerprint and duplicate a stored narrative
+    (or an earlier one in the same call) are not inserted again.
+    
+    Parameters:
+    narratives (list): Dicts with the save_narrative arguments (dataset_id, title, content,
+                       narrative_type, and optionally consistency_score, consistency_report,
+                       target_audience, depth_level, data_fingerprint, params_hash)
+    batch_size (int): Rows per multi-row INSERT statement
+    
+    Returns:
+    list: Narrative IDs (new or existing), in the same order as the input
+    """
+    fields = ['dataset_id', 'title', 'content', 'narrative_type', 'consistency_score',
+              'consistency_report', 'target_audience', 'depth_level', 'data_fingerprint', 'params_hash']
+    rows = [{field: narrative.get(field) for field in fields} for narrative in narratives]
+    for row in rows:
+        row['content_hash'] = hash_content(row['content'])
+        if row['data_fingerprint'] is not None and row['params_hash'] is None:
+            row['params_hash'] = NO_PARAMS_HASH
+    
+    # Look up stored duplicates for the rows that can be deduplicated
+    keys = [
+        (row['data_fingerprint'], row['params_hash'], row['content_hash']) if row['data_fingerprint'] is not None else None
+        for row in rows
+    ]
+    known_ids = {}
+    fingerprints = {key[0] for key in keys if key is not None}
+    if fingerprints:
+        with get_session() as session:
+            for fingerprint_batch in _chunks(sorted(fingerprints), batch_size):
+                stored = session.execute(
+                    select(Narrative.id, Narrative.data_fingerprint, Narrative.params_hash, Narrative.content_hash)
+                    .where(Narrative.data_fingerprint.in_(fingerprint_batch))
+                ).all()
+                for narrative_id, fingerprint, params_hash, content_hash in stored:
+                    known_ids.setdefault((fingerprint, params_hash, content_hash), narrative_id)
+    
+    new_rows = []
+    new_positions = {}
+    for position, (row, key) in enumerate(zip(rows, keys)):
+        if key is not None and (key in known_ids or key in new_positions):
+            continue
+        if key is not None:
+            new_positions[key] = position
+        new_rows.append((position, row))
+    
+    def index_batch(session, batch, ids):
+        index_narrative_text(session, [(narrative_id, row['content']) for narrative_id, row in zip(ids, batch)])
+    
+    new_ids = _bulk_insert(Narrative, [row for _, row in new_rows], batch_size, on_batch=index_batch)
+    
+    ids = [None] * len(rows)
+    for (position, _), narrative_id in zip(new_rows, new_ids):
+        ids[position] = narrative_id
+    for position, key in enumerate(keys):
+        if ids[position] is None:
+            ids[position] = known_ids[key] if key in known_ids else ids[new_positions[key]]
+    return ids
+
+def _chunks(values, size):
+    """Split a list into consecutive chunks of at most size items"""
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+def _bulk_insert(model, rows, batch_size, on_batch=None):
+    """Insert rows with batched multi-row INSERT ... RETURNING id in one transaction"""
+    if not rows:
+        return []
+    
+    ids = []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    with get_session() as session:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            batch_ids = session.execute(statement, batch).scalars().all()
+            if on_batch is not None:
+                on_batch(session, batch, batch_ids)
+            ids.extend(batch_ids)
+        session.commit()
+    return ids
+
+@profiling.traced('database.save_dataset_prices')
+def save_dataset_prices(dataset_id, data, batch_size=5000):
+    """
+    Store the OHLCV rows of a financial dataset
+    
+    Only the raw price columns are stored; calculated columns are rebuilt on load.
+    Rows are appended, so pass only dates that are not stored yet.
+    
+    Parameters:
+    dataset_id (int): ID of the dataset the prices belong to
+    data (pandas.DataFrame): DataFrame with Date and Close (and optionally Open/High/Low/Volume)
+    batch_size (int): Rows per multi-row INSERT statement
+    
+    Returns:
+    int: Number of rows stored
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(data['Date']))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    
+    columns = {'date': dates.to_pydatetime()}
+    for frame_column, table_column in PRICE_COLUMNS.items():
+        if frame_column != 'Date':
+            values = data[frame_column].to_numpy(dtype=float) if frame_column in data.columns else [None] * len(data)
+            columns[table_column] = [None if value is None or pd.isna(value) else float(value) for value in values]
+    
+    rows = [
+        {'dataset_id': dataset_id, **{name: values[i] for name, values in columns.items()}}
+        for i in range(len(data))
+    ]
+    
+    with get_session() as session:
+        for i in range(0, len(rows), batch_size):
+            session.execute(insert(DatasetPrice), rows[i:i + batch_size])
+        session.commit()
+    return len(rows)
+
+def save_financial_dataset(name, data, source_type, source_details=None, description=None):
+    """Save dataset information together with its price history"""
+    dataset_id = save_dataset(name, 'financial', source_type, source_details, description,
+                              fingerprint=compute_data_fingerprint(data))
+    save_dataset_prices(dataset_id, data)
+    return dataset_id
+
+@profiling.traced('database.load_dataset_prices')
+def load_dataset_prices(dataset_id, start_date=None, end_date=None, lookback_rows=0):
+    """
+    Read stored OHLCV rows for a dataset and date range
+    
+    Parameters:
+    dataset_id (int): ID of the dataset
+    start_date (datetime): First date to include (None for the first stored date)
+    end_date (datetime): Last date to include (None for the last stored date)
+    lookback_rows (int): Extra rows to include before start_date (for indicator warm-up)
+    
+    Returns:
+    pandas.DataFrame: Date, Open, High, Low, Close and Volume columns ordered by date
+    """
+    table_columns = [getattr(DatasetPrice, name) for name in PRICE_COLUMNS.values()]
+    with get_session() as session:
+        query = select(*table_columns).where(DatasetPrice.dataset_id == dataset_id)
+        if start_date is not None:
+            query = query.where(DatasetPrice.date >= pd.Timestamp(start_date).to_pydatetime())
+        if end_date is not None:
+            query = query.where(DatasetPrice.date <= pd.Timestamp(end_date).to_pydatetime())
+        rows = session.execute(query.order_by(DatasetPrice.date)).all()
+        
+        lookback = []
+        if start_date is not None and lookback_rows > 0:
+            lookback = session.execute(
+                select(*table_columns).where(
+                    DatasetPrice.dataset_id == dataset_id,
+                    DatasetPrice.date < pd.Timestamp(start_date).to_pydatetime()
+                ).order_by(DatasetPrice.date.desc()).limit(lookback_rows)
+            ).all()[::-1]
+    
+    data = pd.DataFrame(lookback + rows, columns=list(PRICE_COLUMNS.keys()))
+    data['Date'] = pd.to_datetime(data['Date'])
+    return data
+
+@profiling.traced('database.load_dataset_frame')
+def load_dataset_frame(dataset_id, start_date=None, end_date=None):
+    """
+    Load a stored financial dataset as a DataFrame shaped like fetch_stock_data output
+    
+    Calculated columns are warmed up on rows before start_date, so a range read
+    has the same indicator values as the full history.
+    
+    Parameters:
+    dataset_id (int): ID of the dataset
+    start_date (datetime): First date to include (None for the first stored date)
+    end_date (datetime): Last date to include (None for the last stored date)
+    
+    Returns:
+    pandas.DataFrame: Price data with calculated columns and Symbol
+    """
+    dataset = get_dataset(dataset_id)
+    if dataset is None:
+        raise Exception(f"Dataset {dataset_id} not found")
+    
+    data = load_dataset_prices(dataset_id, start_date, end_date, lookback_rows=INDICATOR_LOOKBACK)
+    data = add_technical_indicators(data)
+    if start_date is not None:
+        data = data[data['Date'] >= pd.Timestamp(start_date)].reset_index(drop=True)
+    
+    source_details = dataset.source_details or {}
+    data['Symbol'] = source_details.get('ticker', dataset.name)
+    return data
+
+def get_last_price_date(dataset_id):
+    """Get the last stored price date of a dataset (None if it has no prices)"""
+    with get_session() as session:
+        last_date = session.execute(
+            select(func.max(DatasetPrice.date)).where(DatasetPrice.dataset_id == dataset_id)
+        ).scalar()
+    return pd.Timestamp(last_date) if last_date is not None else None
+
+def update_dataset(dataset_id, source_details=None, fingerprint=None):
+    """
+    Update the source details and data fingerprint of a dataset
+    
+    Parameters:
+    dataset_id (int): ID of the dataset
+    source_details (dict): New source details (None keeps the stored ones)
+    fingerprint (str): New data fingerprint (None clears it)
+    """
+    with get_session() as session:
+        values = {'fingerprint': fingerprint}
+        if source_details is not None:
+            values['source_details'] = source_details
+        session.execute(update(Dataset).where(Dataset.id == dataset_id).values(**values))
+        session.commit()
+
+def get_narratives_for_fingerprint(dataset_id, data_fingerprint):
+    """Get the narratives of a dataset that were generated from data with the given fingerprint"""
+    with get_session() as session:
+        return session.query(Narrative).filter(
+            Narrative.dataset_id == dataset_id,
+            Narrative.data_fingerprint == data_fingerprint
+        ).order_by(Narrative.created_at.desc(), Narrative.id.desc()).all()
+
+@profiling.traced('database.get_dataset')
 def get_dataset(dataset_id):
     """Get dataset by ID"""
-    with SessionLocal() as session:
+    with get_session() as session:
         dataset = session.query(Dataset).filter(Dataset.id == dataset_id).first()
         return dataset
 
+@profiling.traced('database.get_narrative')
 def get_narrative(narrative_id):
     """Get narrative by ID"""
-    with SessionLocal() as session:
+    with get_session() as session:
         narrative = session.query(Narrative).filter(Narrative.id == narrative_id).first()
         return narrative
 
+@profiling.traced('database.get_all_datasets')
 def get_all_datasets(limit=100):
     """Get all datasets with optional limit"""
-    with SessionLocal() as session:
-        datasets = session.query(Dataset).order_by(Dataset.created_at.desc()).limit(limit).all()
+    with get_session() as session:
+        datasets = session.query(Dataset).order_by(Dataset.created_at.desc(), Dataset.id.desc()).limit(limit).all()
         return datasets
 
+@profiling.traced('database.get_narratives_for_dataset')
 def get_narratives_for_dataset(dataset_id, limit=10):
     """Get narratives for a specific dataset"""
-    with SessionLocal() as session:
-        narratives = session.query(Narrative).filter(Narrative.dataset_id == dataset_id).order_by(Narrative.created_at.desc()).limit(limit).all()
+    with get_session() as session:
+        narratives = session.query(Narrative).filter(Narrative.dataset_id == dataset_id).order_by(Narrative.created_at.desc(), Narrative.id.desc()).limit(limit).all()
         return narratives
 
+@profiling.traced('database.get_recent_narratives')
 def get_recent_narratives(limit=10):
     """Get most recent narratives"""
-    with SessionLocal() as session:
-        narratives = session.query(Narrative).order_by(Narrative.created_at.desc()).limit(limit).all()
+    with get_session() as session:
+        narratives = session.query(Narrative).order_by(Narrative.created_at.desc(), Narrative.id.desc()).limit(limit).all()
         return narratives
 
+@profiling.traced('database.get_datasets_page')
+def get_datasets_page(limit=100, cursor=None):
+    """
+    Get one page of datasets, newest first, using keyset pagination
+    
+    Parameters:
+    limit (int): Page size
+    cursor (str): Cursor returned with the previous page (None for the first page)
+    
+    Returns:
+    tuple: (datasets, next_cursor) where next_cursor is None on the last page
+    """
+    with get_session() as session:
+        query = session.query(Dataset)
+        return _keyset_page(query, Dataset, limit, cursor)
+
+@profiling.traced('database.get_narratives_page')
+def get_narratives_page(dataset_id=None, limit=10, cursor=None):
+    """
+    Get one page of narratives, newest first, using keyset pagination
+    
+    Parameters:
+    dataset_id (int): Only return narratives for this dataset (None for all narratives)
+    limit (int): Page size
+    cursor (str): Cursor returned with the previous page (None for the first page)
+    
+    Returns:
+    tuple: (narratives, next_cursor) where next_cursor is None on the last page
+    """
+    with get_session() as session:
+        query = session.query(Narrative)
+        if dataset_id is not None:
+            query = query.filter(Narrative.dataset_id == dataset_id)
+        return _keyset_page(query, Narrative, limit, cursor)
+
+def encode_page_cursor(created_at, row_id):
+    """Encode the (created_at, id) position of the last row on a page as a cursor string"""
+    return f"{created_at.isoformat()}|{row_id}"
+
+def decode_page_cursor(cursor):
+    """Decode a cursor string into its (created_at, id) position"""
+    try:
+        created_at, row_id = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (AttributeError, ValueError):
+        raise Exception(f"Invalid page cursor: {cursor!r}")
+
+def _keyset_page(query, model, limit, cursor):
+    """Apply newest-first keyset pagination on (created_at, id) to a query"""
+    if cursor is not None:
+        created_at, row_id = decode_page_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    
+    # Fetch one extra row to learn whether another page follows
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    return rows, encode_page_cursor(rows[-1].created_at, rows[-1].id)
+
+@profiling.traced('database.list_datasets')
+def list_datasets(limit=100, cursor=None):
+    """
+    List datasets newest first as lightweight DatasetRow projections
+    
+    Parameters:
+    limit (int): Page size
+    cursor (str): Cursor returned with the previous page (None for the first page)
+    
+    Returns:
+    tuple: (rows, next_cursor) where rows are DatasetRow tuples
+    """
+    columns = [getattr(Dataset, field) for field in DatasetRow._fields]
+    with get_session() as session:
+        rows, next_cursor = _keyset_page(session.query(*columns), Dataset, limit, cursor)
+        return [DatasetRow(*row) for row in rows], next_cursor
+
+@profiling.traced('database.list_narratives')
+def list_narratives(dataset_id=None, limit=10, cursor=None):
+    """
+    List narratives newest first as lightweight NarrativeRow projections
+    
+    Narrative bodies and consistency reports are not fetched; load them for a
+    single narrative with get_narrative_content and get_consistency_report.
+    
+    Parameters:
+    dataset_id (int): Only list narratives for this dataset (None for all narratives)
+    limit (int): Page size
+    cursor (str): Cursor returned with the previous page (None for the first page)
+    
+    Returns:
+    tuple: (rows, next_cursor) where rows are NarrativeRow tuples
+    """
+    columns = [getattr(Narrative, field) for field in NarrativeRow._fields]
+    with get_session() as session:
+        query = session.query(*columns)
+        if dataset_id is not None:
+            query = query.filter(Narrative.dataset_id == dataset_id)
+        rows, next_cursor = _keyset_page(query, Narrative, limit, cursor)
+        return [NarrativeRow(*row) for row in rows], next_cursor
+
+def get_narrative_content(narrative_id):
+    """Load only the body of a narrative"""
+    with get_session() as session:
+        return session.execute(
+            select(Narrative.content).where(Narrative.id == narrative_id)
+        ).scalar_one_or_none()
+
+def get_consistency_report(narrative_id):
+    """Load only the consistency report of a narrative"""
+    with get_session() as session:
+        return session.execute(
+            select(Narrative.consistency_report).where(Narrative.id == narrative_id)
+        ).scalar_one_or_none()
+
 def dataset_to_dict(dataset):
-    """Convert dataset model to dictionary"""
+    """Convert dataset model (or DatasetRow) to dictionary"""
     return {
         'id': dataset.id,
         'name': dataset.name,
@@ -133,12 +909,12 @@ def dataset_to_dict(dataset):
     }
 
 def narrative_to_dict(narrative):
-    """Convert narrative model to dictionary"""
+    """Convert narrative model (or NarrativeRow, which has no content) to dictionary"""
     return {
         'id': narrative.id,
         'dataset_id': narrative.dataset_id,
         'title': narrative.title,
-        'content': narrative.content,
+        'content': getattr(narrative, 'content', None),
         'narrative_type': narrative.narrative_type,
         'target_audience': narrative.target_audience,
         'depth_level': narrative.depth_level,
@@ -146,10 +922,202 @@ def narrative_to_dict(narrative):
         'created_at': narrative.created_at.strftime('%Y-%m-%d %H:%M:%S') if narrative.created_at else None
     }
 
-def search_narratives(search_term, limit=10):
-    """Search narratives by content"""
-    with SessionLocal() as session:
-        narratives = session.query(Narrative).filter(
-            Narrative.content.ilike(f'%{search_term}%')
-        ).order_by(Narrative.created_at.desc()).limit(limit).all()
-        return narratives
+@profiling.traced('database.search_narratives')
+def search_narratives(search_term, limit=10, offset=0):
+    """
+    Search narratives by content using the full-text index
+    
+    Results are ranked by relevance (ts_rank on Postgres, bm25 on SQLite); every
+    term in the query must match. Other backends fall back to a substring scan.
+    
+    Parameters:
+    search_term (str): Words to search for
+    limit (int): Maximum number of narratives to return
+    offset (int): Number of ranked results to skip (for pagination)
+    
+    Returns:
+    list: Matching Narrative objects, best match first
+    """
+    with get_session() as session:
+        return run_search(session, search_term, limit, offset)
+
+def run_search(session, search_term, limit=10, offset=0):
+    """Run a ranked full-text narrative search on an open session (see search_narratives)"""
+    terms = _search_terms(search_term)
+    if not terms:
+        return []
+    
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        query = func.websearch_to_tsquery(SEARCH_LANGUAGE, ' '.join(terms))
+        rank = func.ts_rank(narrative_search.c.document, query)
+        return session.query(Narrative).join(
+            narrative_search, narrative_search.c.narrative_id == Narrative.id
+        ).filter(
+            narrative_search.c.document.op('@@')(query)
+        ).order_by(rank.desc(), Narrative.created_at.desc()).offset(offset).limit(limit).all()
+    
+    if dialect == 'sqlite':
+        # Quote each term so FTS5 treats it as a literal token; adjacent terms are ANDed
+        match = ' '.join(f'"{term}"' for term in terms)
+        ranked_ids = session.execute(
+            text(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH :match "
+                 f"ORDER BY bm25({SQLITE_FTS_TABLE}) LIMIT :limit OFFSET :offset"),
+            {'match': match, 'limit': limit, 'offset': offset}
+        ).scalars().all()
+        narratives = session.query(Narrative).filter(Narrative.id.in_(ranked_ids)).all()
+        by_id = {narrative.id: narrative for narrative in narratives}
+        return [by_id[narrative_id] for narrative_id in ranked_ids if narrative_id in by_id]
+    
+    return scan_search(session, terms, limit, offset)
+
+def scan_search(session, terms, limit=10, offset=0, batch_size=1000):
+    """
+    Search narratives without an index by decompressing and scanning bodies, newest first
+    
+    Used on backends without a full-text index; every term must appear (case-insensitive).
+    """
+    terms = [term.lower() for term in terms]
+    matched_ids = []
+    last_id = None
+    while len(matched_ids) < offset + limit:
+        # Page by id (newest first) so the scan never revisits a row
+        query = select(Narrative.id, Narrative.content)
+        if last_id is not None:
+            query = query.where(Narrative.id < last_id)
+        rows = session.execute(query.order_by(Narrative.id.desc()).limit(batch_size)).all()
+        if not rows:
+            break
+        for row in rows:
+            content = row.content.lower()
+            if all(term in content for term in terms):
+                matched_ids.append(row.id)
+        last_id = rows[-1].id
+    
+    page_ids = matched_ids[offset:offset + limit]
+    narratives = session.query(Narrative).filter(Narrative.id.in_(page_ids)).all()
+    by_id = {narrative.id: narrative for narrative in narratives}
+    return [by_id[narrative_id] for narrative_id in page_ids]
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Create the full-text index if needed and (re)index every stored narrative
+    
+    Use this after upgrading an existing database or if the index gets out of sync.
+    
+    Parameters:
+    batch_size (int): Narratives indexed per statement
+    
+    Returns:
+    int: Number of narratives indexed
+    """
+    engine = get_engine()
+    with engine.begin() as connection:
+        _create_search_index(connection)
+    
+    indexed = 0
+    with get_session() as session:
+        if engine.dialect.name == 'postgresql':
+            session.execute(narrative_search.delete())
+        elif engine.dialect.name == 'sqlite':
+            session.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('delete-all')"))
+        
+        last_id = 0
+        while True:
+            rows = session.execute(
+                select(Narrative.id, Narrative.content).where(Narrative.id > last_id).order_by(Narrative.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            index_narrative_text(session, [(row.id, row.content) for row in rows])
+            indexed += len(rows)
+            last_id = rows[-1].id
+        session.commit()
+    return indexed
+
+def migrate_compressed_storage(batch_size=500):
+    """
+    Convert narrative bodies and consistency reports stored by earlier versions
+    (plain text / JSON columns) to the compressed format
+    
+    The Postgres column types are converted to bytea by create_schema when the
+    engine starts; this rewrites the legacy rows in those columns. Rows already
+    compressed are skipped, so the migration can be re-run safely.
+    
+    Parameters:
+    batch_size (int): Rows rewritten per statement
+    
+    Returns:
+    int: Number of narratives rewritten
+    """
+    get_engine()
+    
+    table = Narrative.__table__
+    raw_content = type_coerce(table.c.content, LargeBinary)
+    raw_report = type_coerce(table.c.consistency_report, LargeBinary)
+    rewrite = update(table).where(table.c.id == bindparam('row_id')).values(
+        content=bindparam('new_content', type_=CompressedText()),
+        consistency_report=bindparam('new_report', type_=CompressedReport())
+    )
+    
+    migrated = 0
+    last_id = 0
+    with get_session() as session:
+        while True:
+            rows = session.execute(
+                select(table.c.id, raw_content, raw_report).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            params = [{
+                'row_id': row_id,
+                'new_content': decompress_text(content),
+                'new_report': None if report is None else decode_consistency_report(report)
+            } for row_id, content, report in rows
+                if not is_encoded(content) or (report is not None and not is_encoded(report))]
+            if params:
+                session.execute(rewrite, params)
+                migrated += len(params)
+        session.commit()
+    return migrated
+
+def _search_terms(search_term):
+    """Split a search string into word tokens"""
+    return re.findall(r'\w+', search_term or '')
+
+def _create_search_index(connection):
+    """Create the backend-specific full-text index structures if they don't exist"""
+    if connection.dialect.name == 'postgresql':
+        narrative_search.create(connection, checkfirst=True)
+    elif connection.dialect.name == 'sqlite':
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} "
+            "USING fts5(content, content='', tokenize='porter unicode61')"
+        ))
+
+def index_narrative_text(session, id_content_pairs):
+    """
+    Add narrative bodies to the full-text index within the caller's transaction
+    
+    Parameters:
+    session (sqlalchemy.orm.Session): Session whose transaction stores the narratives
+    id_content_pairs (list): (narrative_id, content) tuples
+    """
+    if not id_content_pairs:
+        return
+    
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        session.execute(
+            text("INSERT INTO narrative_search (narrative_id, document) "
+                 "VALUES (:narrative_id, to_tsvector(CAST(:language AS regconfig), :content))"),
+            [{'narrative_id': narrative_id, 'language': SEARCH_LANGUAGE, 'content': content}
+             for narrative_id, content in id_content_pairs]
+        )
+    elif dialect == 'sqlite':
+        session.execute(
+            text(f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, content) VALUES (:narrative_id, :content)"),
+            [{'narrative_id': narrative_id, 'content': content} for narrative_id, content in id_content_pairs]
+        )
@@ -0,0 +1,231 @@
+import asyncio
+import weakref
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database
+from database import Dataset, Narrative, POOL_SETTINGS
+
+# Async drivers used for each backend when the URL names none (asyncpg / aiosqlite)
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+# The engine is created on first use, like the synchronous engine in database.py
+_engine = None
+
+# asyncio locks belong to the event loop they are first used on, so each loop gets its own
+_engine_locks = weakref.WeakKeyDictionary()
+
+# Create an async session factory (bound to the engine when the engine is created)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+def _get_engine_lock():
+    """Get the engine lock for the running event loop"""
+    loop = asyncio.get_running_loop()
+    lock = _engine_locks.get(loop)
+    if lock is None:
+        lock = _engine_locks[loop] = asyncio.Lock()
+    return lock
+
+def to_async_url(database_url):
+    """
+    Convert a database URL to use an asyncio driver
+
+    Parameters:
+    database_url (str): Database URL, e.g. postgresql://user@host/db
+
+    Returns:
+    sqlalchemy.engine.URL: URL with an async driver, e.g. postgresql+asyncpg://user@host/db
+                          (ValueError for backends without one in ASYNC_DRIVERS)
+    """
+    url = make_url(database_url)
+    # Heroku-style postgres:// URLs name the backend 'postgres'
+    if url.drivername.split('+')[0] == 'postgres':
+        url = url.set(drivername='postgresql' + url.drivername[len('postgres'):])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database backend for the async engine: {backend} "
+                         f"(supported: {', '.join(ASYNC_DRIVERS)})")
+    if url.drivername in ('postgresql', 'postgresql+psycopg2', 'sqlite', 'sqlite+pysqlite'):
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url
+
+async def configure_engine(database_url=None, **pool_settings):
+    """
+    Create the async database engine, replacing (and disposing) any existing one
+
+    Parameters:
+    database_url (str): Database URL (defaults to the DATABASE_URL environment variable)
+    **pool_settings: Overrides for database.POOL_SETTINGS
+
+    Returns:
+    sqlalchemy.ext.asyncio.AsyncEngine: The configured engine
+    """
+    global _engine
+
+    async with _get_engine_lock():
+        previous = _engine
+        _engine = await _create_engine(database_url, **pool_settings)
+        if previous is not None:
+            await previous.dispose()
+        return _engine
+
+async def _create_engine(database_url=None, **pool_settings):
+    """
+    Build an async engine, create any missing schema and bind the session factory to it
+
+    Never disposes an existing engine; callers hold the engine lock and install the result.
+    """
+    database_url = database_url or database.DATABASE_URL
+    if not database_url:
+        raise Exception("DATABASE_URL is not set")
+
+    settings = dict(POOL_SETTINGS)
+    settings.update(pool_settings)
+
+    url = to_async_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        engine_kwargs = {'poolclass': StaticPool}
+    else:
+        engine_kwargs = settings
+
+    engine = create_async_engine(url, **engine_kwargs)
+
+    # Create all tables if they don't exist
+    async with engine.begin() as connection:
+        await connection.run_sync(database.create_schema)
+
+    AsyncSessionLocal.configure(bind=engine)
+    return engine
+
+async def get_engine():
+    """Get the async database engine, creating it on first use"""
+    global _engine
+
+    engine = _engine
+    if engine is None:
+        # Re-checked under the lock so concurrent first callers create a single engine
+        async with _get_engine_lock():
+            if _engine is None:
+                _engine = await _create_engine()
+            engine = _engine
+    return engine
+
+async def get_session():
+    """Open a new async session on the pooled engine"""
+    await get_engine()
+    return AsyncSessionLocal()
+
+async def dispose_engine():
+    """Close all pooled connections and drop the async engine"""
+    global _engine
+    async with _get_engine_lock():
+        if _engine is not None:
+            await _engine.dispose()
+            _engine = None
+
+# Database operations
+async def save_dataset(name, data_type, source_type, source_details=None, description=None, fingerprint=None):
+    """Save dataset information to the database"""
+    async with await get_session() as session:
+        dataset = Dataset(
+            name=name,
+            data_type=data_type,
+            source_type=source_type,
+            source_details=source_details,
+            description=description,
+            fingerprint=fingerprint
+        )
+        session.add(dataset)
+        await session.flush()
+        dataset_id = dataset.id
+        await session.commit()
+        return dataset_id
+
+async def save_narrative(dataset_id, title, content, narrative_type, consistency_score=None, consistency_report=None, target_audience=None, depth_level=None, data_fingerprint=None, params_hash=None):
+    """Save a generated narrative to the database, skipping duplicates (see database.save_narrative)"""
+    content_hash = database.hash_content(content)
+    if data_fingerprint is not None and params_hash is None:
+        params_hash = database.NO_PARAMS_HASH
+    async with await get_session() as session:
+        if data_fingerprint is not None:
+            existing_id = await session.run_sync(database.find_duplicate_narrative, data_fingerprint, params_hash, content_hash)
+            if existing_id is not None:
+                return existing_id
+
+        narrative = Narrative(
+            dataset_id=dataset_id,
+            title=title,
+            content=content,
+            narrative_type=narrative_type,
+            consistency_score=consistency_score,
+            consistency_report=consistency_report,
+            target_audience=target_audience,
+            depth_level=depth_level,
+            content_hash=content_hash,
+            data_fingerprint=data_fingerprint,
+            params_hash=params_hash
+        )
+        session.add(narrative)
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            if data_fingerprint is None:
+                raise
+            # Another writer stored the same narrative first
+            existing_id = await session.run_sync(database.find_duplicate_narrative, data_fingerprint, params_hash, content_hash)
+            if existing_id is None:
+                raise
+            return existing_id
+        narrative_id = narrative.id
+        await session.run_sync(database.index_narrative_text, [(narrative_id, content)])
+        await session.commit()
+        return narrative_id
+
+async def get_dataset(dataset_id):
+    """Get dataset by ID"""
+    async with await get_session() as session:
+        result = await session.execute(select(Dataset).where(Dataset.id == dataset_id))
+        return result.scalars().first()
+
+async def get_narrative(narrative_id):
+    """Get narrative by ID"""
+    async with await get_session() as session:
+        result = await session.execute(select(Narrative).where(Narrative.id == narrative_id))
+        return result.scalars().first()
+
+async def get_all_datasets(limit=100):
+    """Get all datasets with optional limit"""
+    async with await get_session() as session:
+        result = await session.execute(
+            select(Dataset).order_by(Dataset.created_at.desc(), Dataset.id.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+async def get_narratives_for_dataset(dataset_id, limit=10):
+    """Get narratives for a specific dataset"""
+    async with await get_session() as session:
+        result = await session.execute(
+            select(Narrative).where(Narrative.dataset_id == dataset_id)
+            .order_by(Narrative.created_at.desc(), Narrative.id.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+async def get_recent_narratives(limit=10):
+    """Get most recent narratives"""
+    async with await get_session() as session:
+        result = await session.execute(
+            select(Narrative).order_by(Narrative.created_at.desc(), Narrative.id.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+async def search_narratives(search_term, limit=10, offset=0):
+    """Search narratives by content using the full-text index (see database.search_narratives)"""
+    async with await get_session() as session:
+        return await session.run_sync(database.run_search, search_term, limit, offset)
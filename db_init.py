@@ -1,6 +1,7 @@
 import database
 
 print("Initializing database...")
+database.init_db()
 print("Database initialized successfully. Tables created:")
 print("- datasets")
 print("- narratives")
@@ -4,15 +4,69 @@ import yfinance as yf
 from datetime import datetime, timedelta
 import io
 import os
+import hashlib
+import warnings
+import profiling
+import price_archive
+import range_index
+import indicators as indicator_pack
+import resampling
 
-def fetch_stock_data(ticker_symbol, start_date, end_date):
+# Function used to download price data, with the yf.download signature:
+# downloader(tickers, start=..., end=..., interval=...) -> DataFrame indexed by date with
+# Open, High, Low, Close, Adj Close and Volume columns. None selects the
+# backend named by the DATA_DOWNLOADER environment variable on first use.
+_downloader = None
+
+def set_downloader(downloader):
+    """
+    Replace the price data downloader used by fetch_stock_data and fetch_market_data
+    
+    Parameters:
+    downloader (callable or str): A function with the yf.download signature (e.g.
+                                  synthetic_data.make_downloader()), or 'yahoo' / 'synthetic' /
+                                  'archive' (reads the PRICE_ARCHIVE_DIR price archive)
+    
+    Returns:
+    callable: The previous downloader (None if none was selected yet)
     """
-    Fetch stock data from Yahoo Finance API
+    global _downloader
+    previous = _downloader
+    _downloader = _resolve_downloader(downloader) if isinstance(downloader, str) else downloader
+    return previous
+
+def get_downloader():
+    """Get the price data downloader, selecting it from DATA_DOWNLOADER on first use"""
+    global _downloader
+    if _downloader is None:
+        _downloader = _resolve_downloader(os.environ.get("DATA_DOWNLOADER", "yahoo"))
+    return _downloader
+
+def _resolve_downloader(name):
+    """Map a downloader backend name to a downloader function"""
+    if name == 'yahoo':
+        return yf.download
+    if name == 'synthetic':
+        import synthetic_data
+        return synthetic_data.make_downloader(seed=int(os.environ.get("SYNTHETIC_SEED", 42)))
+    if name == 'archive':
+        return price_archive.make_downloader(os.environ["PRICE_ARCHIVE_DIR"])
+    raise Exception(f"Unknown data downloader: {name}")
+
+@profiling.traced('financial_data.fetch_stock_data')
+def fetch_stock_data(ticker_symbol, start_date, end_date, interval='1d'):
+    """
+    Fetch stock data from Yahoo Finance API (or the downloader set with set_downloader)
+    
+    Intraday intervals are limited by Yahoo Finance to recent history (7 days of
+    1m bars, 60 days of other minute bars, 730 days of 1h bars); use
+    resample_stock_data or load_archived_stock_data for longer minute histories.
     
     Parameters:
     ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL')
     start_date (datetime): Start date for data retrieval
     end_date (datetime): End date for data retrieval
+    interval (str): Bar interval, e.g. '1d', '1h', '5m' or '1m'
     
     Returns:
     pandas.DataFrame: DataFrame containing stock data
@@ -23,38 +77,48 @@ def fetch_stock_data(ticker_symbol, start_date, end_date):
         end_str = end_date.strftime('%Y-%m-%d')
         
         # Fetch data from Yahoo Finance
-        stock_data = yf.download(ticker_symbol, start=start_str, end=end_str)
-        
-        # Reset index to make date a column
-        stock_data = stock_data.reset_index()
+        stock_data = get_downloader()(ticker_symbol, start=start_str, end=end_str, interval=interval)
         
-        # Add additional calculated columns
-        if len(stock_data) > 0:
-            # Calculate daily returns
-            stock_data['Daily_Return'] = stock_data['Close'].pct_change()
-            
-            # Calculate moving averages
-            stock_data['MA_20'] = stock_data['Close'].rolling(window=20).mean()
-            stock_data['MA_50'] = stock_data['Close'].rolling(window=50).mean()
-            
-            # Calculate volatility (20-day standard deviation)
-            stock_data['Volatility_20d'] = stock_data['Daily_Return'].rolling(window=20).std()
-            
-            # Add ticker symbol as a column
-            stock_data['Symbol'] = ticker_symbol
-            
-        return stock_data
+        return prepare_stock_data(stock_data, ticker_symbol, interval)
     
     except Exception as e:
         raise Exception(f"Failed to fetch stock data: {str(e)}")
 
-def fetch_market_data(start_date, end_date):
+def prepare_stock_data(stock_data, ticker_symbol, interval='1d'):
+    """
+    Turn downloaded price data into the fetch_stock_data frame layout
+    
+    Parameters:
+    stock_data (pandas.DataFrame): Downloader output indexed by date
+    ticker_symbol (str): The stock ticker symbol
+    interval (str): Bar interval, recorded in attrs['interval']
+    
+    Returns:
+    pandas.DataFrame: Price data with a Date column, calculated columns and Symbol
+    """
+    # Reset index to make date a column
+    stock_data = _date_column(stock_data)
+    stock_data.attrs['interval'] = interval
+    
+    # Add additional calculated columns
+    if len(stock_data) > 0:
+        # Calculate daily returns, moving averages and volatility
+        stock_data = add_technical_indicators(stock_data)
+        
+        # Add ticker symbol as a column
+        stock_data['Symbol'] = ticker_symbol
+        
+    return stock_data
+
+@profiling.traced('financial_data.fetch_market_data')
+def fetch_market_data(start_date, end_date, interval='1d'):
     """
     Fetch market index data (S&P 500) for comparison
     
     Parameters:
     start_date (datetime): Start date for data retrieval
     end_date (datetime): End date for data retrieval
+    interval (str): Bar interval, e.g. '1d', '1h', '5m' or '1m'
     
     Returns:
     pandas.DataFrame: DataFrame containing market index data
@@ -65,28 +129,149 @@ def fetch_market_data(start_date, end_date):
         end_str = end_date.strftime('%Y-%m-%d')
         
         # Fetch S&P 500 data from Yahoo Finance
-        market_data = yf.download('^GSPC', start=start_str, end=end_str)
+        market_data = get_downloader()('^GSPC', start=start_str, end=end_str, interval=interval)
         
-        # Reset index to make date a column
-        market_data = market_data.reset_index()
-        
-        # Add additional calculated columns
-        if len(market_data) > 0:
-            # Calculate daily returns
-            market_data['Daily_Return'] = market_data['Close'].pct_change()
-            
-            # Calculate moving averages
-            market_data['MA_20'] = market_data['Close'].rolling(window=20).mean()
-            market_data['MA_50'] = market_data['Close'].rolling(window=50).mean()
-            
-            # Add index name as a column
-            market_data['Index'] = 'S&P 500'
-            
-        return market_data
+        return prepare_market_data(market_data, interval=interval)
     
     except Exception as e:
         raise Exception(f"Failed to fetch market data: {str(e)}")
 
+def prepare_market_data(market_data, index_name='S&P 500', interval='1d'):
+    """
+    Turn downloaded index data into the fetch_market_data frame layout
+    
+    Parameters:
+    market_data (pandas.DataFrame): Downloader output indexed by date
+    index_name (str): Name to store in the Index column
+    interval (str): Bar interval, recorded in attrs['interval']
+    
+    Returns:
+    pandas.DataFrame: Index data with a Date column, calculated columns and Index
+    """
+    # Reset index to make date a column
+    market_data = _date_column(market_data)
+    market_data.attrs['interval'] = interval
+    
+    # Add additional calculated columns
+    if len(market_data) > 0:
+        # Calculate daily returns
+        market_data['Daily_Return'] = market_data['Close'].pct_change()
+        
+        # Calculate moving averages
+        market_data['MA_20'] = market_data['Close'].rolling(window=20).mean()
+        market_data['MA_50'] = market_data['Close'].rolling(window=50).mean()
+        
+        # Add index name as a column
+        market_data['Index'] = index_name
+        
+    return market_data
+
+def _date_column(data):
+    """Move the date index into a Date column (intraday downloads call it Datetime), in exchange-local time"""
+    data = data.reset_index()
+    if 'Datetime' in data.columns and 'Date' not in data.columns:
+        data = data.rename(columns={'Datetime': 'Date'})
+    if 'Date' in data.columns and isinstance(data['Date'].dtype, pd.DatetimeTZDtype):
+        data['Date'] = data['Date'].dt.tz_localize(None)
+    return data
+
+@profiling.traced('financial_data.fetch_peer_data')
+def fetch_peer_data(ticker_symbols, start_date, end_date, interval='1d'):
+    """
+    Fetch price data for a peer group of tickers in a single download
+    
+    Parameters:
+    ticker_symbols (list): Ticker symbols (e.g., ['AAPL', 'MSFT', 'GOOGL'])
+    start_date (datetime): Start date for data retrieval
+    end_date (datetime): End date for data retrieval
+    interval (str): Bar interval, e.g. '1d', '1h', '5m' or '1m'
+    
+    Returns:
+    pandas.DataFrame: Long-format price data with Date, Symbol, Open, High, Low, Close
+                      and Volume columns (see build_peer_panel)
+    """
+    try:
+        # Convert datetime to string format required by yfinance
+        start_str = start_date.strftime('%Y-%m-%d')
+        end_str = end_date.strftime('%Y-%m-%d')
+        
+        # Fetch every ticker in one request
+        peer_data = get_downloader()(list(ticker_symbols), start=start_str, end=end_str, interval=interval)
+        
+        return prepare_peer_data(peer_data, ticker_symbols, interval)
+    
+    except Exception as e:
+        raise Exception(f"Failed to fetch peer data: {str(e)}")
+
+def prepare_peer_data(peer_data, ticker_symbols, interval='1d'):
+    """
+    Turn a multi-ticker download into the fetch_peer_data long frame layout
+    
+    Parameters:
+    peer_data (pandas.DataFrame): Downloader output indexed by date with (Price, Ticker)
+                                  MultiIndex columns (plain columns for a single ticker)
+    ticker_symbols (list): The requested ticker symbols
+    interval (str): Bar interval, recorded in attrs['interval']
+    
+    Returns:
+    pandas.DataFrame: Long-format price data ordered by date, then symbol
+    """
+    if isinstance(peer_data.columns, pd.MultiIndex):
+        level = 'Ticker' if 'Ticker' in peer_data.columns.names else 1
+        peer_data = peer_data.stack(level=level, future_stack=True)
+        peer_data.index = peer_data.index.set_names('Symbol', level=-1)
+        peer_data = _date_column(peer_data)
+    else:
+        peer_data = _date_column(peer_data)
+        peer_data['Symbol'] = list(ticker_symbols)[0]
+    
+    # Drop the empty rows the reshape creates for tickers without a bar at a date
+    peer_data = peer_data.dropna(subset=['Close']).sort_values(['Date', 'Symbol'], kind='stable').reset_index(drop=True)
+    peer_data.columns.name = None
+    price_columns = [col for col in ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume'] if col in peer_data.columns]
+    peer_data = peer_data[['Date', 'Symbol'] + price_columns + [col for col in peer_data.columns if col not in price_columns and col not in ('Date', 'Symbol')]]
+    peer_data.attrs['interval'] = interval
+    return peer_data
+
+@profiling.traced('financial_data.load_archived_stock_data')
+def load_archived_stock_data(archive_root, ticker_symbol, start_date=None, end_date=None, interval=None):
+    """
+    Load stock data from a local price archive (see price_archive)
+    
+    The price columns are memory-mapped views of the archive files, so nothing is
+    parsed or copied; only the calculated columns are computed, warmed up on the
+    rows before start_date. With an interval coarser than the archived bars (e.g.
+    '1h' from minute bars) the bars are resampled chunk by chunk, so years of
+    minute data are rolled up within resampling.MEMORY_BUDGET_BYTES.
+    
+    Parameters:
+    archive_root (str): Archive directory
+    ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL')
+    start_date (datetime): Start date (None for the first archived date)
+    end_date (datetime): End date, exclusive like fetch_stock_data (None for the last archived date)
+    interval (str): Bar interval to return (None for the archived bars)
+    
+    Returns:
+    pandas.DataFrame: DataFrame containing stock data, shaped like fetch_stock_data output
+    """
+    try:
+        if interval is None:
+            stock_data = price_archive.read_symbol(archive_root, ticker_symbol, start_date, end_date,
+                                                   lookback_rows=INDICATOR_LOOKBACK if start_date is not None else 0)
+            stock_data.attrs['interval'] = resampling.infer_interval(stock_data['Date'])
+        else:
+            stock_data = price_archive.read_resampled(archive_root, ticker_symbol, interval, start_date, end_date,
+                                                      lookback_bars=INDICATOR_LOOKBACK if start_date is not None else 0)
+        stock_data = add_technical_indicators(stock_data)
+        if start_date is not None:
+            stock_data = stock_data[stock_data['Date'] >= pd.Timestamp(start_date)].reset_index(drop=True)
+        stock_data['Symbol'] = ticker_symbol
+        return stock_data
+    
+    except Exception as e:
+        raise Exception(f"Failed to load archived stock data: {str(e)}")
+
+@profiling.traced('financial_data.parse_uploaded_data')
 def parse_uploaded_data(uploaded_file):
     """
     Parse uploaded CSV file containing any type of data
@@ -111,17 +296,7 @@ def parse_uploaded_data(uploaded_file):
             df['Date'] = pd.to_datetime(df['Date'])
             
             # Add calculated columns if they don't exist
-            if 'Daily_Return' not in df.columns:
-                df['Daily_Return'] = df['Close'].pct_change()
-            
-            if 'MA_20' not in df.columns:
-                df['MA_20'] = df['Close'].rolling(window=20).mean()
-            
-            if 'MA_50' not in df.columns:
-                df['MA_50'] = df['Close'].rolling(window=50).mean()
-            
-            if 'Volatility_20d' not in df.columns:
-                df['Volatility_20d'] = df['Daily_Return'].rolling(window=20).std()
+            df = add_technical_indicators(df)
                 
             # Add symbol column if not present
             if 'Symbol' not in df.columns:
@@ -154,6 +329,127 @@ def parse_uploaded_data(uploaded_file):
     except Exception as e:
         raise Exception(f"Failed to parse uploaded data: {str(e)}")
 
+# Longest rolling window used by add_technical_indicators, in rows
+INDICATOR_LOOKBACK = 50
+
+@profiling.traced('financial_data.resample_stock_data')
+def resample_stock_data(data, interval):
+    """
+    Roll stock data up to a coarser interval (e.g. minute bars to hourly or daily bars)
+    
+    The calculated columns are recomputed on the resampled bars, so MA_20 of hourly
+    data is a 20-hour moving average.
+    
+    Parameters:
+    data (pandas.DataFrame): Stock data with Date and Open/High/Low/Close/Volume columns
+    interval (str): Target interval (see resampling.resample_ohlcv)
+    
+    Returns:
+    pandas.DataFrame: Resampled data shaped like fetch_stock_data output
+    """
+    try:
+        resampled = resampling.resample_ohlcv(data, interval)
+        if len(resampled) > 0:
+            resampled = add_technical_indicators(resampled)
+            resampled['Symbol'] = data['Symbol'].iloc[0] if 'Symbol' in data.columns else "Unknown"
+        return resampled
+    
+    except Exception as e:
+        raise Exception(f"Failed to resample stock data: {str(e)}")
+
+@profiling.traced('financial_data.add_technical_indicators')
+def add_technical_indicators(data, indicators=None):
+    """
+    Add the standard calculated columns (daily return, 20/50-day moving averages,
+    20-day volatility) to price data, keeping any that already exist
+    
+    Windows count bars, so for intraday data they span 20 and 50 bars of the
+    data's interval (see resampling.window_label) and Daily_Return is the return
+    per bar.
+    
+    Extra indicators (RSI, MACD, Bollinger bands, ATR, drawdown, OBV) are added
+    by name from indicators.INDICATORS, all in one indicators.compute_indicators
+    call. They depend on the whole history (exponential smoothing, running peak),
+    so extend_technical_indicators does not carry them over to appended rows.
+    
+    Parameters:
+    data (pandas.DataFrame): DataFrame with a Close column
+    indicators (list): Extra indicator names to add, e.g. ['rsi', 'macd']
+    
+    Returns:
+    pandas.DataFrame: The same DataFrame with the calculated columns added
+    """
+    # Calculate daily returns
+    if 'Daily_Return' not in data.columns:
+        data['Daily_Return'] = data['Close'].pct_change()
+    
+    # Calculate moving averages
+    if 'MA_20' not in data.columns:
+        data['MA_20'] = data['Close'].rolling(window=20).mean()
+    
+    if 'MA_50' not in data.columns:
+        data['MA_50'] = data['Close'].rolling(window=50).mean()
+    
+    # Calculate volatility (20-day standard deviation)
+    if 'Volatility_20d' not in data.columns:
+        data['Volatility_20d'] = data['Daily_Return'].rolling(window=20).std()
+    
+    # Extra indicators, computed together
+    if indicators:
+        missing = [name for name in indicators
+                   if name not in indicator_pack.INDICATORS
+                   or not all(column in data.columns for column in indicator_pack.INDICATORS[name][1])]
+        for column, values in indicator_pack.compute_indicators(data, missing).items():
+            data[column] = values
+    
+    return data
+
+def extend_technical_indicators(tail, new_data):
+    """
+    Calculate the standard calculated columns for newly appended rows
+    
+    Only the last INDICATOR_LOOKBACK rows before the new ones are needed, so the
+    cost depends on the number of new rows rather than on the full history.
+    
+    Parameters:
+    tail (pandas.DataFrame): Rows immediately before new_data, with a Close column
+                             (at least INDICATOR_LOOKBACK rows when available)
+    new_data (pandas.DataFrame): New rows with a Close column
+    
+    Returns:
+    pandas.DataFrame: new_data with the calculated columns set as if calculated over
+                      the full history
+    """
+    tail = tail.tail(INDICATOR_LOOKBACK)
+    combined = pd.DataFrame({'Close': np.concatenate([
+        tail['Close'].to_numpy(dtype=float),
+        new_data['Close'].to_numpy(dtype=float)
+    ])})
+    combined = add_technical_indicators(combined)
+    
+    new_data = new_data.copy()
+    for column in ['Daily_Return', 'MA_20', 'MA_50', 'Volatility_20d']:
+        new_data[column] = combined[column].to_numpy()[len(tail):]
+    return new_data
+
+def compute_data_fingerprint(data):
+    """
+    Compute a content fingerprint of a DataFrame
+    
+    Two frames with the same columns, dtypes and values get the same fingerprint,
+    regardless of their index.
+    
+    Parameters:
+    data (pandas.DataFrame): The data to fingerprint
+    
+    Returns:
+    str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in data.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
 def load_sample_data():
     """
     Load sample financial data for demonstration purposes
@@ -177,6 +473,7 @@ def load_sample_data():
     except Exception as e:
         raise Exception(f"Failed to load sample data: {str(e)}")
 
+@profiling.traced('financial_data.compute_financial_metrics')
 def compute_financial_metrics(data):
     """
     Compute metrics from the data - handles both financial and generic data
@@ -195,6 +492,11 @@ def compute_financial_metrics(data):
     # Check if it's financial data by looking for expected columns
     is_financial_data = all(col in data.columns for col in ['Close', 'High', 'Low', 'Volume'])
     
+    # Bar interval, so period lookbacks count the right number of rows
+    interval = resampling.get_interval(data)
+    metrics['interval'] = interval
+    bars_per_day = resampling.bars_per_day(interval)
+    
     # Common metrics for any dataset
     metrics['num_records'] = len(data)
     metrics['num_columns'] = len(data.columns)
@@ -214,16 +516,19 @@ def compute_financial_metrics(data):
         metrics['price_change_pct_1d'] = (metrics['price_change_1d'] / data['Close'].iloc[-2]) * 100 if len(data) > 1 else 0
         
         # Period changes
-        if len(data) >= 5:  # 1 week (5 trading days)
-            metrics['price_change_1w'] = data['Close'].iloc[-1] - data['Close'].iloc[-5]
-            metrics['price_change_pct_1w'] = (metrics['price_change_1w'] / data['Close'].iloc[-5]) * 100
+        week_rows = max(2, int(round(5 * bars_per_day)))
+        if len(data) >= week_rows:  # 1 week (5 trading days)
+            metrics['price_change_1w'] = data['Close'].iloc[-1] - data['Close'].iloc[-week_rows]
+            metrics['price_change_pct_1w'] = (metrics['price_change_1w'] / data['Close'].iloc[-week_rows]) * 100
         
-        if len(data) >= 21:  # 1 month (21 trading days)
-            metrics['price_change_1m'] = data['Close'].iloc[-1] - data['Close'].iloc[-21]
-            metrics['price_change_pct_1m'] = (metrics['price_change_1m'] / data['Close'].iloc[-21]) * 100
+        month_rows = max(2, int(round(21 * bars_per_day)))
+        if len(data) >= month_rows:  # 1 month (21 trading days)
+            metrics['price_change_1m'] = data['Close'].iloc[-1] - data['Close'].iloc[-month_rows]
+            metrics['price_change_pct_1m'] = (metrics['price_change_1m'] / data['Close'].iloc[-month_rows]) * 100
         
-        # Volatility
+        # Volatility (of returns per bar, and scaled to a trading day for comparing intervals)
         metrics['volatility_20d'] = data['Volatility_20d'].iloc[-1] * 100 if 'Volatility_20d' in data.columns and not pd.isna(data['Volatility_20d'].iloc[-1]) else None
+        metrics['volatility_daily'] = metrics['volatility_20d'] * np.sqrt(bars_per_day) if metrics['volatility_20d'] is not None else None
         
         # Trading volume
         metrics['avg_volume_20d'] = data['Volume'].rolling(window=20).mean().iloc[-1] if len(data) >= 20 else None
@@ -243,6 +548,9 @@ def compute_financial_metrics(data):
             if metrics.get('ma_20') and metrics.get('ma_50'):
                 metrics['ma_20_50_diff'] = metrics['ma_20'] - metrics['ma_50']
                 metrics['ma_20_50_diff_pct'] = (metrics['ma_20_50_diff'] / metrics['ma_50']) * 100
+        
+        # Extra indicators the data has columns for (see add_technical_indicators)
+        metrics.update(indicator_pack.summarize_indicators(data))
     else:
         # Generic data metrics
         # Find numerical columns
@@ -283,3 +591,274 @@ def compute_financial_metrics(data):
             metrics[f'{col}_top_values'] = top_values
     
     return metrics
+
+@profiling.traced('financial_data.compute_window_metrics')
+def compute_window_metrics(data, period='3mo', span=1):
+    """
+    Compute narrative metrics for every window of calendar periods in one pass
+    
+    Windows cover span consecutive periods and advance one period at a time (span=1
+    gives one window per month, quarter or year; span=4 with '3mo' gives trailing
+    years at every quarter end). Window highs, lows, averages and volatility are
+    O(1) range_index queries, and end-of-window values (moving averages, 20-day
+    volatility and volume) come from the precalculated columns, so no window is
+    sliced or rescanned.
+    
+    The values match compute_financial_metrics and detect_key_events on each
+    window's rows.
+    
+    Parameters:
+    data (pandas.DataFrame): Stock data in chronological order with Date, Close, High,
+                             Low and Volume columns (calculated columns optional)
+    period (str): Period length: '1wk', '1mo', '3mo' or '1y'
+    span (int): Number of periods per window
+    
+    Returns:
+    dict: Arrays with one entry per window: start and end (row positions, end
+          exclusive), start_date, end_date, first_price, last_price, price_change_pct,
+          high_price, high_date, low_price, low_date, avg_volume (whole window),
+          return_volatility (% per bar, whole window), latest_volume, avg_volume_20d,
+          volume_change_pct, ma_20, ma_50, volatility_20d and volatility_daily
+          (NaN where compute_financial_metrics would give None); plus 'interval'
+    """
+    try:
+        num_rows = len(data)
+        interval = resampling.get_interval(data)
+        period_starts = resampling.bucket_starts(data['Date'], period)
+        period_ends = np.append(period_starts[1:], num_rows)
+        num_windows = max(0, len(period_starts) - span + 1)
+        
+        # Row range of each window
+        start = period_starts[:num_windows]
+        end = period_ends[span - 1:]
+        last = end - 1
+        
+        dates = data['Date'].to_numpy()
+        close = data['Close'].to_numpy(dtype=np.float64)
+        volume = data['Volume'].to_numpy(dtype=np.float64)
+        
+        windows = {
+            'interval': interval,
+            'start': start,
+            'end': end,
+            'start_date': dates[start],
+            'end_date': dates[last],
+            'first_price': close[start],
+            'last_price': close[last]
+        }
+        windows['price_change_pct'] = (windows['last_price'] - windows['first_price']) / windows['first_price'] * 100
+        
+        # Window extremes, averages and return volatility from the range index
+        index = range_index.build_range_index(data)
+        summary = range_index.query_range(index, start, end)
+        for key in ('high_price', 'high_date', 'low_price', 'low_date', 'avg_volume'):
+            windows[key] = summary[key]
+        windows['return_volatility'] = summary['volatility']
+        
+        # Values at the end of each window, as compute_financial_metrics reads them
+        window_length = end - start
+        volume_sums = index['volume_sums']
+        windows['latest_volume'] = volume[last]
+        windows['avg_volume_20d'] = np.where(window_length >= 20, (volume_sums[end] - volume_sums[np.maximum(end - 20, 0)]) / 20, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            windows['volume_change_pct'] = np.where(windows['avg_volume_20d'] > 0, (windows['latest_volume'] / windows['avg_volume_20d'] - 1) * 100, np.nan)
+        for key, column in (('ma_20', 'MA_20'), ('ma_50', 'MA_50'), ('volatility_20d', 'Volatility_20d')):
+            windows[key] = data[column].to_numpy(dtype=np.float64)[last] if column in data.columns else np.full(num_windows, np.nan)
+        windows['volatility_20d'] = windows['volatility_20d'] * 100
+        windows['volatility_daily'] = windows['volatility_20d'] * np.sqrt(resampling.bars_per_day(interval))
+        
+        return windows
+    
+    except Exception as e:
+        raise Exception(f"Failed to compute window metrics: {str(e)}")
+
+@profiling.traced('financial_data.detect_key_events')
+def detect_key_events(data, change_threshold=0.05, top_n=None):
+    """
+    Detect key events in price data (extremes and large daily moves) using vectorized NumPy operations
+    
+    Parameters:
+    data (pandas.DataFrame): DataFrame with Date and High/Low/Volume columns (Daily_Return optional)
+    change_threshold (float): Absolute daily return above which a move is significant (0.05 = 5%)
+    top_n (int): Keep only the N largest significant moves (None keeps all, 0 skips them)
+    
+    Returns:
+    dict: Columnar key events
+        'extremes' (dict): 'highest_price', 'lowest_price' and 'highest_volume', each with
+                           'position', 'date' and 'value'
+        'changes' (dict): 'position', 'date' and 'value' arrays of significant daily moves
+                          (value in percent), in chronological order
+    """
+    events = {
+        'extremes': {},
+        'changes': {
+            'position': np.empty(0, dtype=np.int64),
+            'date': np.empty(0, dtype='datetime64[ns]'),
+            'value': np.empty(0, dtype=np.float64)
+        }
+    }
+    
+    if len(data) == 0:
+        return events
+    
+    dates = data['Date'].to_numpy()
+    
+    # Stack the extreme-seeking columns so one argmax finds all extremes (lows are negated)
+    extreme_columns = [
+        (name, col, sign) for name, col, sign in [
+            ('highest_price', 'High', 1.0),
+            ('lowest_price', 'Low', -1.0),
+            ('highest_volume', 'Volume', 1.0)
+        ] if col in data.columns
+    ]
+    if extreme_columns:
+        stacked = np.vstack([data[col].to_numpy(dtype=np.float64) * sign for _, col, sign in extreme_columns])
+        stacked = np.where(np.isnan(stacked), -np.inf, stacked)
+        positions = stacked.argmax(axis=1)
+        
+        for row, ((name, col, _), position) in enumerate(zip(extreme_columns, positions)):
+            if np.isneginf(stacked[row, position]):
+                continue  # Column is entirely missing
+            events['extremes'][name] = {
+                'position': int(position),
+                'date': data['Date'].iat[position],
+                'value': data[col].iat[position]
+            }
+    
+    # Significant daily moves beyond the threshold
+    if 'Daily_Return' in data.columns and top_n != 0:
+        returns = data['Daily_Return'].to_numpy(dtype=np.float64)
+        magnitudes = np.abs(returns)
+        positions = np.flatnonzero(magnitudes > change_threshold)
+        
+        if top_n is not None and len(positions) > top_n:
+            # Keep the largest moves, then restore chronological order
+            largest = np.argpartition(magnitudes[positions], -top_n)[-top_n:]
+            positions = np.sort(positions[largest])
+        
+        events['changes'] = {
+            'position': positions,
+            'date': dates[positions],
+            'value': returns[positions] * 100
+        }
+    
+    return events
+
+@profiling.traced('financial_data.build_peer_panel')
+def build_peer_panel(peer_data, columns=('Close', 'High', 'Low', 'Volume')):
+    """
+    Align long-format peer price data into date x symbol arrays
+    
+    Every row is scattered into place in one vectorized assignment per column;
+    dates a symbol has no bar for are left as NaN.
+    
+    Parameters:
+    peer_data (pandas.DataFrame): Long-format data with Date and Symbol columns
+                                  (fetch_peer_data output, or concatenated fetch_stock_data frames)
+    columns (tuple): Price columns to align
+    
+    Returns:
+    dict: 'dates' (DatetimeIndex of the union of dates), 'symbols' (list, in order of
+          first appearance), 'interval' and one (dates x symbols) float array per column
+    """
+    date_codes, dates = pd.factorize(peer_data['Date'], sort=True)
+    symbol_codes, symbols = pd.factorize(peer_data['Symbol'])
+    
+    panel = {
+        'dates': pd.DatetimeIndex(dates),
+        'symbols': [str(symbol) for symbol in symbols],
+        'interval': resampling.get_interval(peer_data) if len(peer_data) else '1d'
+    }
+    for column in columns:
+        if column not in peer_data.columns:
+            continue
+        values = np.full((len(dates), len(symbols)), np.nan)
+        values[date_codes, symbol_codes] = peer_data[column].to_numpy(dtype=np.float64)
+        panel[column] = values
+    return panel
+
+@profiling.traced('financial_data.compute_peer_metrics')
+def compute_peer_metrics(panel):
+    """
+    Compute return, volatility, drawdown and rankings for every symbol of a peer panel at once
+    
+    All metrics are computed column-wise over the aligned arrays, so the cost grows
+    with the panel size rather than with per-ticker overhead. Symbols missing
+    some dates are measured over the bars they have.
+    
+    Parameters:
+    panel (dict): Aligned panel from build_peer_panel
+    
+    Returns:
+    dict: Per-symbol arrays aligned with 'symbols': first_price, last_price,
+          total_return (%), volatility (annualized %), max_drawdown (%, negative),
+          avg_volume, return_rank, volatility_rank and drawdown_rank (1 = best:
+          highest return, lowest volatility, shallowest drawdown); plus
+          'group' (median/mean statistics) and the covered 'start_date' and 'end_date'
+    """
+    close = panel['Close']
+    num_bars, num_symbols = close.shape
+    columns = np.arange(num_symbols)
+    valid = ~np.isnan(close)
+    has_data = valid.any(axis=0)
+    
+    # First and last available close per symbol
+    first = valid.argmax(axis=0)
+    last = num_bars - 1 - valid[::-1].argmax(axis=0)
+    first_price = np.where(has_data, close[first, columns], np.nan)
+    last_price = np.where(has_data, close[last, columns], np.nan)
+    total_return = (last_price / first_price - 1) * 100
+    
+    # Carry each symbol's last close over its gaps so returns span missing bars
+    carried = np.where(valid, np.arange(num_bars)[:, None], 0)
+    np.maximum.accumulate(carried, axis=0, out=carried)
+    filled = close[carried, columns]
+    returns = filled[1:] / filled[:-1] - 1
+    returns[~valid[1:] | (np.arange(1, num_bars)[:, None] <= first)] = np.nan
+    
+    # Drawdown from the running peak (fmax skips the NaNs before a symbol's first bar)
+    running_peak = np.fmax.accumulate(close, axis=0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(resampling.bars_per_year(panel.get('interval', '1d'))) * 100
+        max_drawdown = np.nanmin(close / running_peak - 1, axis=0) * 100
+        avg_volume = np.nanmean(panel['Volume'], axis=0) if 'Volume' in panel else np.full(num_symbols, np.nan)
+    
+    metrics = {
+        'symbols': list(panel['symbols']),
+        'start_date': panel['dates'][0].strftime('%Y-%m-%d') if num_bars else None,
+        'end_date': panel['dates'][-1].strftime('%Y-%m-%d') if num_bars else None,
+        'first_price': first_price,
+        'last_price': last_price,
+        'total_return': total_return,
+        'volatility': volatility,
+        'max_drawdown': max_drawdown,
+        'avg_volume': avg_volume,
+        'return_rank': _rank(total_return, descending=True),
+        'volatility_rank': _rank(volatility, descending=False),
+        'drawdown_rank': _rank(max_drawdown, descending=True)
+    }
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        metrics['group'] = {
+            'count': int(has_data.sum()),
+            'median_return': float(np.nanmedian(total_return)),
+            'mean_return': float(np.nanmean(total_return)),
+            'median_volatility': float(np.nanmedian(volatility)),
+            'median_drawdown': float(np.nanmedian(max_drawdown))
+        }
+    return metrics
+
+def _rank(values, descending=False):
+    """1-based ranks of values (ties share the best rank), NaN values ranked last"""
+    keys = -values if descending else values
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    # Ties take the position of their first occurrence
+    first_of_run = np.searchsorted(sorted_keys, sorted_keys, side='left')
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = first_of_run + 1
+    return ranks
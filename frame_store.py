@@ -0,0 +1,151 @@
+import os
+import time
+import weakref
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from financial_data import compute_data_fingerprint
+
+# Unreferenced frames are kept (for sessions that come back to them) up to this size
+CACHE_BUDGET_BYTES = int(float(os.environ.get("FRAME_STORE_CACHE_MB", 256)) * 2**20)
+
+# Request aliases (e.g. ticker and date range) older than this are looked up again
+ALIAS_TTL_SECONDS = float(os.environ.get("FRAME_STORE_ALIAS_TTL_SECONDS", 900))
+
+# fingerprint -> {'columns', 'attrs', 'bytes', 'refs'}, least recently used first
+_frames = OrderedDict()
+
+# id of each handed-out view -> fingerprint of the frame it shares
+_views = {}
+
+# request key -> (fingerprint, time registered)
+_aliases = {}
+
+_lock = threading.RLock()
+
+def share(data):
+    """
+    Get a shared read-only view of a frame, storing its buffers once per distinct content
+
+    Frames with the same fingerprint (see compute_data_fingerprint) share one set of
+    immutable column buffers; each call returns a new lightweight DataFrame over them.
+    The shared buffers are released when no view references them any more.
+
+    The buffers are read-only, so writing into a view's existing columns raises;
+    adding columns to a view is fine. Use writable() for a private, editable copy.
+
+    Parameters:
+    data (pandas.DataFrame): Frame to share
+
+    Returns:
+    pandas.DataFrame: Read-only view over the shared buffers
+    """
+    if data is None or is_shared(data):
+        return data
+
+    fingerprint = compute_data_fingerprint(data)
+    with _lock:
+        if fingerprint not in _frames:
+            columns = {column: _freeze(data[column]) for column in data.columns}
+            _frames[fingerprint] = {
+                'columns': columns,
+                'attrs': dict(data.attrs),
+                'bytes': int(data.memory_usage(index=False, deep=True).sum()),
+                'refs': 0
+            }
+        return _acquire(fingerprint)
+
+def get_or_load(key, loader):
+    """
+    Get a shared view for a request, loading it only if no session has it already
+
+    Parameters:
+    key (tuple): Request key, e.g. ('stock', ticker, start_date, end_date)
+    loader (callable): Function returning the frame when it is not stored
+
+    Returns:
+    pandas.DataFrame: Read-only view over the shared buffers
+    """
+    with _lock:
+        alias = _aliases.get(key)
+        if alias is not None:
+            fingerprint, registered_at = alias
+            if fingerprint in _frames and time.time() - registered_at <= ALIAS_TTL_SECONDS:
+                return _acquire(fingerprint)
+            del _aliases[key]
+
+    # Load outside the lock so other sessions are not blocked by a slow download
+    view = share(loader())
+    if view is not None:
+        with _lock:
+            fingerprint = _views.get(id(view))
+            if fingerprint is not None:
+                _aliases[key] = (fingerprint, time.time())
+    return view
+
+def writable(data):
+    """Get a private, editable copy of a (possibly shared) frame"""
+    return data.copy(deep=True)
+
+def is_shared(data):
+    """Check whether a frame is a view handed out by this store"""
+    return id(data) in _views
+
+def get_stats():
+    """
+    Report shared frames and the memory they hold
+
+    Returns:
+    dict: frames (count), bytes, referenced_bytes, views (live views) and aliases
+    """
+    with _lock:
+        return {
+            'frames': len(_frames),
+            'bytes': sum(frame['bytes'] for frame in _frames.values()),
+            'referenced_bytes': sum(frame['bytes'] for frame in _frames.values() if frame['refs'] > 0),
+            'views': sum(frame['refs'] for frame in _frames.values()),
+            'aliases': len(_aliases)
+        }
+
+def _freeze(series):
+    """Copy a column into a buffer that cannot be written in place"""
+    if isinstance(series.dtype, np.dtype):
+        values = np.array(series.to_numpy(), copy=True)
+        values.flags.writeable = False
+        return values
+    # Extension arrays (strings, categoricals, ...) are copied once and only ever read
+    return series.array.copy()
+
+def _acquire(fingerprint):
+    """Build a new view over a stored frame and count the reference"""
+    frame = _frames[fingerprint]
+    view = pd.DataFrame(frame['columns'], copy=False)
+    view.attrs.update(frame['attrs'])
+    frame['refs'] += 1
+    _frames.move_to_end(fingerprint)
+    _views[id(view)] = fingerprint
+    weakref.finalize(view, _release, id(view), fingerprint)
+    return view
+
+def _release(view_id, fingerprint):
+    """Drop a view's reference once the view is garbage collected"""
+    with _lock:
+        _views.pop(view_id, None)
+        frame = _frames.get(fingerprint)
+        if frame is not None:
+            frame['refs'] -= 1
+            _evict_unreferenced()
+
+def _evict_unreferenced():
+    """Drop least recently used unreferenced frames until they fit the cache budget"""
+    unreferenced = sum(frame['bytes'] for frame in _frames.values() if frame['refs'] == 0)
+    for fingerprint, frame in list(_frames.items()):
+        if unreferenced <= CACHE_BUDGET_BYTES:
+            break
+        if frame['refs'] == 0:
+            del _frames[fingerprint]
+            unreferenced -= frame['bytes']
+    for key, (fingerprint, _) in list(_aliases.items()):
+        if fingerprint not in _frames:
+            del _aliases[key]
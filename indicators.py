@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Indicator parameters, in bars of the data's interval
+WILDER_PERIOD = 14          # RSI and ATR (both use Wilder smoothing)
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_WINDOW = 20
+BOLLINGER_STD = 2.0
+
+# Indicator name -> (label, columns it adds)
+INDICATORS = {
+    'rsi': ('Relative Strength Index', (f'RSI_{WILDER_PERIOD}',)),
+    'macd': ('MACD', ('MACD', 'MACD_Signal', 'MACD_Hist')),
+    'bollinger': ('Bollinger Bands', ('BB_Upper', 'BB_Middle', 'BB_Lower')),
+    'atr': ('Average True Range', (f'ATR_{WILDER_PERIOD}',)),
+    'drawdown': ('Drawdown', ('Drawdown',)),
+    'obv': ('On-Balance Volume', ('OBV',))
+}
+
+# Input columns each indicator needs besides Close
+REQUIRED_COLUMNS = {'atr': ('High', 'Low'), 'obv': ('Volume',)}
+
+def available_indicators(data):
+    """List the indicators that can be computed from a frame's columns"""
+    return [name for name in INDICATORS if all(column in data.columns for column in REQUIRED_COLUMNS.get(name, ()))]
+
+def compute_indicators(data, names=None):
+    """
+    Compute technical indicators together, sharing their intermediate results
+
+    The price change feeds both RSI and OBV, the true range is computed once for
+    ATR, RSI's average gain and loss and ATR's average true range are smoothed in
+    one Wilder (exponential) pass over the stacked columns, Bollinger bands take
+    the mean and standard deviation from one rolling window (reusing MA_20 when
+    the frame has it), and drawdown comes from one running maximum.
+
+    Parameters:
+    data (pandas.DataFrame): Price data in chronological order with a Close column
+                             (High and Low for ATR, Volume for OBV)
+    names (list): Indicator names from INDICATORS (defaults to every available one)
+
+    Returns:
+    dict: Column name -> numpy array aligned with the rows of data
+    """
+    try:
+        names = available_indicators(data) if names is None else list(names)
+        unknown = [name for name in names if name not in INDICATORS]
+        if unknown:
+            raise Exception(f"Unknown indicators: {', '.join(unknown)}")
+        missing = [name for name in names if not all(column in data.columns for column in REQUIRED_COLUMNS.get(name, ()))]
+        if missing:
+            raise Exception(f"Missing price columns for: {', '.join(missing)}")
+
+        close = pd.Series(data['Close'].to_numpy(dtype=np.float64))
+        results = {}
+
+        # Shared intermediates
+        change = close.diff() if 'rsi' in names or 'obv' in names else None
+
+        wilder_inputs = {}
+        if 'rsi' in names:
+            wilder_inputs['gain'] = change.clip(lower=0)
+            wilder_inputs['loss'] = -change.clip(upper=0)
+        if 'atr' in names:
+            high = data['High'].to_numpy(dtype=np.float64)
+            low = data['Low'].to_numpy(dtype=np.float64)
+            previous_close = close.shift().to_numpy()
+            true_range = np.fmax(high, previous_close) - np.fmin(low, previous_close)
+            wilder_inputs['true_range'] = true_range
+
+        # RSI and ATR: one Wilder smoothing pass over all their inputs
+        if wilder_inputs:
+            smoothed = pd.DataFrame(wilder_inputs).ewm(alpha=1 / WILDER_PERIOD, adjust=False,
+                                                       min_periods=WILDER_PERIOD).mean()
+            if 'rsi' in names:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    strength = smoothed['gain'].to_numpy() / smoothed['loss'].to_numpy()
+                results[f'RSI_{WILDER_PERIOD}'] = 100 - 100 / (1 + strength)
+            if 'atr' in names:
+                results[f'ATR_{WILDER_PERIOD}'] = smoothed['true_range'].to_numpy()
+
+        if 'macd' in names:
+            fast = close.ewm(span=MACD_FAST, adjust=False, min_periods=MACD_FAST).mean()
+            slow = close.ewm(span=MACD_SLOW, adjust=False, min_periods=MACD_SLOW).mean()
+            macd = fast - slow
+            signal = macd.ewm(span=MACD_SIGNAL, adjust=False, min_periods=MACD_SIGNAL).mean()
+            results['MACD'] = macd.to_numpy()
+            results['MACD_Signal'] = signal.to_numpy()
+            results['MACD_Hist'] = (macd - signal).to_numpy()
+
+        if 'bollinger' in names:
+            window = close.rolling(window=BOLLINGER_WINDOW)
+            if BOLLINGER_WINDOW == 20 and 'MA_20' in data.columns:
+                middle = data['MA_20'].to_numpy(dtype=np.float64)
+            else:
+                middle = window.mean().to_numpy()
+            spread = BOLLINGER_STD * window.std(ddof=0).to_numpy()
+            results['BB_Upper'] = middle + spread
+            results['BB_Middle'] = middle
+            results['BB_Lower'] = middle - spread
+
+        if 'drawdown' in names:
+            peak = np.fmax.accumulate(close.to_numpy())
+            results['Drawdown'] = (close.to_numpy() / peak - 1) * 100
+
+        if 'obv' in names:
+            volume = data['Volume'].to_numpy(dtype=np.float64)
+            direction = np.sign(change.to_numpy())
+            results['OBV'] = np.cumsum(np.nan_to_num(direction * volume))
+
+        return results
+
+    except Exception as e:
+        raise Exception(f"Failed to compute indicators: {str(e)}")
+
+def summarize_indicators(data, names=None):
+    """
+    Latest indicator values for narratives, metrics and claim checks
+
+    Indicators whose columns the frame already has are read from them; others are
+    computed with compute_indicators.
+
+    Parameters:
+    data (pandas.DataFrame): Price data
+    names (list): Indicator names (defaults to those whose columns the frame has)
+
+    Returns:
+    dict: Any of rsi, macd, macd_signal, macd_hist, bb_upper, bb_middle, bb_lower,
+          atr, atr_pct (ATR as % of the last close), max_drawdown (%, worst over the
+          data), drawdown (% below the peak at the last bar), obv and obv_change
+          (over the data); None where there are too few bars
+    """
+    if names is None:
+        names = [name for name, (_, columns) in INDICATORS.items() if all(column in data.columns for column in columns)]
+    if len(data) == 0 or not names:
+        return {}
+
+    present = [name for name in names if all(column in data.columns for column in INDICATORS[name][1])]
+    columns = {column: data[column].to_numpy(dtype=np.float64) for name in present for column in INDICATORS[name][1]}
+    columns.update(compute_indicators(data, [name for name in names if name not in present]))
+
+    def latest(column):
+        value = columns[column][-1]
+        return None if np.isnan(value) else float(value)
+
+    summary = {}
+    if 'rsi' in names:
+        summary['rsi'] = latest(f'RSI_{WILDER_PERIOD}')
+    if 'macd' in names:
+        summary['macd'] = latest('MACD')
+        summary['macd_signal'] = latest('MACD_Signal')
+        summary['macd_hist'] = latest('MACD_Hist')
+    if 'bollinger' in names:
+        summary['bb_upper'] = latest('BB_Upper')
+        summary['bb_middle'] = latest('BB_Middle')
+        summary['bb_lower'] = latest('BB_Lower')
+    if 'atr' in names:
+        summary['atr'] = latest(f'ATR_{WILDER_PERIOD}')
+        last_close = float(data['Close'].iloc[-1])
+        summary['atr_pct'] = summary['atr'] / last_close * 100 if summary['atr'] is not None and last_close else None
+    if 'drawdown' in names:
+        summary['max_drawdown'] = float(np.nanmin(columns['Drawdown'])) if not np.all(np.isnan(columns['Drawdown'])) else None
+        summary['drawdown'] = latest('Drawdown')
+    if 'obv' in names:
+        summary['obv'] = latest('OBV')
+        summary['obv_change'] = float(columns['OBV'][-1] - columns['OBV'][0])
+    return summary
@@ -10,7 +10,10 @@ from sklearn.metrics.pairwise import cosine_similarity
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
 from nltk.sentiment import SentimentIntensityAnalyzer
-from financial_data import compute_financial_metrics
+from financial_data import compute_financial_metrics, compute_window_metrics, detect_key_events, build_peer_panel, compute_peer_metrics
+from resampling import is_intraday, describe_interval, window_label
+from indicators import summarize_indicators, WILDER_PERIOD
+import profiling
 
 # Download required NLTK packages if needed
 try:
@@ -28,8 +31,9 @@ try:
 except LookupError:
     nltk.download('vader_lexicon')
 
+@profiling.traced('narrative_generator.generate_financial_narrative')
 def generate_financial_narrative(financial_data, market_data=None, narrative_type="Quarterly Report", 
-                               depth_level=3, target_audience="Investors"):
+                               depth_level=3, target_audience="Investors", indicators=None):
     """
     Generate a financial narrative based on stock data and market data using a rule-based approach
     
@@ -39,6 +43,8 @@ def generate_financial_narrative(financial_data, market_data=None, narrative_typ
     narrative_type (str): Type of narrative to generate
     depth_level (int): Level of detail in the analysis (1-5)
     target_audience (str): Target audience for the narrative
+    indicators (list): Extra indicators to discuss, by name from indicators.INDICATORS
+                       (defaults to those the data already has columns for)
     
     Returns:
     str: Generated financial narrative
@@ -52,19 +58,83 @@ def generate_financial_narrative(financial_data, market_data=None, narrative_typ
         if market_data is not None and len(market_data) > 0:
             market_metrics = compute_financial_metrics(market_data)
         
+        # Initialize sentiment analyzer
+        sia = SentimentIntensityAnalyzer()
+        
+        # Find key dates
+        extremes = detect_key_events(financial_data, top_n=0)['extremes']
+        
+        facts = {
+            'symbol': financial_data['Symbol'].iloc[0] if 'Symbol' in financial_data.columns else "Unknown",
+            'start_date': financial_data['Date'].min(),
+            'end_date': financial_data['Date'].max(),
+            'interval': metrics.get('interval', '1d'),
+            'first_price': financial_data['Close'].iloc[0],
+            'last_price': financial_data['Close'].iloc[-1],
+            'volatility': metrics.get('volatility_20d', 0),
+            'daily_volatility': metrics.get('volatility_daily'),
+            'high_date': extremes['highest_price']['date'],
+            'high_price': extremes['highest_price']['value'],
+            'low_date': extremes['lowest_price']['date'],
+            'low_price': extremes['lowest_price']['value'],
+            'avg_volume': metrics.get('avg_volume_20d', 0),
+            'latest_volume': metrics.get('latest_volume', 0),
+            'volume_change': metrics.get('volume_change_pct', 0),
+            'ma_20': metrics.get('ma_20', None),
+            'ma_50': metrics.get('ma_50', None),
+            'market_change_pct': None,
+            'indicators': summarize_indicators(financial_data, indicators)
+        }
+        
+        # Market performance over the period
+        if market_metrics:
+            market_first_price = market_data['Close'].iloc[0]
+            market_last_price = market_data['Close'].iloc[-1]
+            facts['market_change_pct'] = ((market_last_price - market_first_price) / market_first_price) * 100
+        
+        return render_financial_narrative(facts, narrative_type, depth_level, target_audience)
+    
+    except Exception as e:
+        raise Exception(f"Failed to generate financial narrative: {str(e)}")
+
+def render_financial_narrative(facts, narrative_type="Quarterly Report", depth_level=3, target_audience="Investors"):
+    """
+    Render a financial narrative from precomputed facts
+    
+    generate_financial_narrative derives the facts from a whole frame and
+    generate_narrative_series from each window of a history; both share this template.
+    
+    Parameters:
+    facts (dict): symbol, start_date, end_date, interval, first_price, last_price,
+                  volatility (20-day, %), daily_volatility, high_date, high_price, low_date,
+                  low_price, avg_volume (20-day), latest_volume, volume_change (%), ma_20,
+                  ma_50 and market_change_pct (None without market data); optionally
+                  indicators (from indicators.summarize_indicators)
+    narrative_type (str): Type of narrative to generate
+    depth_level (int): Level of detail in the analysis (1-5)
+    target_audience (str): Target audience for the narrative
+    
+    Returns:
+    str: Generated financial narrative
+    """
+    try:
         # Get stock information
-        symbol = financial_data['Symbol'].iloc[0] if 'Symbol' in financial_data.columns else "Unknown"
+        symbol = facts['symbol']
         
         # Determine date range
-        start_date = financial_data['Date'].min().strftime('%Y-%m-%d')
-        end_date = financial_data['Date'].max().strftime('%Y-%m-%d')
+        start_date = facts['start_date'].strftime('%Y-%m-%d')
+        end_date = facts['end_date'].strftime('%Y-%m-%d')
         
-        # Initialize sentiment analyzer
-        sia = SentimentIntensityAnalyzer()
+        # Describe windows and timestamps in the units of the bar interval
+        interval = facts['interval']
+        date_format = '%Y-%m-%d %H:%M' if is_intraday(interval) else '%Y-%m-%d'
+        bars_note = f" ({describe_interval(interval)} bars)" if interval != '1d' else ""
+        ma_short = window_label(20, interval)
+        ma_long = window_label(50, interval)
         
         # Analyze price trend
-        first_price = financial_data['Close'].iloc[0]
-        last_price = financial_data['Close'].iloc[-1]
+        first_price = facts['first_price']
+        last_price = facts['last_price']
         price_change = last_price - first_price
         price_change_pct = (price_change / first_price) * 100
         
@@ -86,42 +156,43 @@ def generate_financial_narrative(financial_data, market_data=None, narrative_typ
             sentiment = "very negative"
         
         # Calculate volatility
-        volatility = metrics.get('volatility_20d', 0)
-        if volatility > 3:
+        # (thresholds apply to daily volatility, so intraday data is scaled to a day)
+        volatility = facts['volatility']
+        daily_volatility = facts['daily_volatility'] if facts['daily_volatility'] is not None else volatility
+        # (windows shorter than 20 bars have no 20-bar volatility or volume average)
+        daily_volatility = daily_volatility or 0
+        if daily_volatility > 3:
             volatility_desc = "highly volatile"
-        elif volatility > 1.5:
+        elif daily_volatility > 1.5:
             volatility_desc = "moderately volatile"
         else:
             volatility_desc = "showing low volatility"
             
-        # Find key dates
-        high_date = financial_data.loc[financial_data['High'].idxmax(), 'Date'].strftime('%Y-%m-%d')
-        high_price = financial_data['High'].max()
-        low_date = financial_data.loc[financial_data['Low'].idxmin(), 'Date'].strftime('%Y-%m-%d')
-        low_price = financial_data['Low'].min()
+        # Key dates
+        high_date = facts['high_date'].strftime(date_format)
+        high_price = facts['high_price']
+        low_date = facts['low_date'].strftime(date_format)
+        low_price = facts['low_price']
         
         # Get volume information
-        avg_volume = metrics.get('avg_volume_20d', 0)
-        latest_volume = metrics.get('latest_volume', 0)
-        volume_change = metrics.get('volume_change_pct', 0)
+        avg_volume = facts['avg_volume']
+        latest_volume = facts['latest_volume']
+        volume_change = facts['volume_change']
         
         # Analyze moving averages
-        ma_20 = metrics.get('ma_20', None)
-        ma_50 = metrics.get('ma_50', None)
+        ma_20 = facts['ma_20']
+        ma_50 = facts['ma_50']
         ma_relation = ""
         if ma_20 and ma_50:
             if ma_20 > ma_50:
-                ma_relation = "The 20-day moving average is above the 50-day moving average, suggesting a potential bullish trend."
+                ma_relation = f"The {ma_short} moving average is above the {ma_long} moving average, suggesting a potential bullish trend."
             else:
-                ma_relation = "The 20-day moving average is below the 50-day moving average, indicating a potential bearish trend."
+                ma_relation = f"The {ma_short} moving average is below the {ma_long} moving average, indicating a potential bearish trend."
         
         # Market comparison
         market_comparison = ""
-        if market_metrics:
-            market_first_price = market_data['Close'].iloc[0]
-            market_last_price = market_data['Close'].iloc[-1]
-            market_change_pct = ((market_last_price - market_first_price) / market_first_price) * 100
-            
+        market_change_pct = facts['market_change_pct']
+        if market_change_pct is not None:
             if price_change_pct > market_change_pct + 5:
                 market_comparison = f"{symbol} has significantly outperformed the broader market (S&P 500) during this period. While the S&P 500 changed by {market_change_pct:.2f}%, {symbol} showed a {price_change_pct:.2f}% change."
             elif price_change_pct > market_change_pct:
@@ -146,26 +217,76 @@ def generate_financial_narrative(financial_data, market_data=None, narrative_typ
         # Define sections based on depth level
         executive_summary = f"""## Executive Summary
 
-During the period from {start_date} to {end_date}, {symbol} has shown a {trend_description} trend with a price change of {price_change_pct:.2f}%. The stock price moved from ${first_price:.2f} to ${last_price:.2f}, while {volatility_desc}. {market_comparison}"""
+During the period from {start_date} to {end_date}{bars_note}, {symbol} has shown a {trend_description} trend with a price change of {price_change_pct:.2f}%. The stock price moved from ${first_price:.2f} to ${last_price:.2f}, while {volatility_desc}. {market_comparison}"""
         
         key_highlights = f"""## Key Highlights
 
 - The highest price of ${high_price:.2f} was reached on {high_date}
 - The lowest price of ${low_price:.2f} was recorded on {low_date}
-- Average trading volume over the last 20 days: {avg_volume:,.0f} shares
-- Latest trading volume: {latest_volume:,.0f} shares ({volume_change:.2f}% compared to the 20-day average)"""
+- Average trading volume over the last {window_label(20, interval, plural=True)}: {f'{avg_volume:,.0f} shares' if avg_volume is not None else 'N/A'}
+- Latest trading volume: {latest_volume:,.0f} shares ({f'{volume_change:.2f}%' if volume_change is not None else 'N/A'} compared to the {ma_short} average)"""
         
         technical_analysis = f"""## Technical Analysis
 
 - Current stock price (as of {end_date}): ${last_price:.2f}
-- 20-day Moving Average: ${ma_20:.2f if ma_20 else 'N/A'}
-- 50-day Moving Average: ${ma_50:.2f if ma_50 else 'N/A'}
-- 20-day Volatility: {volatility:.2f}%
+- {ma_short} Moving Average: ${f'{ma_20:.2f}' if ma_20 else 'N/A'}
+- {ma_long} Moving Average: ${f'{ma_50:.2f}' if ma_50 else 'N/A'}
+- {ma_short} Volatility: {f'{volatility:.2f}%' if volatility is not None else 'N/A'}
 
 {ma_relation}"""
         
+        # Extra indicators, when the facts include them
+        indicator_values = facts.get('indicators') or {}
+        indicator_lines = []
+        indicator_sentences = []
+        wilder_label = window_label(WILDER_PERIOD, interval)
+        if indicator_values.get('rsi') is not None:
+            rsi = indicator_values['rsi']
+            indicator_lines.append(f"- {wilder_label} RSI: {rsi:.2f}")
+            if rsi > 70:
+                indicator_sentences.append(f"The {wilder_label} RSI of {rsi:.2f} indicates overbought conditions.")
+            elif rsi < 30:
+                indicator_sentences.append(f"The {wilder_label} RSI of {rsi:.2f} indicates oversold conditions.")
+            else:
+                indicator_sentences.append(f"The {wilder_label} RSI of {rsi:.2f} indicates neutral momentum.")
+        if indicator_values.get('macd') is not None and indicator_values.get('macd_signal') is not None:
+            macd = indicator_values['macd']
+            macd_signal = indicator_values['macd_signal']
+            indicator_lines.append(f"- MACD: {macd:.2f} (signal line {macd_signal:.2f})")
+            if macd > macd_signal:
+                indicator_sentences.append(f"The MACD of {macd:.2f} is above its signal line of {macd_signal:.2f}, a bullish momentum signal.")
+            else:
+                indicator_sentences.append(f"The MACD of {macd:.2f} is below its signal line of {macd_signal:.2f}, a bearish momentum signal.")
+        if indicator_values.get('bb_upper') is not None:
+            bb_upper = indicator_values['bb_upper']
+            bb_lower = indicator_values['bb_lower']
+            indicator_lines.append(f"- Bollinger Bands: ${bb_lower:.2f} to ${bb_upper:.2f}")
+            if last_price > bb_upper:
+                indicator_sentences.append(f"The price is trading above the upper Bollinger Band of ${bb_upper:.2f}, a sign of stretched gains.")
+            elif last_price < bb_lower:
+                indicator_sentences.append(f"The price is trading below the lower Bollinger Band of ${bb_lower:.2f}, a sign of stretched losses.")
+            else:
+                indicator_sentences.append(f"The price is trading within its Bollinger Bands of ${bb_lower:.2f} to ${bb_upper:.2f}.")
+        if indicator_values.get('atr') is not None:
+            atr = indicator_values['atr']
+            indicator_lines.append(f"- {wilder_label} Average True Range: ${atr:.2f}")
+            indicator_sentences.append(f"The {wilder_label} Average True Range of ${atr:.2f} is {indicator_values['atr_pct']:.2f}% of the price.")
+        if indicator_values.get('max_drawdown') is not None:
+            max_drawdown = indicator_values['max_drawdown']
+            indicator_lines.append(f"- Maximum drawdown: {max_drawdown:.2f}%")
+            indicator_sentences.append(f"The maximum drawdown from a peak during this period was {abs(max_drawdown):.2f}%.")
+        if indicator_values.get('obv_change') is not None:
+            obv_change = indicator_values['obv_change']
+            indicator_lines.append(f"- On-Balance Volume change: {obv_change:,.0f} shares")
+            if (obv_change > 0) == (price_change > 0):
+                indicator_sentences.append("On-Balance Volume moved with the price, confirming the trend.")
+            else:
+                indicator_sentences.append("On-Balance Volume moved against the price, diverging from the trend.")
+        if indicator_lines:
+            technical_analysis += "\n\n" + "\n".join(indicator_lines) + "\n\n" + " ".join(indicator_sentences)
+        
         # Add market comparison section if market data is available
-        if market_metrics:
+        if market_change_pct is not None:
             market_section = f"""## Market Comparison
 
 {market_comparison}
@@ -231,6 +352,87 @@ This report is generated automatically based on historical market data. It does
         raise Exception(f"Failed to generate financial narrative: {str(e)}")
 
 
+@profiling.traced('narrative_generator.generate_narrative_series')
+def generate_narrative_series(financial_data, market_data=None, period='3mo', span=1, narrative_type="Quarterly Report",
+                              depth_level=3, target_audience="Investors"):
+    """
+    Generate one financial narrative per window across a long price history
+    
+    The metrics of every window (e.g. each quarter of a 20-year history) come from
+    a single pass of compute_window_metrics, so a series of reports costs little
+    more than one. Each report is the one generate_financial_narrative would write
+    for that window's rows.
+    
+    Parameters:
+    financial_data (pandas.DataFrame): Stock data in chronological order
+    market_data (pandas.DataFrame): Market index data for the market comparison (optional)
+    period (str): Window length: '1wk', '1mo', '3mo' or '1y'
+    span (int): Number of periods per window (e.g. 4 quarters for trailing years)
+    narrative_type (str): Type of narrative to generate
+    depth_level (int): Level of detail in the analysis (1-5)
+    target_audience (str): Target audience for the narratives
+    
+    Returns:
+    list: One dict per window with start_date, end_date, start and end (row positions in
+          financial_data, end exclusive) and narrative, oldest first
+    """
+    try:
+        windows = compute_window_metrics(financial_data, period, span)
+        symbol = financial_data['Symbol'].iloc[0] if 'Symbol' in financial_data.columns else "Unknown"
+        
+        # Market change over each window, from the first and last index close inside it
+        windows['market_change_pct'] = np.full(len(windows['start']), np.nan)
+        if market_data is not None and len(market_data) > 0:
+            market_dates = market_data['Date'].to_numpy()
+            market_close = market_data['Close'].to_numpy(dtype=np.float64)
+            first = np.searchsorted(market_dates, windows['start_date'], side='left')
+            last = np.searchsorted(market_dates, windows['end_date'], side='right') - 1
+            covered = (first <= last) & (first < len(market_close))
+            first = np.minimum(first, len(market_close) - 1)
+            last = np.maximum(last, 0)
+            windows['market_change_pct'] = np.where(covered, (market_close[last] - market_close[first]) / market_close[first] * 100, np.nan)
+        
+        def value(key, i):
+            number = windows[key][i]
+            return None if np.isnan(number) else float(number)
+        
+        series = []
+        for i in range(len(windows['start'])):
+            facts = {
+                'symbol': symbol,
+                'start_date': pd.Timestamp(windows['start_date'][i]),
+                'end_date': pd.Timestamp(windows['end_date'][i]),
+                'interval': windows['interval'],
+                'first_price': windows['first_price'][i],
+                'last_price': windows['last_price'][i],
+                'volatility': value('volatility_20d', i),
+                'daily_volatility': value('volatility_daily', i),
+                'high_date': pd.Timestamp(windows['high_date'][i]),
+                'high_price': windows['high_price'][i],
+                'low_date': pd.Timestamp(windows['low_date'][i]),
+                'low_price': windows['low_price'][i],
+                'avg_volume': value('avg_volume_20d', i),
+                'latest_volume': windows['latest_volume'][i],
+                'volume_change': value('volume_change_pct', i),
+                'ma_20': value('ma_20', i),
+                'ma_50': value('ma_50', i),
+                'market_change_pct': value('market_change_pct', i)
+            }
+            series.append({
+                'start_date': facts['start_date'],
+                'end_date': facts['end_date'],
+                'start': int(windows['start'][i]),
+                'end': int(windows['end'][i]),
+                'narrative': render_financial_narrative(facts, narrative_type, depth_level, target_audience)
+            })
+        
+        return series
+    
+    except Exception as e:
+        raise Exception(f"Failed to generate narrative series: {str(e)}")
+
+
+@profiling.traced('narrative_generator.generate_market_overview')
 def generate_market_overview(market_data, depth_level=3, target_audience="Investors"):
     """
     Generate a market overview narrative based on market index data using a rule-based approach
@@ -254,6 +456,13 @@ def generate_market_overview(market_data, depth_level=3, target_audience="Invest
         start_date = market_data['Date'].min().strftime('%Y-%m-%d')
         end_date = market_data['Date'].max().strftime('%Y-%m-%d')
         
+        # Describe windows and timestamps in the units of the bar interval
+        interval = metrics.get('interval', '1d')
+        date_format = '%Y-%m-%d %H:%M' if is_intraday(interval) else '%Y-%m-%d'
+        bars_note = f" ({describe_interval(interval)} bars)" if interval != '1d' else ""
+        ma_short = window_label(20, interval)
+        ma_long = window_label(50, interval)
+        
         # Initialize sentiment analyzer
         sia = SentimentIntensityAnalyzer()
         
@@ -281,19 +490,22 @@ def generate_market_overview(market_data, depth_level=3, target_audience="Invest
             sentiment = "very negative"
         
         # Calculate volatility
+        # (thresholds apply to daily volatility, so intraday data is scaled to a day)
         volatility = metrics.get('volatility_20d', 0)
-        if volatility > 2:
+        daily_volatility = metrics.get('volatility_daily', volatility)
+        if daily_volatility > 2:
             volatility_desc = "highly volatile"
-        elif volatility > 1:
+        elif daily_volatility > 1:
             volatility_desc = "moderately volatile"
         else:
             volatility_desc = "showing low volatility"
             
         # Find key dates
-        high_date = market_data.loc[market_data['High'].idxmax(), 'Date'].strftime('%Y-%m-%d')
-        high_price = market_data['High'].max()
-        low_date = market_data.loc[market_data['Low'].idxmin(), 'Date'].strftime('%Y-%m-%d')
-        low_price = market_data['Low'].min()
+        extremes = detect_key_events(market_data, top_n=0)['extremes']
+        high_date = extremes['highest_price']['date'].strftime(date_format)
+        high_price = extremes['highest_price']['value']
+        low_date = extremes['lowest_price']['date'].strftime(date_format)
+        low_price = extremes['lowest_price']['value']
         
         # Get volume information
         avg_volume = metrics.get('avg_volume_20d', 0)
@@ -306,9 +518,9 @@ def generate_market_overview(market_data, depth_level=3, target_audience="Invest
         ma_relation = ""
         if ma_20 and ma_50:
             if ma_20 > ma_50:
-                ma_relation = "The 20-day moving average is above the 50-day moving average, suggesting a potential bullish trend in the broader market."
+                ma_relation = f"The {ma_short} moving average is above the {ma_long} moving average, suggesting a potential bullish trend in the broader market."
             else:
-                ma_relation = "The 20-day moving average is below the 50-day moving average, indicating a potential bearish trend in the broader market."
+                ma_relation = f"The {ma_short} moving average is below the {ma_long} moving average, indicating a potential bearish trend in the broader market."
         
         # Generate title
         title = f"{index_name} Market Overview: {start_date} to {end_date}"
@@ -316,21 +528,21 @@ def generate_market_overview(market_data, depth_level=3, target_audience="Invest
         # Define sections based on depth level
         executive_summary = f"""## Market Summary
 
-During the period from {start_date} to {end_date}, the {index_name} has shown a {trend_description} trend with a change of {price_change_pct:.2f}%. The index moved from {first_price:.2f} to {last_price:.2f}, while {volatility_desc}."""
+During the period from {start_date} to {end_date}{bars_note}, the {index_name} has shown a {trend_description} trend with a change of {price_change_pct:.2f}%. The index moved from {first_price:.2f} to {last_price:.2f}, while {volatility_desc}."""
         
         key_highlights = f"""## Key Market Highlights
 
 - The highest index value of {high_price:.2f} was reached on {high_date}
 - The lowest index value of {low_price:.2f} was recorded on {low_date}
-- Average trading volume over the last 20 days: {avg_volume:,.0f}
-- Latest trading volume: {latest_volume:,.0f} ({volume_change:.2f}% compared to the 20-day average)"""
+- Average trading volume over the last {window_label(20, interval, plural=True)}: {avg_volume:,.0f}
+- Latest trading volume: {latest_volume:,.0f} ({volume_change:.2f}% compared to the {ma_short} average)"""
         
         technical_analysis = f"""## Technical Analysis
 
 - Current index value (as of {end_date}): {last_price:.2f}
-- 20-day Moving Average: {ma_20:.2f if ma_20 else 'N/A'}
-- 50-day Moving Average: {ma_50:.2f if ma_50 else 'N/A'}
-- 20-day Volatility: {volatility:.2f}%
+- {ma_short} Moving Average: {f'{ma_20:.2f}' if ma_20 else 'N/A'}
+- {ma_long} Moving Average: {f'{ma_50:.2f}' if ma_50 else 'N/A'}
+- {ma_short} Volatility: {volatility:.2f}%
 
 {ma_relation}"""
         
@@ -387,6 +599,152 @@ This market overview is generated automatically based on historical market data.
     except Exception as e:
         raise Exception(f"Failed to generate market overview: {str(e)}")
 
+@profiling.traced('narrative_generator.generate_peer_comparison_narrative')
+def generate_peer_comparison_narrative(peer_data, target_symbol=None, depth_level=3, target_audience="Investors"):
+    """
+    Generate a narrative comparing one stock against a peer group using a rule-based approach
+    
+    The metrics for the whole group come from one vectorized pass over the aligned
+    panel (see compute_peer_metrics), so groups of hundreds of tickers are cheap.
+    
+    Parameters:
+    peer_data (pandas.DataFrame): Long-format peer price data (fetch_peer_data output)
+    target_symbol (str): Symbol the narrative focuses on (defaults to the first symbol)
+    depth_level (int): Level of detail in the analysis (1-5)
+    target_audience (str): Target audience for the narrative
+    
+    Returns:
+    str: Generated peer comparison narrative
+    """
+    try:
+        # Calculate metrics for every symbol at once
+        metrics = compute_peer_metrics(build_peer_panel(peer_data))
+        symbols = metrics['symbols']
+        group = metrics['group']
+        
+        target_symbol = target_symbol or symbols[0]
+        if target_symbol not in symbols:
+            raise Exception(f"{target_symbol} is not in the peer data")
+        target = symbols.index(target_symbol)
+        
+        start_date = metrics['start_date']
+        end_date = metrics['end_date']
+        num_symbols = group['count']
+        
+        target_return = metrics['total_return'][target]
+        target_volatility = metrics['volatility'][target]
+        target_drawdown = metrics['max_drawdown'][target]
+        return_rank = int(metrics['return_rank'][target])
+        spread = target_return - group['median_return']
+        
+        # Describe the target's standing in the group
+        percentile = 1 - (return_rank - 1) / max(num_symbols - 1, 1)
+        if percentile >= 0.75:
+            standing = "a leader"
+        elif percentile >= 0.5:
+            standing = "an above-median performer"
+        elif percentile >= 0.25:
+            standing = "a below-median performer"
+        else:
+            standing = "a laggard"
+        
+        if abs(spread) < 0.5:  # percentage points
+            spread_description = "in line with the median peer"
+        elif spread > 0:
+            spread_description = f"outperforming the median peer by {spread:.2f} percentage points"
+        else:
+            spread_description = f"underperforming the median peer by {abs(spread):.2f} percentage points"
+        
+        title = f"{target_symbol} Peer Comparison: {start_date} to {end_date}"
+        
+        executive_summary = f"""## Executive Summary
+
+During the period from {start_date} to {end_date}, {target_symbol} returned {target_return:.2f}%, ranking {return_rank} of {num_symbols} in its peer group and {spread_description}. The median return across the group was {group['median_return']:.2f}%, making {target_symbol} {standing} among its peers."""
+        
+        # Leaderboard by return, longer at higher depth
+        order = np.argsort(metrics['return_rank'], kind='stable')
+        leaderboard_size = min(len(order), 3 + 2 * depth_level)
+        rows = list(order[:leaderboard_size])
+        if target not in rows:
+            rows.append(target)
+        
+        leaderboard_lines = [
+            f"- #{int(metrics['return_rank'][position])} {symbols[position]}: {metrics['total_return'][position]:.2f}% return, "
+            f"{metrics['volatility'][position]:.2f}% annualized volatility, {metrics['max_drawdown'][position]:.2f}% maximum drawdown"
+            for position in rows
+        ]
+        best = order[0]
+        worst = order[num_symbols - 1] if num_symbols else order[-1]
+        
+        rankings = f"""## Performance Rankings
+
+""" + "\n".join(leaderboard_lines) + f"""
+
+{symbols[best]} led the group with a return of {metrics['total_return'][best]:.2f}%, while {symbols[worst]} trailed with {metrics['total_return'][worst]:.2f}%."""
+        
+        # Risk comparison
+        volatility_rank = int(metrics['volatility_rank'][target])
+        drawdown_rank = int(metrics['drawdown_rank'][target])
+        risk_description = "less volatile than" if target_volatility < group['median_volatility'] else "more volatile than"
+        
+        risk_section = f"""## Risk Comparison
+
+- {target_symbol} annualized volatility: {target_volatility:.2f}% (rank {volatility_rank} of {num_symbols}, group median {group['median_volatility']:.2f}%)
+- {target_symbol} maximum drawdown: {target_drawdown:.2f}% (rank {drawdown_rank} of {num_symbols}, group median {group['median_drawdown']:.2f}%)
+
+{target_symbol} was {risk_description} the typical peer during this period."""
+        
+        # Return per unit of risk relative to the group
+        if target_volatility > 0 and group['median_volatility'] > 0:
+            target_efficiency = target_return / target_volatility
+            group_efficiency = group['median_return'] / group['median_volatility']
+            if target_efficiency > group_efficiency:
+                outlook = f"On a risk-adjusted basis, {target_symbol} delivered more return per unit of volatility than the median peer, which suggests its performance was not simply the result of taking on more risk."
+            else:
+                outlook = f"On a risk-adjusted basis, {target_symbol} delivered less return per unit of volatility than the median peer, so investors may want to weigh its risk profile against the alternatives in the group."
+        else:
+            outlook = f"There is not enough price variation to compare the risk-adjusted performance of {target_symbol} with its peers."
+        
+        outlook_section = f"""## Relative Outlook
+
+{outlook}
+
+This comparison is based solely on historical price and volume data and does not incorporate fundamental analysis, news events, or other factors that may explain differences between peers."""
+        
+        # Target audience customization
+        audience_note = ""
+        if target_audience == "Investors":
+            audience_note = "\n\nNote: This report is intended for investors and focuses on how the stock compares with alternatives in its peer group."
+        elif target_audience == "Financial Analysts":
+            audience_note = "\n\nNote: This report is tailored for financial analysts and includes cross-sectional rankings and risk metrics."
+        elif target_audience == "General Public":
+            audience_note = "\n\nNote: This report is prepared for a general audience and explains financial concepts in accessible terms."
+        elif target_audience == "Board Members":
+            audience_note = "\n\nNote: This report is prepared for board members and focuses on competitive positioning relative to peers."
+        
+        # Combine all sections based on depth level
+        sections = [executive_summary, rankings]
+        
+        if depth_level >= 2:
+            sections.append(risk_section)
+            
+        if depth_level >= 4:
+            sections.append(outlook_section)
+        
+        disclaimer = """## Disclaimer
+
+This report is generated automatically based on historical market data. It does not constitute investment advice. Past performance is not indicative of future results. Always conduct your own research or consult with a financial advisor before making investment decisions."""
+        
+        sections.append(disclaimer + audience_note)
+        
+        # Assemble the full narrative
+        narrative = f"# {title}\n\n" + "\n\n".join(sections)
+        
+        return narrative
+    
+    except Exception as e:
+        raise Exception(f"Failed to generate peer comparison narrative: {str(e)}")
+
 def format_metrics_for_prompt(metrics):
     """
     Format metrics dictionary into a string for the prompt
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from financial_data import fetch_stock_data, extend_technical_indicators, compute_data_fingerprint, INDICATOR_LOOKBACK
+from resampling import is_intraday
+from narrative_generator import generate_financial_narrative
+from consistency_checker import check_narrative_consistency
+import database
+
+def narrative_params_hash(narrative_type, depth_level, target_audience, market_data=None):
+    """
+    Hash the parameters that determine a generated narrative
+
+    Parameters:
+    narrative_type (str): Type of narrative
+    depth_level (int): Level of detail in the analysis (1-5)
+    target_audience (str): Target audience for the narrative
+    market_data (pandas.DataFrame): Market index data used for comparison, if any
+
+    Returns:
+    str: Hex SHA-256 digest of the parameters
+    """
+    return database.hash_params({
+        'narrative_type': narrative_type,
+        'depth_level': depth_level,
+        'target_audience': target_audience,
+        'market_fingerprint': compute_data_fingerprint(market_data) if market_data is not None and len(market_data) > 0 else None
+    })
+
+def generate_and_store_narrative(dataset_id, financial_data, market_data=None, narrative_type="Quarterly Report",
+                                 depth_level=3, target_audience="Investors", title=None):
+    """
+    Generate, check and store a financial narrative, reusing a stored one when possible
+
+    If a narrative was already stored for the same data fingerprint and parameters,
+    it is returned without generating or checking anything. Otherwise the narrative is
+    generated, checked for consistency and saved (save_narrative skips exact duplicates).
+
+    Parameters:
+    dataset_id (int): ID of the dataset the narrative belongs to
+    financial_data (pandas.DataFrame): DataFrame containing stock data
+    market_data (pandas.DataFrame): DataFrame containing market index data
+    narrative_type (str): Type of narrative to generate
+    depth_level (int): Level of detail in the analysis (1-5)
+    target_audience (str): Target audience for the narrative
+    title (str): Title to store (defaults to "<Symbol> <narrative_type>")
+
+    Returns:
+    dict: narrative_id, content, consistency_report, consistency_score and
+          reused (True when a stored narrative was returned)
+    """
+    try:
+        # Identify the request by its input data and parameters
+        data_fingerprint = compute_data_fingerprint(financial_data)
+        params_hash = narrative_params_hash(narrative_type, depth_level, target_audience, market_data)
+
+        # Short-circuit on a stored narrative for the same inputs
+        stored = database.find_narrative(data_fingerprint, params_hash)
+        if stored is not None:
+            return {
+                'narrative_id': stored.id,
+                'content': stored.content,
+                'consistency_report': stored.consistency_report,
+                'consistency_score': stored.consistency_score,
+                'reused': True
+            }
+
+        # Generate and check the narrative
+        content = generate_financial_narrative(financial_data, market_data, narrative_type, depth_level, target_audience)
+        consistency_report, consistency_score = check_narrative_consistency(content, financial_data)
+
+        if title is None:
+            symbol = financial_data['Symbol'].iloc[0] if 'Symbol' in financial_data.columns else "Unknown"
+            title = f"{symbol} {narrative_type}"
+
+        narrative_id = database.save_narrative(
+            dataset_id, title, content, narrative_type,
+            consistency_score=consistency_score,
+            consistency_report=consistency_report,
+            target_audience=target_audience,
+            depth_level=depth_level,
+            data_fingerprint=data_fingerprint,
+            params_hash=params_hash
+        )
+
+        return {
+            'narrative_id': narrative_id,
+            'content': content,
+            'consistency_report': consistency_report,
+            'consistency_score': consistency_score,
+            'reused': False
+        }
+    except Exception as e:
+        raise Exception(f"Failed to generate and store narrative: {str(e)}")
+
+def refresh_dataset(dataset_id, end_date=None, data=None, market_data=None):
+    """
+    Bring a stored Yahoo Finance dataset up to date by fetching only the new bars
+
+    Bars after the last stored date are downloaded, their calculated columns are
+    extended from the stored tail and they are appended to the price history. Only
+    the narratives generated from the full previous history (those whose data
+    fingerprint matches the dataset's) are regenerated, with their stored narrative
+    type, depth level and target audience.
+
+    The full history is needed only to regenerate narratives and fingerprint the
+    data; pass the current frame as data to avoid reading it back from the database.
+    Without it, and with no narratives to regenerate, the dataset fingerprint is
+    cleared because the stored one no longer describes the data.
+
+    Parameters:
+    dataset_id (int): ID of a dataset with source_type 'yahoo' and a ticker (and optionally
+                      an interval) in source_details
+    end_date (datetime): End date for data retrieval (defaults to now)
+    data (pandas.DataFrame): The dataset's current full frame, if already in memory
+    market_data (pandas.DataFrame): Market index data for the regenerated narratives
+
+    Returns:
+    dict: new_rows (number of bars appended), data (the refreshed full frame, or None
+          when it was not needed) and narrative_ids (IDs of the regenerated narratives)
+    """
+    try:
+        dataset = database.get_dataset(dataset_id)
+        if dataset is None:
+            raise Exception(f"Dataset {dataset_id} not found")
+        source_details = dict(dataset.source_details or {})
+        if dataset.source_type != 'yahoo' or 'ticker' not in source_details:
+            raise Exception(f"Dataset {dataset_id} is not a Yahoo Finance dataset")
+
+        end_date = end_date or datetime.now()
+        last_date = database.get_last_price_date(dataset_id)
+
+        # Fetch only the bars after the last stored date (intraday bars from the rest of its day)
+        interval = source_details.get('interval', '1d')
+        if last_date is None:
+            fetch_start = pd.Timestamp(source_details['start_date'])
+        elif is_intraday(interval):
+            fetch_start = last_date.normalize()
+        else:
+            fetch_start = last_date + timedelta(days=1)
+        new_data = pd.DataFrame()
+        if fetch_start < pd.Timestamp(end_date):
+            new_data = fetch_stock_data(source_details['ticker'], fetch_start, end_date, interval)
+        if len(new_data) > 0:
+            new_data['Date'] = pd.to_datetime(new_data['Date']).dt.tz_localize(None)
+            if last_date is not None:
+                new_data = new_data[new_data['Date'] > last_date].reset_index(drop=True)
+
+        source_details['end_date'] = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+        if len(new_data) == 0:
+            database.update_dataset(dataset_id, source_details, dataset.fingerprint)
+            return {'new_rows': 0, 'data': data, 'narrative_ids': []}
+
+        # Extend the calculated columns from the last stored rows
+        if data is not None:
+            tail = data
+        else:
+            tail = database.load_dataset_prices(dataset_id, start_date=new_data['Date'].iloc[0],
+                                                lookback_rows=INDICATOR_LOOKBACK)
+        new_data = extend_technical_indicators(tail, new_data)
+        database.save_dataset_prices(dataset_id, new_data)
+
+        # Regenerate the narratives that described the previous full history
+        affected = database.get_narratives_for_fingerprint(dataset_id, dataset.fingerprint) if dataset.fingerprint else []
+        if data is None and affected:
+            data = database.load_dataset_frame(dataset_id)
+        elif data is not None:
+            new_data['Symbol'] = data['Symbol'].iloc[-1] if 'Symbol' in data.columns else source_details['ticker']
+            data = pd.concat([data, new_data[[column for column in data.columns if column in new_data.columns]]],
+                             ignore_index=True)
+
+        fingerprint = compute_data_fingerprint(data) if data is not None else None
+        database.update_dataset(dataset_id, source_details, fingerprint)
+
+        narrative_ids = []
+        regenerated = set()
+        for narrative in affected:
+            params = (narrative.narrative_type, narrative.depth_level, narrative.target_audience)
+            if params in regenerated:
+                continue
+            regenerated.add(params)
+            result = generate_and_store_narrative(
+                dataset_id, data, market_data,
+                narrative_type=narrative.narrative_type,
+                depth_level=narrative.depth_level,
+                target_audience=narrative.target_audience,
+                title=narrative.title
+            )
+            narrative_ids.append(result['narrative_id'])
+
+        return {'new_rows': len(new_data), 'data': data, 'narrative_ids': narrative_ids}
+    except Exception as e:
+        raise Exception(f"Failed to refresh dataset: {str(e)}")
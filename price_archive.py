@@ -0,0 +1,369 @@
+import os
+import re
+import json
+import shutil
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import resampling
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Columns stored per symbol; Date is stored as int64 nanoseconds since the epoch
+ARCHIVE_COLUMNS = ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')
+ARCHIVE_VERSION = 2
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'index.lock'
+
+# Open memory maps and parsed indexes, keyed by file path and modification time
+_mmaps = {}
+_indexes = {}
+_lock = threading.Lock()
+
+def write_symbol(root, symbol, data):
+    """
+    Write (or replace) one symbol's price history in the archive
+
+    Each write goes to a fresh version directory that the index switches to in a
+    single atomic replace, so readers see either the old or the new columns,
+    never a mix. Index updates are serialized across threads and processes by a
+    lock file.
+
+    Parameters:
+    root (str): Archive directory (created if missing)
+    symbol (str): Ticker symbol
+    data (pandas.DataFrame): Date and price columns (any of Open, High, Low, Close, Volume)
+
+    Returns:
+    int: Number of rows written
+    """
+    data = data.sort_values('Date')
+    dates = pd.DatetimeIndex(pd.to_datetime(data['Date']))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    columns = {'Date': dates.as_unit('ns').asi8}
+    for column in ARCHIVE_COLUMNS[1:]:
+        if column in data.columns:
+            columns[column] = data[column].to_numpy(dtype=np.float64)
+
+    with _index_lock(root):
+        index = _read_index(root, cached=False)
+        previous = index['symbols'].get(symbol)
+        entry = {
+            'directory': previous['directory'] if previous else _directory_name(symbol, index),
+            'version': previous['version'] + 1 if previous else 1
+        }
+        directory = _version_directory(root, entry)
+        os.makedirs(directory)
+        for column, values in columns.items():
+            _save_array(os.path.join(directory, f'{column}.npy'), values)
+
+        entry.update({
+            'rows': len(dates),
+            'columns': list(columns),
+            'start_date': dates[0].strftime('%Y-%m-%d') if len(dates) else None,
+            'end_date': dates[-1].strftime('%Y-%m-%d') if len(dates) else None
+        })
+        index['symbols'][symbol] = entry
+        _write_index(root, index)
+
+    if previous:
+        # Readers still on the old version retry with the new index (see read_columns)
+        previous_directory = _version_directory(root, previous)
+        _evict_maps(previous_directory)
+        shutil.rmtree(previous_directory, ignore_errors=True)
+    return len(dates)
+
+def append_symbol(root, symbol, data):
+    """
+    Append rows dated after a symbol's last archived date
+
+    Parameters:
+    root (str): Archive directory
+    symbol (str): Ticker symbol
+    data (pandas.DataFrame): New rows with Date and price columns
+
+    Returns:
+    int: Number of rows appended
+    """
+    if symbol not in list_symbols(root):
+        return write_symbol(root, symbol, data)
+
+    existing = read_symbol(root, symbol)
+    # Archived dates are naive (see write_symbol), so compare on naive dates
+    dates = pd.DatetimeIndex(pd.to_datetime(data['Date']))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    is_new = dates > existing['Date'].iloc[-1]
+    new_rows = data[is_new].assign(Date=dates[is_new])
+    if len(new_rows) == 0:
+        return 0
+    combined = pd.concat([existing, new_rows[[column for column in existing.columns if column in new_rows.columns]]],
+                         ignore_index=True)
+    write_symbol(root, symbol, combined)
+    return len(new_rows)
+
+def build_archive(root, frames):
+    """
+    Write many symbols to an archive
+
+    Parameters:
+    root (str): Archive directory
+    frames (dict): Symbol -> DataFrame with Date and price columns
+
+    Returns:
+    int: Total rows written
+    """
+    return sum(write_symbol(root, symbol, data) for symbol, data in frames.items())
+
+def list_symbols(root):
+    """
+    List the symbols in an archive with their row counts and date ranges
+
+    Returns:
+    dict: Symbol -> {'rows', 'columns', 'start_date', 'end_date', 'directory', 'version'}
+    """
+    return _read_index(root)['symbols']
+
+def read_columns(root, symbol, start_date=None, end_date=None, columns=None, lookback_rows=0):
+    """
+    Read a symbol's columns for a date range as zero-copy memory-mapped arrays
+
+    The range is located by binary search on the memory-mapped Date column, so
+    only the pages that are actually read are loaded from disk.
+
+    Parameters:
+    root (str): Archive directory
+    symbol (str): Ticker symbol
+    start_date (datetime): First date to include (None for the first archived date)
+    end_date (datetime): End of the range, exclusive like fetch_stock_data (None for all)
+    columns (list): Columns to read (defaults to all archived columns)
+    lookback_rows (int): Extra rows to include before start_date (for indicator warm-up)
+
+    Returns:
+    dict: Column name -> read-only NumPy view (Date as datetime64[ns])
+    """
+    # A writer may replace the symbol between reading the index and opening its
+    # files; the version it removed is then gone, so retry once with the new index
+    for attempt in range(2):
+        entry = list_symbols(root).get(symbol)
+        if entry is None:
+            raise Exception(f"Symbol {symbol} is not in the archive at {root}")
+        directory = _version_directory(root, entry)
+        try:
+            return _read_version(directory, entry, start_date, end_date, columns, lookback_rows)
+        except FileNotFoundError:
+            _evict_maps(directory)
+            if attempt:
+                raise
+
+def _read_version(directory, entry, start_date, end_date, columns, lookback_rows):
+    """Read columns from one version directory of a symbol (see read_columns)"""
+    dates = _open_array(os.path.join(directory, 'Date.npy'))
+    first = 0 if start_date is None else int(np.searchsorted(dates, pd.Timestamp(start_date).as_unit('ns').value, side='left'))
+    last = len(dates) if end_date is None else int(np.searchsorted(dates, pd.Timestamp(end_date).as_unit('ns').value, side='left'))
+    first = max(0, first - lookback_rows)
+
+    arrays = {}
+    for column in columns or entry['columns']:
+        if column == 'Date':
+            arrays['Date'] = dates[first:last].view('M8[ns]')
+        elif column in entry['columns']:
+            arrays[column] = _open_array(os.path.join(directory, f'{column}.npy'))[first:last]
+    return arrays
+
+def read_symbol(root, symbol, start_date=None, end_date=None, columns=None, lookback_rows=0):
+    """
+    Read a symbol's prices for a date range as a DataFrame over memory-mapped arrays
+
+    The frame's columns are views of the archive files (no parsing or copying);
+    they are read-only, so add new columns rather than writing into these.
+
+    Parameters:
+    root (str): Archive directory
+    symbol (str): Ticker symbol
+    start_date (datetime): First date to include (None for the first archived date)
+    end_date (datetime): End of the range, exclusive like fetch_stock_data (None for all)
+    columns (list): Columns to read (defaults to all archived columns)
+    lookback_rows (int): Extra rows to include before start_date (for indicator warm-up)
+
+    Returns:
+    pandas.DataFrame: Date and price columns ordered by date
+    """
+    return pd.DataFrame(read_columns(root, symbol, start_date, end_date, columns, lookback_rows), copy=False)
+
+def read_resampled(root, symbol, interval, start_date=None, end_date=None, lookback_bars=0):
+    """
+    Read a symbol's prices rolled up to a coarser interval (e.g. minute bars to '1h' or '1d')
+
+    The archived bars are resampled straight from the memory-mapped files in chunks
+    (see resampling.resample_ohlcv), so only the chunk being aggregated is in memory.
+
+    Parameters:
+    root (str): Archive directory
+    symbol (str): Ticker symbol
+    interval (str): Interval to return; must not be finer than the archived bars
+    start_date (datetime): First date to include (None for the first archived date)
+    end_date (datetime): End of the range, exclusive (None for all)
+    lookback_bars (int): Extra bars of the target interval to include before start_date
+
+    Returns:
+    pandas.DataFrame: Date and price columns with attrs['interval'] set
+    """
+    archived_dates = read_columns(root, symbol, columns=['Date'])['Date']
+    source_interval = resampling.infer_interval(archived_dates)
+    if resampling.interval_minutes(interval) < resampling.interval_minutes(source_interval):
+        raise Exception(f"Cannot resample {source_interval} bars of {symbol} to the finer interval {interval}")
+    if interval == source_interval:
+        data = read_symbol(root, symbol, start_date, end_date, lookback_rows=lookback_bars)
+        data.attrs['interval'] = interval
+        return data
+
+    # Read enough source bars for the lookback plus one bar that may be cut short
+    ratio = -(-resampling.interval_minutes(interval) // resampling.interval_minutes(source_interval))
+    lookback_rows = (lookback_bars + 1) * ratio if lookback_bars else 0
+    columns = read_columns(root, symbol, start_date, end_date, lookback_rows=lookback_rows)
+    data = resampling.resample_ohlcv(columns, interval)
+
+    if lookback_rows and len(columns['Date']) and columns['Date'][0] != archived_dates[0]:
+        # The first bar may be missing the source bars before the lookback window
+        data = data.iloc[1:].reset_index(drop=True)
+    if start_date is not None:
+        # Keep at most lookback_bars bars before start_date
+        first = int(np.searchsorted(data['Date'].to_numpy(), pd.Timestamp(start_date).as_unit('ns').to_datetime64(), side='left'))
+        data = data.iloc[max(0, first - lookback_bars):].reset_index(drop=True)
+    return data
+
+def make_downloader(root):
+    """
+    Create a downloader with the yf.download signature that reads from an archive
+
+    Use with financial_data.set_downloader to serve fetch_stock_data and
+    fetch_market_data from local disk. Requests for an interval coarser than the
+    archived bars are resampled from them (see read_resampled).
+
+    Parameters:
+    root (str): Archive directory
+
+    Returns:
+    callable: downloader(tickers, start=None, end=None, interval=None, **kwargs)
+    """
+    def download(tickers, start=None, end=None, interval=None, **kwargs):
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for symbol in symbols:
+            if interval is None:
+                frame = read_symbol(root, symbol, start, end)
+            else:
+                frame = read_resampled(root, symbol, interval, start, end)
+            frame = frame.set_index('Date')
+            if 'Close' in frame.columns:
+                frame.insert(frame.columns.get_loc('Close') + 1, 'Adj Close', frame['Close'])
+            frames[symbol] = frame
+        if isinstance(tickers, str) and len(symbols) == 1:
+            return frames[symbols[0]]
+        combined = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+        return combined.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+    return download
+
+def _open_array(path):
+    """Memory-map an archived column, reusing the map until the file is replaced"""
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    with _lock:
+        array = _mmaps.get(key)
+        if array is None:
+            array = np.load(path, mmap_mode='r')
+            for old_key in [old_key for old_key in _mmaps if old_key[0] == path]:
+                del _mmaps[old_key]
+            _mmaps[key] = array
+        return array
+
+def _evict_maps(directory):
+    """Drop the memory maps of a removed version directory"""
+    prefix = os.path.join(directory, '')
+    with _lock:
+        for key in [key for key in _mmaps if key[0].startswith(prefix)]:
+            del _mmaps[key]
+
+def _save_array(path, values):
+    """Write a column file atomically"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(values))
+    os.replace(temp_path, path)
+
+def _read_index(root, cached=True):
+    """Read the symbol index, reusing the parsed copy until the file changes (cached copies are shared, don't modify them)"""
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return {'version': ARCHIVE_VERSION, 'symbols': {}}
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    if cached:
+        with _lock:
+            if key in _indexes:
+                return _indexes[key]
+    with open(path) as f:
+        index = json.load(f)
+    if index.get('version') != ARCHIVE_VERSION:
+        raise Exception(f"Unsupported price archive version: {index.get('version')}")
+    if cached:
+        with _lock:
+            for old_key in [old_key for old_key in _indexes if old_key[0] == path]:
+                del _indexes[old_key]
+            _indexes[key] = index
+    return index
+
+def _write_index(root, index):
+    """Replace the symbol index atomically (call with _index_lock held)"""
+    path = os.path.join(root, INDEX_FILE)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+@contextmanager
+def _index_lock(root):
+    """Hold the archive's lock file, serializing index updates across threads and processes"""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _version_directory(root, entry):
+    """Directory holding the column files of a symbol's current version"""
+    return os.path.join(root, 'symbols', entry['directory'], f"v{entry['version']}")
+
+def _directory_name(symbol, index):
+    """File-system-safe, unique directory name for a symbol"""
+    base = re.sub(r'[^A-Za-z0-9.-]', '_', symbol) or '_'
+    if not base.strip('.'):
+        # '.' and '..' would resolve to the symbols directory or the archive root
+        base = base.replace('.', '_')
+    taken = {entry['directory'] for entry in index['symbols'].values()}
+    name = base
+    suffix = 1
+    while name in taken:
+        suffix += 1
+        name = f"{base}_{suffix}"
+    return name
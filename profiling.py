@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+
+# Profiling is process-wide and off by default; set PROFILING=1 to enable it at startup
+_enabled = os.environ.get("PROFILING", "").lower() in ("1", "true", "yes")
+
+# Aggregated timings per stage name and cumulative counters
+_stage_stats = {}
+_counters = {}
+_stats_lock = threading.Lock()
+
+# Callables receiving one event dict per finished stage
+_exporters = []
+
+# Names of the stages currently running in this thread, outermost first
+_local = threading.local()
+
+logger = logging.getLogger(__name__)
+
+class _NoopStage:
+    """Context manager used when profiling is disabled"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NOOP_STAGE = _NoopStage()
+
+def enable():
+    """Turn profiling on"""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Turn profiling off (recorded stats are kept)"""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """Check whether profiling is on"""
+    return _enabled
+
+def stage(name):
+    """
+    Time a block of code as a named pipeline stage
+
+    Usage:
+        with profiling.stage('consistency_checker.extract_factual_claims'):
+            ...
+
+    Parameters:
+    name (str): Stage name, conventionally '<module>.<step>'
+
+    Returns:
+    context manager: Records the stage when profiling is enabled, does nothing otherwise
+    """
+    if not _enabled:
+        return _NOOP_STAGE
+    return _timed_stage(name)
+
+@contextmanager
+def _timed_stage(name):
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(name)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        _record_stage(name, duration, error, stack[-1] if stack else None)
+
+def traced(name):
+    """
+    Decorator that runs a function as a named stage (see stage)
+
+    Parameters:
+    name (str): Stage name
+
+    Returns:
+    function: Decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _timed_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def increment(name, value=1):
+    """
+    Add to a named counter (ignored when profiling is disabled)
+
+    Parameters:
+    name (str): Counter name, conventionally '<module>.<thing>'
+    value (int or float): Amount to add
+    """
+    if not _enabled:
+        return
+    with _stats_lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def _record_stage(name, duration, error, parent):
+    """Aggregate a finished stage and pass it to the exporters"""
+    with _stats_lock:
+        stats = _stage_stats.get(name)
+        if stats is None:
+            stats = _stage_stats[name] = {'count': 0, 'errors': 0, 'total': 0.0, 'min': duration, 'max': duration}
+        stats['count'] += 1
+        stats['total'] += duration
+        stats['min'] = min(stats['min'], duration)
+        stats['max'] = max(stats['max'], duration)
+        if error is not None:
+            stats['errors'] += 1
+
+    if _exporters:
+        event = {
+            'stage': name,
+            'parent': parent,
+            'duration': duration,
+            'error': error,
+            'timestamp': time.time()
+        }
+        for exporter in list(_exporters):
+            try:
+                exporter(event)
+            except Exception as e:
+                logger.warning("Profiling exporter failed: %s", str(e))
+
+def get_stats():
+    """
+    Get aggregated stage timings and counters
+
+    Returns:
+    dict: 'stages' maps stage names to count, errors, total, mean, min and max
+          (seconds); 'counters' maps counter names to values
+    """
+    with _stats_lock:
+        stages = {}
+        for name, stats in _stage_stats.items():
+            stages[name] = dict(stats, mean=stats['total'] / stats['count'])
+        return {'stages': stages, 'counters': dict(_counters)}
+
+def reset():
+    """Clear all recorded stage timings and counters"""
+    with _stats_lock:
+        _stage_stats.clear()
+        _counters.clear()
+
+def add_exporter(exporter):
+    """
+    Register an exporter called with each finished stage event
+
+    Events are dicts with stage, parent (enclosing stage or None), duration
+    (seconds), error (exception class name or None) and timestamp.
+
+    Parameters:
+    exporter (callable): Function taking one event dict
+
+    Returns:
+    callable: The exporter, for remove_exporter
+    """
+    _exporters.append(exporter)
+    return exporter
+
+def remove_exporter(exporter):
+    """Unregister an exporter"""
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+def log_exporter(level=logging.INFO, log=None):
+    """
+    Create an exporter that logs each stage
+
+    Parameters:
+    level (int): Logging level
+    log (logging.Logger): Logger to use (defaults to this module's logger)
+
+    Returns:
+    callable: Exporter for add_exporter
+    """
+    log = log or logger
+
+    def export(event):
+        log.log(level, "stage %s took %.2f ms%s", event['stage'], event['duration'] * 1000,
+                f" (failed: {event['error']})" if event['error'] else "")
+    return export
+
+def jsonl_exporter(path):
+    """
+    Create an exporter that appends each stage event to a JSON lines file
+
+    Parameters:
+    path (str): File to append to
+
+    Returns:
+    callable: Exporter for add_exporter
+    """
+    lock = threading.Lock()
+
+    def export(event):
+        line = json.dumps(event, separators=(',', ':'))
+        with lock, open(path, 'a') as f:
+            f.write(line + '\n')
+    return export
+
+def prometheus_exporter(path):
+    """
+    Create an exporter that rewrites a Prometheus text file after each outermost stage
+
+    The file is meant for the node exporter textfile collector; see write_prometheus_textfile.
+
+    Parameters:
+    path (str): File to write
+
+    Returns:
+    callable: Exporter for add_exporter
+    """
+    def export(event):
+        if event['parent'] is None:
+            write_prometheus_textfile(path)
+    return export
+
+def write_prometheus_textfile(path):
+    """
+    Write the aggregated stage timings and counters in the Prometheus text format
+
+    The file is written to a temporary name and renamed, so readers never see a partial file.
+
+    Parameters:
+    path (str): File to write
+    """
+    stats = get_stats()
+    lines = [
+        '# HELP financial_narrative_stage_seconds_total Time spent in each pipeline stage',
+        '# TYPE financial_narrative_stage_seconds_total counter'
+    ]
+    for name, stage_stats in sorted(stats['stages'].items()):
+        lines.append(f'financial_narrative_stage_seconds_total{{stage="{name}"}} {stage_stats["total"]:.6f}')
+    lines += [
+        '# HELP financial_narrative_stage_calls_total Number of runs of each pipeline stage',
+        '# TYPE financial_narrative_stage_calls_total counter'
+    ]
+    for name, stage_stats in sorted(stats['stages'].items()):
+        lines.append(f'financial_narrative_stage_calls_total{{stage="{name}"}} {stage_stats["count"]}')
+    lines += [
+        '# HELP financial_narrative_stage_errors_total Number of failed runs of each pipeline stage',
+        '# TYPE financial_narrative_stage_errors_total counter'
+    ]
+    for name, stage_stats in sorted(stats['stages'].items()):
+        lines.append(f'financial_narrative_stage_errors_total{{stage="{name}"}} {stage_stats["errors"]}')
+    lines += [
+        '# HELP financial_narrative_events_total Pipeline counters',
+        '# TYPE financial_narrative_events_total counter'
+    ]
+    for name, value in sorted(stats['counters'].items()):
+        lines.append(f'financial_narrative_events_total{{name="{name}"}} {value}')
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp_path, path)
+
+# Exporters configured through environment variables
+if os.environ.get("PROFILING_LOG", "").lower() in ("1", "true", "yes"):
+    add_exporter(log_exporter())
+if os.environ.get("PROFILING_JSONL"):
+    add_exporter(jsonl_exporter(os.environ["PROFILING_JSONL"]))
+if os.environ.get("PROFILING_PROMETHEUS"):
+    add_exporter(prometheus_exporter(os.environ["PROFILING_PROMETHEUS"]))
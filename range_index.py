@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+# Columns with sparse tables for range extremes: (name, value key, column, sign);
+# lows are stored negated so every table answers a maximum
+EXTREME_COLUMNS = (
+    ('high', 'high_price', 'High', 1.0),
+    ('low', 'low_price', 'Low', -1.0),
+    ('max_volume', 'max_volume', 'Volume', 1.0)
+)
+
+def build_range_index(data):
+    """
+    Build a range-query index over price data so any sub-range is summarized in O(1)
+
+    Prefix sums answer sums, means and variances (volume, per-bar returns) and
+    sparse tables of argmax positions answer highs, lows and peak volume, after
+    O(n log n) setup. Build it once per dataset and query it for every window,
+    custom date range or claim instead of slicing and rescanning the frame.
+
+    Parameters:
+    data (pandas.DataFrame): Price data in chronological order with Date and Close
+                             columns (High, Low and Volume optional)
+
+    Returns:
+    dict: Index for query_range and query_dates: 'dates', 'close', prefix sums,
+          sparse tables and 'rows'
+    """
+    try:
+        dates = pd.DatetimeIndex(data['Date'])
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        num_rows = len(dates)
+        close = data['Close'].to_numpy(dtype=np.float64)
+
+        index = {
+            'rows': num_rows,
+            'dates': dates.to_numpy(),
+            'close': close,
+            'tables': {},
+            'values': {}
+        }
+
+        # Volume sums and non-missing counts, so averages skip gaps like pandas mean()
+        volume = data['Volume'].to_numpy(dtype=np.float64) if 'Volume' in data.columns else np.full(num_rows, np.nan)
+        index['volume_sums'] = _prefix_sum(np.nan_to_num(volume))
+        index['volume_counts'] = _prefix_sum(~np.isnan(volume))
+
+        # Per-bar returns; return i is close[i] / close[i - 1] - 1, so a range's
+        # own returns start one row after its first row
+        returns = np.concatenate(([np.nan], close[1:] / close[:-1] - 1)) if num_rows else close
+        valid = ~np.isnan(returns)
+        index['return_sums'] = _prefix_sum(np.where(valid, returns, 0.0))
+        index['return_squares'] = _prefix_sum(np.where(valid, returns ** 2, 0.0))
+        index['return_counts'] = _prefix_sum(valid)
+
+        # Sparse tables: level k holds the position of the first maximum of each run of 2**k rows
+        for name, _, column, sign in EXTREME_COLUMNS:
+            if column not in data.columns:
+                continue
+            values = data[column].to_numpy(dtype=np.float64) * sign
+            values = np.where(np.isnan(values), -np.inf, values)
+            index['values'][name] = values
+            index['tables'][name] = _sparse_table(values)
+
+        return index
+
+    except Exception as e:
+        raise Exception(f"Failed to build range index: {str(e)}")
+
+def locate_range(index, start_date=None, end_date=None):
+    """
+    Find the rows of a date range
+
+    Parameters:
+    index (dict): Index created by build_range_index
+    start_date (datetime or str): First date to include (None for the first row)
+    end_date (datetime or str): Last date to include; a date without a time of day
+                                includes that whole day (None for the last row)
+
+    Returns:
+    tuple: (first, end) row positions, end exclusive
+    """
+    dates = index['dates']
+    first = 0
+    end = index['rows']
+    if start_date is not None:
+        first = int(np.searchsorted(dates, pd.Timestamp(start_date).to_datetime64(), side='left'))
+    if end_date is not None:
+        end_date = pd.Timestamp(end_date)
+        if end_date == end_date.normalize():
+            end = int(np.searchsorted(dates, (end_date + pd.Timedelta(days=1)).to_datetime64(), side='left'))
+        else:
+            end = int(np.searchsorted(dates, end_date.to_datetime64(), side='right'))
+    return first, max(first, end)
+
+def query_range(index, first, end):
+    """
+    Summarize the rows first..end-1 in O(1)
+
+    first and end may also be arrays, to summarize many ranges in one vectorized call.
+
+    Parameters:
+    index (dict): Index created by build_range_index
+    first (int or numpy.ndarray): First row of each range
+    end (int or numpy.ndarray): Row after the last row of each range (must be > first)
+
+    Returns:
+    dict: rows, first_price, last_price, return_pct (first to last close), high_price,
+          high_position, high_date, low_price, low_position, low_date, max_volume,
+          max_volume_position, max_volume_date, total_volume, avg_volume and volatility
+          (standard deviation of per-bar returns inside the range, in %); values are
+          NaN where the range has no data for them
+    """
+    if np.ndim(first) == 0 and np.ndim(end) == 0:
+        return _query_one(index, int(first), int(end))
+    first = np.asarray(first, dtype=np.int64)
+    end = np.asarray(end, dtype=np.int64)
+    if np.any(end <= first) or np.any(first < 0) or np.any(end > index['rows']):
+        raise Exception("Ranges must be non-empty and within the indexed rows")
+    last = end - 1
+    dates = index['dates']
+    close = index['close']
+
+    summary = {
+        'rows': end - first,
+        'first_price': close[first],
+        'last_price': close[last],
+        'return_pct': (close[last] / close[first] - 1) * 100
+    }
+
+    # Extremes from two overlapping power-of-two runs
+    for name, key, _, sign in EXTREME_COLUMNS:
+        if name not in index['tables']:
+            summary[key] = np.full(first.shape, np.nan)
+            continue
+        values = index['values'][name]
+        position = _query_table(index['tables'][name], values, first, end)
+        summary[key] = np.where(np.isneginf(values[position]), np.nan, values[position] * sign)
+        summary[f'{name}_position'] = position
+        summary[f'{name}_date'] = dates[position]
+
+    # Sums, means and variances from prefix sums
+    volume_count = index['volume_counts'][end] - index['volume_counts'][first]
+    summary['total_volume'] = index['volume_sums'][end] - index['volume_sums'][first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary['avg_volume'] = np.where(volume_count > 0, summary['total_volume'] / volume_count, np.nan)
+
+        # Only returns inside the range (the first row's return crosses the range start)
+        count = index['return_counts'][end] - index['return_counts'][first + 1]
+        total = index['return_sums'][end] - index['return_sums'][first + 1]
+        squares = index['return_squares'][end] - index['return_squares'][first + 1]
+        variance = (squares - total ** 2 / count) / (count - 1)
+    summary['volatility'] = np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)) * 100, np.nan)
+    return summary
+
+def query_dates(index, start_date=None, end_date=None):
+    """
+    Summarize a date range in O(1) (see query_range for the values returned)
+
+    Parameters:
+    index (dict): Index created by build_range_index
+    start_date (datetime or str): First date to include (None for the first row)
+    end_date (datetime or str): Last date to include (None for the last row)
+
+    Returns:
+    dict or None: Range summary, or None if no rows fall in the range
+    """
+    first, end = locate_range(index, start_date, end_date)
+    if end <= first:
+        return None
+    return query_range(index, first, end)
+
+def _prefix_sum(values):
+    """Cumulative sums with a leading zero, so sum(values[a:b]) is sums[b] - sums[a]"""
+    return np.concatenate(([0], np.cumsum(values)))
+
+def _sparse_table(values):
+    """Positions of the first maximum of every run of 2**k rows, one row per level k"""
+    num_rows = len(values)
+    levels = max(1, int(num_rows).bit_length())
+    dtype = np.int32 if num_rows < 2**31 else np.int64
+    table = np.zeros((levels, num_rows), dtype=dtype)
+    table[0] = np.arange(num_rows)
+    length = 1
+    for level in range(1, levels):
+        count = num_rows - 2 * length + 1
+        left = table[level - 1, :count]
+        right = table[level - 1, length:length + count]
+        # Keep the earlier position on ties, so extremes match argmax over the range
+        table[level, :count] = np.where(values[right] > values[left], right, left)
+        length *= 2
+    return table
+
+def _query_table(table, values, first, end):
+    """Position of the first maximum in rows first..end-1"""
+    level = np.floor(np.log2(end - first)).astype(np.int64)
+    left = table[level, first]
+    right = table[level, end - np.left_shift(1, level)]
+    return np.where(values[right] > values[left], right, left).astype(np.int64)
+
+def _query_one(index, first, end):
+    """query_range for a single range, on Python scalars (avoids array overhead per query)"""
+    if end <= first or first < 0 or end > index['rows']:
+        raise Exception("Ranges must be non-empty and within the indexed rows")
+    dates = index['dates']
+    close = index['close']
+    first_price = float(close[first])
+    last_price = float(close[end - 1])
+
+    summary = {
+        'rows': end - first,
+        'first_price': first_price,
+        'last_price': last_price,
+        'return_pct': (last_price / first_price - 1) * 100
+    }
+
+    level = (end - first).bit_length() - 1
+    for name, key, _, sign in EXTREME_COLUMNS:
+        if name not in index['tables']:
+            summary[key] = np.nan
+            continue
+        values = index['values'][name]
+        table = index['tables'][name]
+        left = int(table[level, first])
+        right = int(table[level, end - (1 << level)])
+        position = right if values[right] > values[left] else left
+        value = float(values[position])
+        summary[key] = np.nan if value == -np.inf else value * sign
+        summary[f'{name}_position'] = position
+        summary[f'{name}_date'] = pd.Timestamp(dates[position])
+
+    volume_count = int(index['volume_counts'][end] - index['volume_counts'][first])
+    summary['total_volume'] = float(index['volume_sums'][end] - index['volume_sums'][first])
+    summary['avg_volume'] = summary['total_volume'] / volume_count if volume_count else np.nan
+
+    count = int(index['return_counts'][end] - index['return_counts'][first + 1])
+    total = float(index['return_sums'][end] - index['return_sums'][first + 1])
+    squares = float(index['return_squares'][end] - index['return_squares'][first + 1])
+    if count > 1:
+        summary['volatility'] = np.sqrt(max((squares - total ** 2 / count) / (count - 1), 0.0)) * 100
+    else:
+        summary['volatility'] = np.nan
+    return summary
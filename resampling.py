@@ -0,0 +1,274 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Bar length in minutes for the intraday intervals accepted by yf.download
+INTERVAL_MINUTES = {
+    '1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60
+}
+
+# Regular US trading session
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_MINUTES = 390
+TRADING_DAYS_PER_YEAR = 252
+
+# Coarser intervals, in trading days
+DAY_INTERVALS = {'1d': 1, '5d': 5, '1wk': 5, '1mo': 21, '3mo': 63, '1y': 252}
+
+# Memory the resampling engine may use for its working set; larger inputs are
+# processed in chunks of this size
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("RESAMPLE_MEMORY_MB", 64)) * 2**20)
+
+# Working bytes per input row: the date and five price columns read, plus the
+# bucket keys and boundary mask computed from them
+BYTES_PER_ROW = 8 * 6 + 8 + 8 + 1
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+_DAY_NS = 86_400 * 10**9
+_MINUTE_NS = 60 * 10**9
+
+# Ticks per second of each datetime64 unit, so dates are bucketed without converting them
+_TICKS_PER_SECOND = {'s': 1, 'ms': 10**3, 'us': 10**6, 'ns': 10**9}
+
+def interval_minutes(interval):
+    """
+    Length of a bar in trading minutes (a trading day counts as one session)
+
+    Parameters:
+    interval (str): An intraday interval from INTERVAL_MINUTES or one of DAY_INTERVALS
+
+    Returns:
+    int: Trading minutes per bar
+    """
+    if interval in INTERVAL_MINUTES:
+        return INTERVAL_MINUTES[interval]
+    if interval in DAY_INTERVALS:
+        return DAY_INTERVALS[interval] * SESSION_MINUTES
+    raise Exception(f"Unsupported interval: {interval}")
+
+def is_intraday(interval):
+    """Check whether an interval is shorter than a trading day"""
+    return interval in INTERVAL_MINUTES
+
+def bars_per_day(interval='1d'):
+    """Number of bars of the given interval in a trading session (fractional for multi-day bars)"""
+    if is_intraday(interval):
+        return -(-SESSION_MINUTES // INTERVAL_MINUTES[interval])
+    days = DAY_INTERVALS[interval]
+    return 1 if days == 1 else 1 / days
+
+def bars_per_year(interval='1d'):
+    """Number of bars of the given interval in a trading year"""
+    return TRADING_DAYS_PER_YEAR * bars_per_day(interval)
+
+def infer_interval(dates):
+    """
+    Infer the bar interval of a series of dates from their typical spacing
+
+    Parameters:
+    dates (array-like): Bar dates in chronological order
+
+    Returns:
+    str: The closest interval ('1d' when there are too few dates to tell)
+    """
+    values = np.asarray(pd.DatetimeIndex(dates[:1000]).as_unit('ns').asi8)
+    if len(values) < 2:
+        return '1d'
+    spacing = np.median(np.abs(np.diff(values)))
+    if spacing == 0:
+        return '1d'
+    if spacing < _DAY_NS:
+        minutes = max(1, int(round(spacing / _MINUTE_NS)))
+        return min(INTERVAL_MINUTES, key=lambda name: (abs(INTERVAL_MINUTES[name] - minutes), name == '60m'))
+    days = spacing / _DAY_NS
+    if days < 4:
+        return '1d'
+    if days < 20:
+        return '1wk'
+    if days < 60:
+        return '1mo'
+    if days < 200:
+        return '3mo'
+    return '1y'
+
+def get_interval(data):
+    """
+    Get the bar interval of price data
+
+    Uses the interval recorded in data.attrs['interval'] by fetch_stock_data and
+    resample_ohlcv, and falls back to infer_interval for other frames.
+
+    Parameters:
+    data (pandas.DataFrame): Price data with a Date column
+
+    Returns:
+    str: Bar interval
+    """
+    interval = data.attrs.get('interval')
+    if interval:
+        return interval
+    if 'Date' not in data.columns or not pd.api.types.is_datetime64_any_dtype(data['Date']):
+        return '1d'
+    return infer_interval(data['Date'])
+
+def describe_interval(interval):
+    """Adjective for an interval, e.g. 'daily', 'hourly' or '5-minute'"""
+    names = {'1d': 'daily', '1wk': 'weekly', '5d': '5-day', '1mo': 'monthly', '3mo': 'quarterly', '1y': 'yearly',
+             '1h': 'hourly', '60m': 'hourly'}
+    if interval in names:
+        return names[interval]
+    return f"{INTERVAL_MINUTES[interval]}-minute"
+
+def window_label(bars, interval='1d', plural=False):
+    """
+    Describe a window of bars in the units of the interval
+
+    Parameters:
+    bars (int): Window length in bars
+    interval (str): Bar interval
+    plural (bool): Return '20 days' instead of '20-day'
+
+    Returns:
+    str: e.g. '20-day', '20-hour', '20-week' or '20-bar' (minute intervals)
+    """
+    units = {'1d': 'day', '1wk': 'week', '1mo': 'month', '1y': 'year', '1h': 'hour', '60m': 'hour'}
+    unit = units.get(interval, 'bar')
+    if plural:
+        return f"{bars} {unit}{'s' if bars != 1 else ''}"
+    return f"{bars}-{unit}"
+
+def resample_ohlcv(data, interval, memory_budget_bytes=None):
+    """
+    Roll price bars up to a coarser interval in one vectorized pass
+
+    Each output bar takes the first Open, highest High, lowest Low, last Close and
+    total Volume of the input bars in it. Intraday bars are aligned to the session
+    open (09:30), days to midnight, weeks to Monday and months to the first day.
+
+    Inputs larger than the memory budget are processed in chunks, with a bar that
+    spans two chunks merged, so the working set stays bounded however many rows
+    there are. Memory-mapped arrays (price_archive.read_columns) are only paged in
+    one chunk at a time.
+
+    Parameters:
+    data (pandas.DataFrame or dict): Date and any of Open, High, Low, Close and Volume,
+                                     in chronological order
+    interval (str): Target interval (intraday from INTERVAL_MINUTES or one of DAY_INTERVALS)
+    memory_budget_bytes (int): Working memory limit (defaults to MEMORY_BUDGET_BYTES)
+
+    Returns:
+    pandas.DataFrame: Resampled Date and price columns, with attrs['interval'] set
+    """
+    try:
+        if isinstance(data, pd.DataFrame):
+            columns = {column: data[column].to_numpy() for column in ('Date',) + PRICE_COLUMNS if column in data.columns}
+        else:
+            columns = {column: np.asarray(data[column]) for column in ('Date',) + PRICE_COLUMNS if column in data}
+        dates = pd.DatetimeIndex(columns.pop('Date'))
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        unit = dates.unit
+        dates = dates.asi8
+
+        budget = memory_budget_bytes or MEMORY_BUDGET_BYTES
+        chunk_rows = max(1024, budget // BYTES_PER_ROW)
+
+        parts = {column: [] for column in ('Date',) + tuple(columns)}
+        for start in range(0, len(dates), chunk_rows):
+            chunk_dates = dates[start:start + chunk_rows]
+            if np.any(chunk_dates[1:] < chunk_dates[:-1]) or (start > 0 and chunk_dates[0] < dates[start - 1]):
+                raise Exception("Dates must be in chronological order")
+
+            # Bars start where the bucket key changes
+            keys = _bucket_keys(chunk_dates, interval, unit)
+            starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            ends = np.append(starts[1:], len(keys)) - 1
+
+            chunk = {'Date': keys[starts]}
+            for column, values in columns.items():
+                values = np.asarray(values[start:start + chunk_rows], dtype=np.float64)
+                chunk[column] = _aggregate(column, values, starts, ends)
+
+            # A bar cut by the chunk boundary is merged into the previous chunk's last bar
+            if parts['Date'] and parts['Date'][-1][-1] == chunk['Date'][0]:
+                for column in columns:
+                    parts[column][-1][-1] = _merge(column, parts[column][-1][-1], chunk[column][0])
+                chunk = {column: values[1:] for column, values in chunk.items()}
+
+            if len(chunk['Date']):
+                for column, values in chunk.items():
+                    parts[column].append(values)
+
+        resampled = pd.DataFrame({
+            column: np.concatenate(values) if values else np.empty(0, dtype=np.int64 if column == 'Date' else np.float64)
+            for column, values in parts.items()
+        })
+        resampled['Date'] = resampled['Date'].to_numpy().view(f'M8[{unit}]')
+        resampled.attrs['interval'] = interval
+        return resampled
+
+    except Exception as e:
+        raise Exception(f"Failed to resample price data: {str(e)}")
+
+def bucket_starts(dates, interval):
+    """
+    Find the rows where each bar of an interval begins, e.g. the first row of every quarter
+
+    Parameters:
+    dates (array-like): Dates in chronological order
+    interval (str): Interval, as for resample_ohlcv (e.g. '1mo', '3mo' or '1y')
+
+    Returns:
+    numpy.ndarray: Positions of the first row of each bar
+    """
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    keys = _bucket_keys(dates.asi8, interval, dates.unit)
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else np.empty(0, dtype=np.int64)
+
+def _bucket_keys(dates, interval, unit='ns'):
+    """Start time (int64 in the given datetime64 unit) of the output bar each input date falls into"""
+    day = 86_400 * _TICKS_PER_SECOND[unit]
+    if is_intraday(interval):
+        step = INTERVAL_MINUTES[interval] * 60 * _TICKS_PER_SECOND[unit]
+        session_open = int(SESSION_OPEN.total_seconds()) * _TICKS_PER_SECOND[unit]
+        days = dates - dates % day
+        return days + session_open + (dates - days - session_open) // step * step
+    if interval == '1d':
+        return dates - dates % day
+    if interval in ('1wk', '5d'):
+        # The epoch was a Thursday, so Mondays are 3 days before multiples of 7 days
+        days = dates // day
+        return ((days + 3) // 7 * 7 - 3) * day
+    if interval == '1y':
+        return dates.view(f'M8[{unit}]').astype('M8[Y]').astype(f'M8[{unit}]').view(np.int64)
+    months = dates.view(f'M8[{unit}]').astype('M8[M]')
+    if interval == '3mo':
+        months = months - months.astype(np.int64) % 3
+    return months.astype(f'M8[{unit}]').view(np.int64)
+
+def _aggregate(column, values, starts, ends):
+    """Aggregate one column over the bars given by their first and last rows"""
+    if column == 'Open':
+        return values[starts]
+    if column == 'Close':
+        return values[ends]
+    if column == 'High':
+        return np.fmax.reduceat(values, starts)
+    if column == 'Low':
+        return np.fmin.reduceat(values, starts)
+    return np.add.reduceat(np.nan_to_num(values), starts)
+
+def _merge(column, earlier, later):
+    """Combine the aggregates of two consecutive pieces of one bar"""
+    if column == 'Open':
+        return earlier
+    if column == 'Close':
+        return later
+    if column == 'High':
+        return np.fmax(earlier, later)
+    if column == 'Low':
+        return np.fmin(earlier, later)
+    return earlier + later
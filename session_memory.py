@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import uuid
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+import frame_store
+
+# Global budget for values held in memory across all sessions
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("SESSION_MEMORY_BUDGET_MB", 1024)) * 2**20)
+
+# 'spill' writes evicted values to disk and reloads them on access; 'drop' discards them
+EVICTION_POLICY = os.environ.get("SESSION_EVICTION", "spill")
+
+# Sessions idle this long are spilled even when under budget
+IDLE_SECONDS = float(os.environ.get("SESSION_IDLE_SECONDS", 600))
+
+# Sessions idle this long are forgotten, including their spilled values
+EXPIRE_SECONDS = float(os.environ.get("SESSION_EXPIRE_SECONDS", 24 * 3600))
+
+SPILL_DIR = os.environ.get("SESSION_SPILL_DIR", os.path.join(tempfile.gettempdir(), "financial-narrative-sessions"))
+
+# Key under which each browser session's ID is kept in st.session_state
+SESSION_ID_KEY = 'memory_session_id'
+
+# session_id -> {'last_access', 'values', 'sizes', 'spilled'}, least recently used first
+_sessions = OrderedDict()
+_lock = threading.RLock()
+
+_DROPPED = object()
+
+def estimate_size(value):
+    """
+    Estimate the memory held by a session value in bytes
+
+    Parameters:
+    value: A DataFrame, string, dict, list or other value
+
+    Returns:
+    int: Approximate size in bytes (0 for frames shared through frame_store)
+    """
+    if isinstance(value, pd.DataFrame):
+        # Frames shared through frame_store are accounted for once, by the store
+        if frame_store.is_shared(value):
+            return 0
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, (dict, list, tuple)):
+        try:
+            return sys.getsizeof(value) + len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+def session_state(streamlit_state, defaults=None):
+    """
+    Get the budgeted state of the current browser session
+
+    The session is identified by a UUID kept in st.session_state; its values are
+    held here so they can be accounted for and evicted.
+
+    Parameters:
+    streamlit_state: st.session_state
+    defaults (dict): Initial values for keys the session does not have yet
+
+    Returns:
+    SessionState: Attribute-style access to the session's values
+    """
+    if SESSION_ID_KEY not in streamlit_state:
+        streamlit_state[SESSION_ID_KEY] = uuid.uuid4().hex
+    state = SessionState(streamlit_state[SESSION_ID_KEY])
+    for key, value in (defaults or {}).items():
+        if key not in state:
+            setattr(state, key, value)
+    return state
+
+class SessionState:
+    """Attribute-style view of one session's values (reads rehydrate evicted values)"""
+
+    def __init__(self, session_id):
+        object.__setattr__(self, 'session_id', session_id)
+
+    def __getattr__(self, key):
+        return get_value(self.session_id, key)
+
+    def __setattr__(self, key, value):
+        set_value(self.session_id, key, value)
+
+    def __contains__(self, key):
+        with _lock:
+            session = _sessions.get(self.session_id)
+            return session is not None and (key in session['values'] or key in session['spilled'])
+
+def set_value(session_id, key, value):
+    """
+    Store a session value and enforce the memory budget
+
+    Parameters:
+    session_id (str): Session ID
+    key (str): Value name
+    value: Value to store
+    """
+    size = estimate_size(value)
+    with _lock:
+        session = _touch(session_id)
+        _discard_spilled(session, key)
+        session['values'][key] = value
+        session['sizes'][key] = size
+        enforce_budget(keep_session_id=session_id)
+
+def get_value(session_id, key):
+    """
+    Read a session value, reloading it from disk if it was spilled
+
+    Parameters:
+    session_id (str): Session ID
+    key (str): Value name
+
+    Returns:
+    The stored value (None for unknown keys and values dropped by eviction)
+    """
+    with _lock:
+        session = _touch(session_id)
+        if key in session['values']:
+            return session['values'][key]
+        if key not in session['spilled']:
+            return None
+
+        path = session['spilled'].pop(key)
+        if path is _DROPPED:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        finally:
+            _remove_file(path)
+        if isinstance(value, pd.DataFrame):
+            # Rejoin the shared copy if other sessions still hold the same data
+            value = frame_store.share(value)
+        session['values'][key] = value
+        session['sizes'][key] = estimate_size(value)
+        enforce_budget(keep_session_id=session_id)
+        return value
+
+def enforce_budget(keep_session_id=None):
+    """
+    Spill idle sessions, forget expired ones, then evict least recently used
+    sessions until the in-memory total fits the budget
+
+    Parameters:
+    keep_session_id (str): Session that must stay in memory (the one being served)
+    """
+    with _lock:
+        now = time.time()
+        for session_id, session in list(_sessions.items()):
+            idle = now - session['last_access']
+            if session_id == keep_session_id:
+                continue
+            if idle > EXPIRE_SECONDS:
+                _forget(session_id)
+            elif idle > IDLE_SECONDS:
+                _evict(session)
+
+        total = _total_bytes()
+        for session_id, session in list(_sessions.items()):
+            if total <= MEMORY_BUDGET_BYTES:
+                break
+            if session_id == keep_session_id:
+                continue
+            total -= _evict(session)
+
+def get_usage():
+    """
+    Report memory held per session
+
+    Returns:
+    dict: budget_bytes, total_bytes and sessions (session_id, bytes, spilled_keys,
+          idle_seconds and keys per session, least recently used first)
+    """
+    with _lock:
+        now = time.time()
+        sessions = [
+            {
+                'session_id': session_id,
+                'bytes': sum(session['sizes'].values()),
+                'spilled_keys': sorted(key for key, path in session['spilled'].items() if path is not _DROPPED),
+                'idle_seconds': now - session['last_access'],
+                'keys': sorted(session['values'])
+            }
+            for session_id, session in _sessions.items()
+        ]
+        return {
+            'budget_bytes': MEMORY_BUDGET_BYTES,
+            'total_bytes': sum(session['bytes'] for session in sessions),
+            'sessions': sessions
+        }
+
+def _touch(session_id):
+    """Get a session record, creating it, and mark it most recently used"""
+    session = _sessions.get(session_id)
+    if session is None:
+        session = _sessions[session_id] = {'last_access': 0.0, 'values': {}, 'sizes': {}, 'spilled': {}}
+    session['last_access'] = time.time()
+    _sessions.move_to_end(session_id)
+    return session
+
+def _total_bytes():
+    return sum(sum(session['sizes'].values()) for session in _sessions.values())
+
+def _evict(session):
+    """Move a session's in-memory values to disk (or drop them); returns the bytes released"""
+    released = 0
+    for key in list(session['values']):
+        value = session['values'].pop(key)
+        released += session['sizes'].pop(key, 0)
+        if value is None:
+            continue
+        if EVICTION_POLICY == 'spill':
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            fd, path = tempfile.mkstemp(prefix='session-', suffix='.pkl', dir=SPILL_DIR)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            session['spilled'][key] = path
+        else:
+            session['spilled'][key] = _DROPPED
+    return released
+
+def _forget(session_id):
+    """Drop a session and delete its spilled values"""
+    session = _sessions.pop(session_id)
+    for key in list(session['spilled']):
+        _discard_spilled(session, key)
+
+def _discard_spilled(session, key):
+    path = session['spilled'].pop(key, None)
+    if path is not None and path is not _DROPPED:
+        _remove_file(path)
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,189 @@
+import json
+import zlib
+
+# zstd is used when the zstandard package is installed; zlib otherwise
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Stored values start with a NUL byte followed by a codec byte. Legacy values
+# (plain UTF-8 text or JSON) never start with NUL, so both can be read back.
+MAGIC = b'\x00'
+CODEC_RAW = b'r'
+CODEC_ZLIB = b'z'
+CODEC_ZSTD = b's'
+
+# Values shorter than this are stored uncompressed
+MIN_COMPRESS_SIZE = 64
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 6
+
+# Enum codes for the compact claim check encoding; new values are appended so
+# existing codes keep their meaning
+CLAIM_TYPES = (
+    'price_claim', 'price_trend_claim', 'percentage_claim', 'percentage_trend_claim',
+    'date_specific_claim', 'trend_claim', 'volatility_claim', 'comparison_claim'
+)
+
+VERIFICATION_RESULTS = (
+    'unverified', 'verified', 'partially verified', 'contradicted',
+    'partially contradicted', 'error'
+)
+
+REPORT_FORMAT_VERSION = 1
+
+def compress_bytes(data):
+    """
+    Compress bytes into the self-describing stored format
+
+    Parameters:
+    data (bytes): Data to compress
+
+    Returns:
+    bytes: MAGIC + codec byte + payload
+    """
+    if len(data) < MIN_COMPRESS_SIZE:
+        return MAGIC + CODEC_RAW + data
+    if zstandard is not None:
+        return MAGIC + CODEC_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return MAGIC + CODEC_ZLIB + zlib.compress(data, ZLIB_LEVEL)
+
+def decompress_bytes(value):
+    """
+    Decompress a stored value, passing legacy uncompressed values through
+
+    Parameters:
+    value (bytes, memoryview or str): Stored value
+
+    Returns:
+    bytes: The original data
+    """
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    value = bytes(value)
+    if not value.startswith(MAGIC) or len(value) < 2:
+        return value
+
+    codec = value[1:2]
+    payload = value[2:]
+    if codec == CODEC_RAW:
+        return payload
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise Exception("Stored value is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise Exception(f"Unknown storage codec: {codec!r}")
+
+def is_encoded(value):
+    """Check whether a stored value is already in the compressed format"""
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) == MAGIC
+
+def compress_text(text):
+    """Compress a string for storage"""
+    return compress_bytes(text.encode('utf-8'))
+
+def decompress_text(value):
+    """Decompress a stored string (legacy plain text is returned as is)"""
+    return decompress_bytes(value).decode('utf-8')
+
+def encode_consistency_report(report):
+    """
+    Encode a consistency report compactly for storage
+
+    Claim checks become positional lists with enum codes for claim type and
+    verification result, and the whole report is compressed.
+
+    Parameters:
+    report (dict): Consistency report from check_narrative_consistency
+
+    Returns:
+    bytes: Encoded report
+    """
+    checks = []
+    for check in report.get('claim_checks', []):
+        checks.append([
+            _encode_enum(check.get('claim_type'), CLAIM_TYPES),
+            _encode_enum(check.get('verification_result'), VERIFICATION_RESULTS),
+            check.get('consistency_score'),
+            check.get('start'),
+            check.get('end'),
+            check.get('sentence_index'),
+            check.get('explanation'),
+            check.get('claim_text')
+        ])
+
+    extra = {
+        key: value for key, value in report.items()
+        if key not in ('overall_score', 'checked_claims', 'narrative_length', 'claim_checks')
+    }
+    encoded = {
+        'v': REPORT_FORMAT_VERSION,
+        's': report.get('overall_score'),
+        'n': report.get('checked_claims'),
+        'l': report.get('narrative_length'),
+        'c': checks
+    }
+    if extra:
+        encoded['x'] = extra
+
+    return compress_bytes(json.dumps(encoded, separators=(',', ':')).encode('utf-8'))
+
+def decode_consistency_report(value):
+    """
+    Decode a stored consistency report (compact or legacy JSON)
+
+    Parameters:
+    value (bytes, str or dict): Stored report
+
+    Returns:
+    dict: Consistency report in the check_narrative_consistency format
+    """
+    if isinstance(value, dict):
+        return value
+
+    decoded = json.loads(decompress_bytes(value).decode('utf-8'))
+    if not isinstance(decoded, dict) or decoded.get('v') != REPORT_FORMAT_VERSION or 'c' not in decoded:
+        return decoded  # Legacy JSON report
+
+    claim_checks = []
+    for claim_type, result, score, start, end, sentence_index, explanation, claim_text in decoded['c']:
+        check = {}
+        if claim_text is not None:
+            check['claim_text'] = claim_text
+        check.update({
+            'claim_type': _decode_enum(claim_type, CLAIM_TYPES),
+            'start': start,
+            'end': end,
+            'sentence_index': sentence_index,
+            'consistency_score': score,
+            'verification_result': _decode_enum(result, VERIFICATION_RESULTS),
+            'explanation': explanation
+        })
+        claim_checks.append(check)
+
+    report = {
+        'overall_score': decoded.get('s'),
+        'checked_claims': decoded.get('n')
+    }
+    if decoded.get('l') is not None:
+        report['narrative_length'] = decoded['l']
+    report['claim_checks'] = claim_checks
+    report.update(decoded.get('x', {}))
+    return report
+
+def _encode_enum(value, choices):
+    """Encode a known value as its index; unknown values are stored as strings"""
+    try:
+        return choices.index(value)
+    except ValueError:
+        return value
+
+def _decode_enum(value, choices):
+    """Decode an enum index back to its value"""
+    if isinstance(value, int) and 0 <= value < len(choices):
+        return choices[value]
+    return value
@@ -0,0 +1,300 @@
+import zlib
+import numpy as np
+import pandas as pd
+from financial_data import prepare_stock_data
+from resampling import INTERVAL_MINUTES, SESSION_OPEN, SESSION_MINUTES, TRADING_DAYS_PER_YEAR, bars_per_year
+
+# Default regimes for the regime-switching model: (annual drift, annual volatility)
+DEFAULT_REGIMES = ((0.12, 0.15), (-0.20, 0.40))
+
+# Default regime transition probabilities per day (rows: from regime, columns: to regime)
+DEFAULT_TRANSITIONS = ((0.99, 0.01), (0.04, 0.96))
+
+def trading_calendar(start=None, end=None, periods=None, interval='1d'):
+    """
+    Build bar timestamps for business days, optionally split into intraday bars
+
+    Parameters:
+    start (str or datetime): First day (inclusive)
+    end (str or datetime): Last timestamp (exclusive, like yf.download)
+    periods (int): Number of bars (used with either start or end when the other is None)
+    interval (str): '1d' or an intraday interval from INTERVAL_MINUTES
+
+    Returns:
+    pandas.DatetimeIndex: Bar timestamps
+    """
+    if interval == '1d':
+        if start is not None and end is not None:
+            days = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end))
+            days = days[(days >= pd.Timestamp(start)) & (days < pd.Timestamp(end))]
+        else:
+            days = pd.bdate_range(start=start, end=None if end is None else pd.Timestamp(end) - pd.Timedelta(days=1),
+                                  periods=periods)
+        return pd.DatetimeIndex(days, name='Date')
+
+    if interval not in INTERVAL_MINUTES:
+        raise Exception(f"Unsupported interval: {interval}")
+    step = INTERVAL_MINUTES[interval]
+    bars_per_session = -(-SESSION_MINUTES // step)
+    offsets = SESSION_OPEN + pd.to_timedelta(np.arange(bars_per_session) * step, unit='min')
+
+    if start is not None and end is not None:
+        days = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end))
+    else:
+        num_days = -(-periods // bars_per_session)
+        days = pd.bdate_range(start=None if start is None else pd.Timestamp(start).normalize(),
+                              end=None if end is None else pd.Timestamp(end), periods=num_days)
+
+    stamps = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel(), name='Date')
+    if start is not None and end is not None:
+        stamps = stamps[(stamps >= pd.Timestamp(start)) & (stamps < pd.Timestamp(end))]
+    elif periods is not None:
+        stamps = stamps[:periods] if end is None else stamps[-periods:]
+    return stamps
+
+def generate_log_returns(num_bars, num_tickers=1, model='gbm', drift=0.08, volatility=0.25,
+                         regimes=DEFAULT_REGIMES, transitions=DEFAULT_TRANSITIONS,
+                         interval='1d', correlation=0.0, seed=None):
+    """
+    Generate per-bar log returns for one or more tickers
+
+    'gbm' draws returns with constant drift and volatility (geometric Brownian
+    motion). 'regime' follows a Markov chain over (drift, volatility) regimes,
+    shared by all tickers; regime spells are drawn as geometric durations so no
+    per-bar loop is needed.
+
+    Parameters:
+    num_bars (int): Number of bars
+    num_tickers (int): Number of tickers (columns)
+    model (str): 'gbm' or 'regime'
+    drift (float): Annual drift for 'gbm'
+    volatility (float): Annual volatility for 'gbm'
+    regimes (tuple): (annual drift, annual volatility) per regime for 'regime'
+    transitions (tuple): Daily regime transition matrix for 'regime'
+    interval (str): Bar interval, used to scale annual parameters
+    correlation (float): Pairwise correlation of the tickers' shocks (0 to 1)
+    seed (int, list or numpy.random.SeedSequence): Random seed
+
+    Returns:
+    numpy.ndarray: Log returns with shape (num_bars, num_tickers)
+    """
+    log_returns, _ = _log_returns_with_volatility(num_bars, num_tickers, model, drift, volatility, regimes,
+                                                  transitions, interval, correlation, seed)
+    return log_returns
+
+def _log_returns_with_volatility(num_bars, num_tickers, model, drift, volatility, regimes,
+                                 transitions, interval, correlation, seed):
+    """Generate log returns and the per-bar volatility they were drawn with (see generate_log_returns)"""
+    # Separate streams keep bar i identical however many bars are drawn
+    shock_stream, common_stream, regime_stream = _streams(seed, 3)
+    dt = 1.0 / bars_per_year(interval)
+
+    # Correlated standard normal shocks: a common factor plus idiosyncratic noise
+    shocks = np.random.default_rng(shock_stream).standard_normal((num_bars, num_tickers))
+    if correlation > 0 and num_tickers > 1:
+        common = np.random.default_rng(common_stream).standard_normal((num_bars, 1))
+        shocks = np.sqrt(correlation) * common + np.sqrt(1 - correlation) * shocks
+
+    if model == 'gbm':
+        mu = np.full(num_bars, drift)
+        sigma = np.full(num_bars, volatility)
+    elif model == 'regime':
+        states = _regime_path(num_bars, transitions, bars_per_year(interval) // TRADING_DAYS_PER_YEAR,
+                              np.random.default_rng(regime_stream))
+        regime_params = np.asarray(regimes, dtype=float)
+        mu = regime_params[states, 0]
+        sigma = regime_params[states, 1]
+    else:
+        raise Exception(f"Unknown price model: {model}")
+
+    bar_volatility = (sigma * np.sqrt(dt))[:, None]
+    return ((mu - 0.5 * sigma ** 2) * dt)[:, None] + bar_volatility * shocks, bar_volatility
+
+def _streams(seed, count):
+    """Split a seed into independent random streams"""
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return sequence.spawn(count)
+
+def _regime_path(num_bars, transitions, bars_per_day, rng):
+    """Draw a regime index per bar from a daily Markov transition matrix"""
+    transitions = np.asarray(transitions, dtype=float)
+    num_regimes = len(transitions)
+    stay = np.diag(transitions)
+
+    # Spell lengths in days are geometric with the probability of leaving the regime
+    spells = []
+    state = 0
+    total_days = 0
+    num_days = -(-num_bars // bars_per_day)
+    while total_days < num_days:
+        leave = 1 - stay[state]
+        length = rng.geometric(leave) if leave > 0 else num_days
+        spells.append((state, length))
+        total_days += length
+        if num_regimes > 1 and leave > 0:
+            weights = transitions[state].copy()
+            weights[state] = 0
+            state = rng.choice(num_regimes, p=weights / weights.sum())
+
+    states = np.repeat([state for state, _ in spells], [length for _, length in spells])
+    return np.repeat(states[:num_days], bars_per_day)[:num_bars]
+
+def generate_ohlcv(dates, num_tickers=1, start_price=100.0, average_volume=5_000_000,
+                   interval='1d', seed=None, **return_params):
+    """
+    Generate OHLCV arrays for bars at the given timestamps
+
+    Volume is lognormal around average_volume and rises with the size of the
+    bar's move, as traded volume does on large moves.
+
+    Parameters:
+    dates (pandas.DatetimeIndex): Bar timestamps
+    num_tickers (int): Number of tickers
+    start_price (float or sequence): Price before the first bar, per ticker
+    average_volume (float): Typical volume per daily bar (scaled down for intraday bars)
+    interval (str): Bar interval
+    seed (int or list): Random seed
+    **return_params: Passed to generate_log_returns (model, drift, volatility, ...)
+
+    Returns:
+    dict: Open, High, Low, Close (float) and Volume (int) arrays of shape (bars, tickers)
+    """
+    return_stream, open_stream, range_stream, volume_stream = _streams(seed, 4)
+    num_bars = len(dates)
+    params = {'model': 'gbm', 'drift': 0.08, 'volatility': 0.25, 'regimes': DEFAULT_REGIMES,
+              'transitions': DEFAULT_TRANSITIONS, 'correlation': 0.0}
+    params.update(return_params)
+    log_returns, bar_volatility = _log_returns_with_volatility(
+        num_bars, num_tickers, params['model'], params['drift'], params['volatility'], params['regimes'],
+        params['transitions'], interval, params['correlation'], return_stream
+    )
+
+    start_price = np.broadcast_to(np.asarray(start_price, dtype=float), (num_tickers,))
+    close = start_price * np.exp(np.cumsum(log_returns, axis=0))
+    previous_close = np.vstack([start_price[None, :], close[:-1]])
+
+    # Opening gaps and intrabar ranges scale with the per-bar volatility
+    gaps = np.random.default_rng(open_stream).normal(0, 0.2, (num_bars, num_tickers))
+    ranges = np.abs(np.random.default_rng(range_stream).normal(0, 0.5, (num_bars, num_tickers, 2)))
+    open_ = previous_close * np.exp(gaps * bar_volatility)
+    high = np.maximum(open_, close) * np.exp(ranges[:, :, 0] * bar_volatility)
+    low = np.minimum(open_, close) * np.exp(-ranges[:, :, 1] * bar_volatility)
+
+    # Volume rises with the size of the move relative to the bar volatility
+    bar_volume = average_volume * TRADING_DAYS_PER_YEAR / bars_per_year(interval)
+    move = np.abs(log_returns) / bar_volatility
+    noise = np.random.default_rng(volume_stream).lognormal(-0.08, 0.4, (num_bars, num_tickers))
+    volume = bar_volume * noise * (0.6 + 0.4 * move)
+
+    return {
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': np.maximum(volume, 1).astype(np.int64)
+    }
+
+def _ticker_seed(seed, ticker):
+    """Derive a stable per-ticker seed, so a ticker's path does not depend on the other tickers"""
+    return [seed or 0, zlib.crc32(ticker.encode('utf-8'))]
+
+def _raw_frame(arrays, dates, column):
+    """Build a yf.download-style frame for one ticker column of generate_ohlcv output"""
+    frame = pd.DataFrame({name: values[:, column] for name, values in arrays.items()}, index=dates)
+    frame.insert(4, 'Adj Close', frame['Close'])
+    return frame
+
+def make_downloader(seed=42, model='gbm', origin='2000-01-03', **params):
+    """
+    Create a synthetic downloader with the yf.download signature
+
+    Each ticker gets its own deterministic path that starts at origin, so the
+    same ticker and date always get the same bar whatever range is requested
+    (as with a real data source). Use with financial_data.set_downloader.
+
+    Parameters:
+    seed (int): Base random seed
+    model (str): 'gbm' or 'regime' (see generate_log_returns)
+    origin (str): First day of every daily path; intraday paths start at the requested start
+    **params: Passed to generate_ohlcv (start_price, average_volume, drift, volatility, ...)
+
+    Returns:
+    callable: downloader(tickers, start=None, end=None, interval='1d', **kwargs) returning
+              a frame indexed by date with Open, High, Low, Close, Adj Close and Volume
+              columns for one ticker, or (Price, Ticker) MultiIndex columns for several
+    """
+    def download(tickers, start=None, end=None, interval='1d', **kwargs):
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        start = pd.Timestamp(start) if start is not None else end - pd.DateOffset(years=1)
+
+        path_start = pd.Timestamp(origin) if interval == '1d' and origin is not None else start
+        dates = trading_calendar(min(path_start, start), end, interval=interval)
+        keep = dates >= start
+
+        frames = {}
+        for symbol in symbols:
+            arrays = generate_ohlcv(dates, interval=interval, model=model, seed=_ticker_seed(seed, symbol), **params)
+            frames[symbol] = _raw_frame(arrays, dates, 0)[keep]
+
+        if isinstance(tickers, str) and len(symbols) == 1:
+            return frames[symbols[0]]
+        combined = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+        return combined.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+    return download
+
+def generate_stock_data(ticker_symbol='SYN', start_date=None, end_date=None, periods=None,
+                        interval='1d', seed=42, **params):
+    """
+    Generate a synthetic frame shaped exactly like fetch_stock_data output
+
+    Parameters:
+    ticker_symbol (str): Symbol to store in the Symbol column
+    start_date (datetime): First bar date
+    end_date (datetime): End of the range (exclusive; defaults to 2024-12-31 when only
+                         periods is given)
+    periods (int): Number of bars (instead of start_date or end_date)
+    interval (str): '1d' or an intraday interval from INTERVAL_MINUTES
+    seed (int): Random seed
+    **params: Passed to generate_ohlcv (model, start_price, drift, volatility, ...)
+
+    Returns:
+    pandas.DataFrame: Synthetic stock data with calculated columns and Symbol
+    """
+    if start_date is None and end_date is None:
+        end_date = pd.Timestamp('2024-12-31')
+    dates = trading_calendar(start_date, end_date, periods=periods, interval=interval)
+    arrays = generate_ohlcv(dates, interval=interval, seed=seed, **params)
+    return prepare_stock_data(_raw_frame(arrays, dates, 0), ticker_symbol, interval)
+
+def generate_universe(tickers, start_date=None, end_date=None, periods=None, interval='1d',
+                      seed=42, correlation=0.3, **params):
+    """
+    Generate fetch_stock_data-shaped frames for several tickers on a shared calendar
+
+    All tickers are drawn together with correlated shocks, as for a basket of
+    stocks exposed to the same market factor.
+
+    Parameters:
+    tickers (list): Ticker symbols
+    start_date (datetime): First bar date
+    end_date (datetime): End of the range (exclusive)
+    periods (int): Number of bars (instead of start_date or end_date)
+    interval (str): '1d' or an intraday interval from INTERVAL_MINUTES
+    seed (int): Random seed
+    correlation (float): Pairwise correlation of the tickers' shocks
+    **params: Passed to generate_ohlcv
+
+    Returns:
+    dict: Ticker symbol -> synthetic stock data
+    """
+    if start_date is None and end_date is None:
+        end_date = pd.Timestamp('2024-12-31')
+    dates = trading_calendar(start_date, end_date, periods=periods, interval=interval)
+    arrays = generate_ohlcv(dates, num_tickers=len(tickers), interval=interval, seed=seed,
+                            correlation=correlation, **params)
+    return {
+        ticker: prepare_stock_data(_raw_frame(arrays, dates, column), ticker, interval)
+        for column, ticker in enumerate(tickers)
+    }
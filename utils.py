@@ -1,8 +1,10 @@
 import streamlit as st
-import re
+import html
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from financial_data import detect_key_events
+import profiling
 
 def display_error(title, error_message):
     """
@@ -26,10 +28,14 @@ def format_currency(value):
     """
     return f"${value:,.2f}"
 
+@profiling.traced('utils.highlight_inconsistencies')
 def highlight_inconsistencies(narrative, consistency_report):
     """
     Highlight inconsistencies in the narrative based on the consistency report
     
+    Claims are located by their 'start'/'end' offsets when the report has them,
+    and the HTML is assembled in a single left-to-right pass over the narrative.
+    
     Parameters:
     narrative (str): The generated narrative text
     consistency_report (dict): The consistency report with claim checks
@@ -40,15 +46,6 @@ def highlight_inconsistencies(narrative, consistency_report):
     if not consistency_report or 'claim_checks' not in consistency_report:
         return narrative
     
-    # Create a copy of the narrative
-    highlighted_narrative = narrative
-    
-    # Sort claims by consistency score (lowest first to avoid highlighting issues)
-    sorted_claims = sorted(
-        consistency_report['claim_checks'], 
-        key=lambda x: x.get('consistency_score', 1.0)
-    )
-    
     # Define highlight colors based on consistency score
     def get_highlight_color(score):
         if score < 0.5:
@@ -58,27 +55,63 @@ def highlight_inconsistencies(narrative, consistency_report):
         else:
             return "#CCFFCC"  # Green highlight for high consistency
     
-    # Highlight each claim with appropriate color
-    for claim in sorted_claims:
+    # Collect the character span of every claim that needs highlighting
+    spans = []
+    cursor = 0
+    for claim in consistency_report['claim_checks']:
         claim_text = claim.get('claim_text', '')
+        score = claim.get('consistency_score', 1.0)
+        start = claim.get('start')
+        end = claim.get('end')
+        
+        # Compact reports store only offsets
+        if not claim_text and start is not None and end is not None:
+            claim_text = narrative[start:end]
+        
+        if not claim_text:
+            continue
+        
+        # Reports without offsets (or with stale ones) fall back to searching forward,
+        # which stays linear because claims are stored in narrative order
+        if start is None or end is None or narrative[start:end] != claim_text:
+            start = narrative.find(claim_text, cursor)
+            if start == -1:
+                start = narrative.find(claim_text)
+            if start == -1:
+                continue
+            end = start + len(claim_text)
+        cursor = max(cursor, end)
+        
+        if score < 0.9:  # Only highlight claims with score < 0.9
+            spans.append((start, end, claim))
+    
+    # Order by position; lower scores win when two claims start at the same offset
+    spans.sort(key=lambda span: (span[0], span[2].get('consistency_score', 1.0)))
+    
+    parts = []
+    position = 0
+    for start, end, claim in spans:
+        # Overlapping claims are clipped so no text is wrapped twice
+        start = max(start, position)
+        if start >= end:
+            continue
+        
         score = claim.get('consistency_score', 1.0)
         verification = claim.get('verification_result', '')
         explanation = claim.get('explanation', '')
+        highlight_color = get_highlight_color(score)
         
-        if claim_text and score < 0.9:  # Only highlight claims with score < 0.9
-            # Escape regex special characters in the claim text
-            escaped_claim = re.escape(claim_text)
-            highlight_color = get_highlight_color(score)
-            
-            # Create tooltip with verification details
-            tooltip = f"Score: {score:.2f}, Result: {verification}, Explanation: {explanation}"
-            
-            # Replace the claim text with highlighted version (with tooltip)
-            highlighted_claim = f'<span title="{tooltip}" style="background-color: {highlight_color};">{claim_text}</span>'
-            highlighted_narrative = highlighted_narrative.replace(claim_text, highlighted_claim)
+        # Create tooltip with verification details
+        tooltip = html.escape(f"Score: {score:.2f}, Result: {verification}, Explanation: {explanation}", quote=True)
+        
+        parts.append(narrative[position:start])
+        parts.append(f'<span title="{tooltip}" style="background-color: {highlight_color};">{narrative[start:end]}</span>')
+        position = end
+    
+    parts.append(narrative[position:])
     
     # Wrap in HTML paragraph tags for proper rendering
-    return f'<p>{highlighted_narrative}</p>'
+    return f'<p>{"".join(parts)}</p>'
 
 def parse_date_range(date_str):
     """
@@ -116,12 +149,14 @@ def truncate_text(text, max_length=1000):
         return text
     return text[:max_length] + "..."
 
-def find_key_dates(financial_data):
+def find_key_dates(financial_data, change_threshold=0.05, top_n=None):
     """
     Find key dates in the financial data (e.g., highest/lowest price days)
     
     Parameters:
     financial_data (pandas.DataFrame): DataFrame with financial data
+    change_threshold (float): Absolute daily return above which a move is significant (0.05 = 5%)
+    top_n (int): Keep only the N largest significant moves (None keeps all)
     
     Returns:
     dict: Dictionary of key dates and their significance
@@ -129,46 +164,39 @@ def find_key_dates(financial_data):
     key_dates = {}
     
     if len(financial_data) > 0:
-        # Find date with highest price
-        highest_price_idx = financial_data['High'].idxmax()
-        highest_price_date = financial_data.loc[highest_price_idx, 'Date']
-        highest_price = financial_data.loc[highest_price_idx, 'High']
-        key_dates['highest_price'] = {
-            'date': highest_price_date,
-            'value': highest_price,
-            'description': f"Highest price of {format_currency(highest_price)}"
-        }
+        events = detect_key_events(financial_data, change_threshold=change_threshold, top_n=top_n)
+        extremes = events['extremes']
+        
+        if 'highest_price' in extremes:
+            key_dates['highest_price'] = {
+                'date': extremes['highest_price']['date'],
+                'value': extremes['highest_price']['value'],
+                'description': f"Highest price of {format_currency(extremes['highest_price']['value'])}"
+            }
         
-        # Find date with lowest price
-        lowest_price_idx = financial_data['Low'].idxmin()
-        lowest_price_date = financial_data.loc[lowest_price_idx, 'Date']
-        lowest_price = financial_data.loc[lowest_price_idx, 'Low']
-        key_dates['lowest_price'] = {
-            'date': lowest_price_date,
-            'value': lowest_price,
-            'description': f"Lowest price of {format_currency(lowest_price)}"
-        }
+        if 'lowest_price' in extremes:
+            key_dates['lowest_price'] = {
+                'date': extremes['lowest_price']['date'],
+                'value': extremes['lowest_price']['value'],
+                'description': f"Lowest price of {format_currency(extremes['lowest_price']['value'])}"
+            }
         
-        # Find date with highest volume
-        highest_volume_idx = financial_data['Volume'].idxmax()
-        highest_volume_date = financial_data.loc[highest_volume_idx, 'Date']
-        highest_volume = financial_data.loc[highest_volume_idx, 'Volume']
-        key_dates['highest_volume'] = {
-            'date': highest_volume_date,
-            'value': highest_volume,
-            'description': f"Highest trading volume of {highest_volume:,}"
-        }
+        if 'highest_volume' in extremes:
+            key_dates['highest_volume'] = {
+                'date': extremes['highest_volume']['date'],
+                'value': extremes['highest_volume']['value'],
+                'description': f"Highest trading volume of {extremes['highest_volume']['value']:,}"
+            }
         
-        # Find dates with significant price changes (>5% in a day)
-        if 'Daily_Return' in financial_data.columns:
-            significant_changes = financial_data[abs(financial_data['Daily_Return']) > 0.05]
-            for idx, row in significant_changes.iterrows():
-                change_pct = row['Daily_Return'] * 100
-                direction = "increase" if change_pct > 0 else "decrease"
-                key_dates[f'significant_change_{idx}'] = {
-                    'date': row['Date'],
-                    'value': change_pct,
-                    'description': f"Significant price {direction} of {abs(change_pct):.2f}%"
-                }
+        # Dates with significant price changes, keyed by the original row label
+        changes = events['changes']
+        labels = financial_data.index[changes['position']]
+        for label, date, change_pct in zip(labels, changes['date'], changes['value']):
+            direction = "increase" if change_pct > 0 else "decrease"
+            key_dates[f'significant_change_{label}'] = {
+                'date': pd.Timestamp(date),
+                'value': change_pct,
+                'description': f"Significant price {direction} of {abs(change_pct):.2f}%"
+            }
     
     return key_dates
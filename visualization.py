@@ -3,7 +3,10 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import profiling
+from resampling import get_interval, is_intraday, window_label
 
+@profiling.traced('visualization.create_stock_chart')
 def create_stock_chart(data):
     """
     Create an interactive chart based on the provided data
@@ -18,6 +21,9 @@ def create_stock_chart(data):
     is_financial_data = all(col in data.columns for col in ['Open', 'High', 'Low', 'Close', 'Volume'])
     
     if is_financial_data:
+        # Moving average windows are in bars of the data's interval
+        interval = get_interval(data)
+        
         # Create subplot with 2 rows for financial data
         fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
                            vertical_spacing=0.1, 
@@ -44,7 +50,7 @@ def create_stock_chart(data):
                     x=data['Date'],
                     y=data['MA_20'],
                     line=dict(color='rgba(255, 165, 0, 0.7)', width=1.5),
-                    name="20-day MA"
+                    name=f"{window_label(20, interval)} MA"
                 ),
                 row=1, col=1
             )
@@ -55,7 +61,7 @@ def create_stock_chart(data):
                     x=data['Date'],
                     y=data['MA_50'],
                     line=dict(color='rgba(46, 139, 87, 0.7)', width=1.5),
-                    name="50-day MA"
+                    name=f"{window_label(50, interval)} MA"
                 ),
                 row=1, col=1
             )
@@ -85,6 +91,10 @@ def create_stock_chart(data):
         # Update y-axis labels
         fig.update_yaxes(title_text="Price ($)", row=1, col=1)
         fig.update_yaxes(title_text="Volume", row=2, col=1)
+
+        # Hide nights and weekends so intraday bars are not spread across empty gaps
+        if is_intraday(interval):
+            fig.update_xaxes(rangebreaks=[dict(bounds=['sat', 'mon']), dict(bounds=[16, 9.5], pattern='hour')])
     else:
         # For generic data, create different visualizations based on the columns
         has_date = 'Date' in data.columns
@@ -185,6 +195,7 @@ def create_stock_chart(data):
     
     return fig
 
+@profiling.traced('visualization.create_market_trend_chart')
 def create_market_trend_chart(data):
     """
     Create an interactive chart showing market trends or general data trends
@@ -203,6 +214,9 @@ def create_market_trend_chart(data):
     is_market_data = has_date and has_close
     
     if is_market_data:
+        # Moving average windows are in bars of the data's interval
+        interval = get_interval(data)
+        
         # Create market trend chart
         fig.add_trace(
             go.Scatter(
@@ -222,7 +236,7 @@ def create_market_trend_chart(data):
                     y=data['MA_20'],
                     mode='lines',
                     line=dict(color='rgba(255, 165, 0, 0.7)', width=1.5, dash='dot'),
-                    name="20-day MA"
+                    name=f"{window_label(20, interval)} MA"
                 )
             )
         
@@ -233,7 +247,7 @@ def create_market_trend_chart(data):
                     y=data['MA_50'],
                     mode='lines',
                     line=dict(color='rgba(46, 139, 87, 0.7)', width=1.5, dash='dash'),
-                    name="50-day MA"
+                    name=f"{window_label(50, interval)} MA"
                 )
             )
         
@@ -345,6 +359,7 @@ def create_market_trend_chart(data):
     
     return fig
 
+@profiling.traced('visualization.create_consistency_gauge')
 def create_consistency_gauge(consistency_score, threshold=0.85):
     """
     Create a gauge chart displaying the consistency score